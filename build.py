@@ -10,6 +10,7 @@ from __future__ import absolute_import
 import sys
 import glob
 import hashlib
+import multiprocessing
 import optparse
 import os
 import re
@@ -76,6 +77,11 @@ doxygenMD5 = {
 # And the location where they can be downloaded from
 toolsURL = 'http://wxpython.org/Phoenix/tools'
 
+# The number of source files the C++ code of each cffi module's classes is
+# split into. It doesn't depend on --jobs so that the generated files, and so
+# whether the modules are up to date, are the same however many jobs are used.
+cffiDefaultShards = 4
+
 #---------------------------------------------------------------------------
 
 def usage():
@@ -301,6 +307,38 @@ def setDevModeOptions(args):
         args[idx:idx+1] = myDevModeOptions
 
 
+def numJobs(options):
+    """
+    The number of parallel jobs to use for the steps that run them in this
+    script.
+    """
+    if options.jobs:
+        return int(options.jobs)
+    return numCPUs()
+
+
+def runcmds(cmds, jobs):
+    """
+    Run independent commands, up to jobs at a time, and exit if any fail.
+    """
+    from multiprocessing.pool import ThreadPool
+
+    def run(cmd):
+        msg(cmd)
+        return subprocess.call(cmd, shell=True, env=os.environ)
+
+    pool = ThreadPool(max(jobs, 1))
+    try:
+        results = pool.map(run, cmds)
+    finally:
+        pool.close()
+        pool.join()
+    for cmd, rval in zip(cmds, results):
+        if rval:
+            print("Command '%s' failed with exit code %d." % (cmd, rval))
+            sys.exit(rval)
+
+
 def numCPUs():
     """
     Detects the number of CPUs on a system.
@@ -390,6 +428,13 @@ def makeOptionParser():
         ("cairo",          (False, "Allow Cairo use with wxGraphicsContext (Windows only)")),
         ("x64",            (False, "Use and build for the 64bit version of Python on Windows")),
         ("jom",            (False, "Use jom instead of nmake for the wxMSW build")),
+        ("cffi_lazy",      (False, "Generate cffi bindings whose classes are populated "
+                                   "the first time they are used")),
+        ("cffi_release",   (False, "Compile the cffi bindings with optimizations "
+                                   "instead of with -O0 -g")),
+        ("cffi_shards",    ("",    "Number of source files to split the C++ code of "
+                                   "each cffi module's classes into, so that they can "
+                                   "be compiled in parallel. Defaults to %d" % cffiDefaultShards)),
         ]
 
     parser = optparse.OptionParser("build options:")
@@ -696,6 +741,7 @@ def cmd_etg(options, args):
         etgfiles.remove(core_file)
         etgfiles.insert(0, core_file)
 
+    cmds = []
     for script in etgfiles:
         outfile = etg2outfile(options.generator, script)
         deps = [script]
@@ -709,7 +755,12 @@ def cmd_etg(options, args):
 
         # run the script only if any dependencies are newer
         if newer_group(deps, outfile):
-            runcmd('"%s" %s %s' % (PYTHON, script, flags))
+            cmds.append('"%s" %s %s' % (PYTHON, script, flags))
+
+    # _core is still run first, the others are independent of each other
+    if cmds and core_file in cmds[0]:
+        runcmd(cmds.pop(0))
+    runcmds(cmds, numJobs(options))
 
 
 def cmd_sphinx(options, args):
@@ -912,6 +963,26 @@ def cmd_sip(options, args):
         shutil.rmtree(tmpdir)
 
 
+_cffiCompileSlots = None
+
+def _cffiInitWorker(slots):
+    global _cffiCompileSlots
+    _cffiCompileSlots = slots
+
+
+def _cffiCompile(ext, tmpdir, jobs):
+    # Run in the worker processes of cmd_cffi_gen. Return the error message
+    # if the compilation failed, as exceptions from distutils may not be
+    # picklable.
+    from etgtools.cffi.bindgen import compile_extension
+    try:
+        compile_extension(ext, tmpdir, jobs, _cffiCompileSlots)
+    except Exception as e:
+        print("Compiling %s failed: %s" % (ext.name, e))
+        return str(e)
+    return None
+
+
 def cmd_cffi_gen(options, args):
     from etgtools.cffi.bindgen import BindingGenerator, LiteralVerifyArg
 
@@ -954,8 +1025,11 @@ def cmd_cffi_gen(options, args):
     cxxflags.append('-I' + opj(CFFI_DIR, 'include'))
     cxxflags.append('-I' + opj(CFFI_DIR, 'cpp_gen'))
     cxxflags.append('-I' + opj(cfg.ROOT_DIR, 'src'))
-    cxxflags.append('-O0')
-    cxxflags.append('-g')
+    if options.cffi_release:
+        cxxflags.append('-O2')
+    else:
+        cxxflags.append('-O0')
+        cxxflags.append('-g')
 
     globalVerifyArgs = {'extra_compile_args': cxxflags,
                         'extra_link_args': libs,
@@ -965,7 +1039,7 @@ def cmd_cffi_gen(options, args):
     def_path_pattern = os.path.join(DEF_DIR, '%s.def')
     def_glob =  def_path_pattern % '_*'
 
-    gen = BindingGenerator(def_path_pattern)
+    gen = BindingGenerator(def_path_pattern, lazy_classes=options.cffi_lazy)
 
     # get the files to run, moving _core the to the front of the list
     def_files = glob.glob(def_glob)
@@ -974,8 +1048,59 @@ def cmd_cffi_gen(options, args):
         def_files.remove(core_file)
         def_files.insert(0, core_file)
 
+    # wrapper_lib's own FFI object is prebuilt too, so that importing it
+    # doesn't parse a cdef either. Load the build script directly; importing
+    # wrapper_lib would fall back to ffi.verify().
+    import imp
+    ffi_build = imp.load_source(
+        '_ffi_build', opj(CFFI_DIR, 'wrapper_lib', '_ffi_build.py'))
+    print("Compile %s" % ffi_build.MODULE_NAME)
+    ffi_build.compile_ffi(CFFI_DIR)
+
+    # A module is only regenerated and recompiled when the contents of the
+    # .def files it depends on, the generator or the build options have
+    # changed since the last time. The .def files are compared by the hashes
+    # they carry, as the etg command touches them even when they don't
+    # change, and the hash of the ones used for the last build of a module is
+    # kept next to its C++ code. The build options are kept in a file so that
+    # changing them makes every module out of date. --jobs isn't one of them,
+    # it only changes how many compilers are run at the same time.
+    options_path = opj(CFFI_DIR, 'cpp_gen', 'build_options.txt')
+    jobs = numJobs(options)
+    shards = int(options.cffi_shards) if options.cffi_shards else cffiDefaultShards
+    build_options = repr((sorted(globalVerifyArgs.items()), options.cffi_lazy,
+                          options.cffi_shards))
+    if (not os.path.exists(options_path) or
+        textfile_open(options_path, 'rt').read() != build_options):
+        with textfile_open(options_path, 'wt') as f:
+            f.write(build_options)
+    gen_deps = ([options_path] +
+                glob.glob(opj(cfg.ROOT_DIR, 'etgtools', 'cffi', '*.py')) +
+                glob.glob(opj(cfg.ROOT_DIR, 'etgtools', 'cffi', '*', '*.py')) +
+                glob.glob(opj(CFFI_DIR, 'include', '*.h')))
+
+    # The generated modules are compiled in worker processes while the next
+    # ones are generated. Generation stays in this process because modules
+    # need the generated modules they import. The source files of each module
+    # are compiled in parallel too, but no more than jobs compilers are run
+    # at the same time.
+    pool = None
+    if jobs > 1:
+        slots = multiprocessing.BoundedSemaphore(jobs)
+        pool = multiprocessing.Pool(jobs, _cffiInitWorker, (slots,))
+    compiling = []
+
     for mod_path in def_files:
         mod_name = os.path.basename(mod_path)[:-4]
+        pyfilepath = opj(CFFI_DIR, 'wx', mod_name + '.py')
+        hashfilepath = opj(CFFI_DIR, 'cpp_gen', mod_name + '.hash')
+        defsHash = gen.dependencies_hash(mod_name)
+        if (not newer_group(gen_deps, pyfilepath) and
+            os.path.exists(hashfilepath) and
+            textfile_open(hashfilepath, 'rt').read() == defsHash):
+            print("%s is up to date" % mod_name)
+            continue
+
         print("Generate %s" % mod_name)
         gen.generate(mod_name)
 
@@ -983,12 +1108,47 @@ def cmd_cffi_gen(options, args):
 
         hfile = open(opj(CFFI_DIR, 'cpp_gen', mod_name + '.h'), 'w')
         cppfile = open(cppfilepath, 'w')
-        pyfile = open(opj(CFFI_DIR, 'wx', mod_name + '.py'), 'w')
+        pyfile = open(pyfilepath, 'w')
         userpyfile = open(opj(CFFI_DIR, 'wx', mod_name.strip('_') + '.py'), 'w')
-        verify_args = dict(sources=[cppfilepath], **globalVerifyArgs)
+        # The classes are split into files of their own when more than one
+        # file is wanted
+        classfilepaths = [opj(CFFI_DIR, 'cpp_gen', '%s_classes%d.cpp' % (mod_name, i))
+                          for i in range(shards if shards > 1 else 0)]
+        classfiles = [open(path, 'w') for path in classfilepaths]
+        verify_args = dict(sources=[cppfilepath] + classfilepaths,
+                           **globalVerifyArgs)
+        ext = gen.write_files(mod_name, pyfile, userpyfile, cppfile, hfile,
+                              verify_args, CFFI_DIR, compile=False,
+                              class_cppfiles=classfiles)
+        for f in [hfile, cppfile, pyfile, userpyfile] + classfiles:
+            f.close()
+
         print("Compile %s" % mod_name)
-        gen.write_files(mod_name, pyfile, userpyfile, cppfile, hfile,
-                        verify_args)
+        if pool is None:
+            result = _cffiCompile(ext, CFFI_DIR, 1)
+        else:
+            result = pool.apply_async(_cffiCompile, (ext, CFFI_DIR, jobs))
+        compiling.append((mod_name, pyfilepath, hashfilepath, defsHash,
+                          result))
+
+    if pool is not None:
+        pool.close()
+    failed = []
+    for mod_name, pyfilepath, hashfilepath, defsHash, result in compiling:
+        if pool is not None:
+            result = result.get()
+        if result is not None:
+            # Make sure the module is rebuilt next time
+            os.remove(pyfilepath)
+            failed.append(mod_name)
+        else:
+            with textfile_open(hashfilepath, 'wt') as f:
+                f.write(defsHash)
+    if pool is not None:
+        pool.join()
+    if failed:
+        print("Failed to compile %s" % ', '.join(failed))
+        sys.exit(1)
 
     # Copy src/__init__.py
     copyFile(opj(cfg.ROOT_DIR, 'src', '__init__.py'),
@@ -0,0 +1,69 @@
+"""
+Stress the parent/child ownership tracking in wrapper_lib: attach many
+children to a single parent, detach some of them again in random order (like
+wx.Window.RemoveChild) and then destroy the parent from C++ (like a
+wx.Window's destructor), which detaches all of the remaining children.
+
+With the cffi directory on the PYTHONPATH, run eg:
+
+    python cffi/bench/bench_children.py -n 100000
+"""
+import gc
+import sys
+import time
+import random
+import optparse
+import itertools
+
+import wrapper_lib
+from wrapper_lib import CppWrapper, CastData, give_ownership, take_ownership
+
+ffi = wrapper_lib._ffi.ffi
+addresses = itertools.count(0x1000, 0x10)
+
+class Obj(CppWrapper):
+    _castdata = CastData([])
+
+    def __init__(self):
+        CppWrapper.__init__(self, ffi.cast('void*', next(addresses)))
+
+def timed(label, func, *args):
+    start = time.time()
+    result = func(*args)
+    elapsed = time.time() - start
+    print('%-10s %.3fs' % (label, elapsed))
+    return result
+
+def attach(parent, children):
+    for child in children:
+        give_ownership(child, parent)
+
+def detach(children):
+    for child in children:
+        take_ownership(child)
+
+def teardown(parent):
+    wrapper_lib.forget_ptr(parent._cpp_obj)
+    gc.collect()
+
+def main(args):
+    parser = optparse.OptionParser("usage: %prog [options]")
+    parser.add_option('-n', '--children', type='int', default=100000,
+                      help='number of children to attach (default: %default)')
+    parser.add_option('-d', '--detach', type='float', default=0.5,
+                      help='fraction of the children to detach before the '
+                           'parent is destroyed (default: %default)')
+    options, args = parser.parse_args(args)
+
+    parent = Obj()
+    give_ownership(parent, None, True)
+    children = [Obj() for i in range(options.children)]
+    detached = random.sample(children, int(len(children) * options.detach))
+
+    timed('attach', attach, parent, children)
+    timed('detach', detach, detached)
+    del children, detached
+    timed('teardown', teardown, parent)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,48 @@
+"""
+Time wrapper_lib's copying of Python strings into malloc'd C strings, which
+happens for every string returned to C++ from a Python override of a virtual
+method, for strings from 10 bytes to 1 MB.
+
+With the cffi directory on the PYTHONPATH, run eg:
+
+    python cffi/bench/bench_cstring.py -n 10000
+"""
+import sys
+import time
+import optparse
+
+import cffi
+import wrapper_lib
+
+libc_ffi = cffi.FFI()
+libc_ffi.cdef("""
+void* malloc(size_t);
+void free(void*);
+""")
+libc = libc_ffi.dlopen(None)
+
+SIZES = [10, 100, 1000, 10000, 100000, 1000000]
+
+def allocate(func, s, count):
+    start = time.time()
+    for i in range(count):
+        libc.free(func(s, libc))
+    return time.time() - start
+
+def main(args):
+    parser = optparse.OptionParser("usage: %prog [options]")
+    parser.add_option('-n', '--bytes', type='int', default=10000000,
+                      help='number of bytes to copy for each string size '
+                           '(default: %default)')
+    options, args = parser.parse_args(args)
+
+    for size in SIZES:
+        count = max(options.bytes // size, 10)
+        for func, s in ((wrapper_lib.allocate_cstring, 'x' * size),
+                        (wrapper_lib.allocate_cunicode, u'x' * size)):
+            elapsed = allocate(func, s, count)
+            print('%-18s %8d bytes %10.2fus per string' %
+                  (func.__name__, size, elapsed / count * 1e6))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
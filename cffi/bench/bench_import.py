@@ -0,0 +1,70 @@
+"""
+Time importing the wx core module from one or more builds of the cffi
+bindings, for example to compare bindings generated in eager mode and in lazy
+mode (``./build.py cffi_gen --cffi_lazy``).
+
+The generated Python code is the only difference between the two modes, so
+build the bindings twice and copy the ``cffi`` directory aside in between:
+
+    ./build.py cffi_gen && cp -r cffi /tmp/cffi_eager
+    ./build.py cffi_gen --cffi_lazy && cp -r cffi /tmp/cffi_lazy
+    python cffi/bench/bench_import.py /tmp/cffi_eager /tmp/cffi_lazy
+
+Every import happens in a fresh interpreter. The cold import is timed after
+deleting the build's .pyc files; the warm imports reuse them.
+"""
+import os
+import sys
+import optparse
+import subprocess
+
+IMPORT_SCRIPT = """\
+import time
+start = time.time()
+import %s
+print(time.time() - start)
+"""
+
+def remove_pyc_files(cffi_dir):
+    for dirpath, dirnames, filenames in os.walk(cffi_dir):
+        for name in filenames:
+            if name.endswith(('.pyc', '.pyo')):
+                os.remove(os.path.join(dirpath, name))
+
+def time_import(cffi_dir, module, repeat):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [cffi_dir] + env.get('PYTHONPATH', '').split(os.pathsep))
+    times = []
+    for i in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-c', IMPORT_SCRIPT % module], env=env)
+        times.append(float(output.strip().splitlines()[-1]))
+    times.sort()
+    return times
+
+def main(args):
+    parser = optparse.OptionParser("usage: %prog [options] CFFI_DIR...")
+    parser.add_option('-m', '--module', default='wx.core',
+                      help='the module to import (default: %default)')
+    parser.add_option('-n', '--repeat', type='int', default=10,
+                      help='number of warm imports to time (default: %default)')
+    options, args = parser.parse_args(args)
+    if not args:
+        parser.error('expected at least one cffi directory')
+
+    baseline = None
+    for cffi_dir in args:
+        remove_pyc_files(cffi_dir)
+        cold = time_import(cffi_dir, options.module, 1)[0]
+        warm = time_import(cffi_dir, options.module, options.repeat)
+        median = warm[len(warm) // 2]
+        if baseline is None:
+            baseline = median
+
+        print('%s\n    cold %.3fs  warm min %.3fs  median %.3fs  max %.3fs  '
+              '(%.2fx)' % (cffi_dir, cold, warm[0], median, warm[-1],
+                           median / baseline))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
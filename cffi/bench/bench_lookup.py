@@ -0,0 +1,66 @@
+"""
+Time wrapper_lib's pointer to wrapper lookups, which happen for (almost)
+every pointer a wrapped function returns or a virtual method receives:
+creating wrappers for new pointers and finding the existing wrappers of known
+pointers, with and without detection of the objects' dynamic classes.
+
+With the cffi directory on the PYTHONPATH, run eg:
+
+    python cffi/bench/bench_lookup.py -n 100000
+"""
+import sys
+import time
+import optparse
+import itertools
+
+import wrapper_lib
+from wrapper_lib import CppWrapper, CastData, obj_from_ptr
+
+ffi = wrapper_lib._ffi.ffi
+addresses = itertools.count(0x1000, 0x10)
+CLASSNAME = ffi.new('char[]', 'Derived')
+CLASSNAME_PTR = ffi.cast('char*', CLASSNAME)
+
+class Obj(CppWrapper):
+    _castdata = CastData([])
+
+class Base(CppWrapper):
+    _castdata = CastData([])
+
+    @staticmethod
+    def _get_cpp_classname_(ptr):
+        return CLASSNAME_PTR
+
+class Derived(Base):
+    pass
+
+wrapper_lib.register_cpp_classname('Derived', Derived)
+
+def timed(label, func, *args):
+    start = time.time()
+    result = func(*args)
+    elapsed = time.time() - start
+    print('%-16s %.3fs' % (label, elapsed))
+    return result
+
+def lookup(ptrs, klass):
+    return [obj_from_ptr(ptr, klass) for ptr in ptrs]
+
+def main(args):
+    parser = optparse.OptionParser("usage: %prog [options]")
+    parser.add_option('-n', '--pointers', type='int', default=100000,
+                      help='number of pointers to look up (default: %default)')
+    parser.add_option('-r', '--repeat', type='int', default=5,
+                      help='number of lookups of each pointer (default: %default)')
+    options, args = parser.parse_args(args)
+
+    for klass in (Obj, Base):
+        ptrs = [ffi.cast('void*', next(addresses))
+                for i in range(options.pointers)]
+        objs = timed('%s new' % klass.__name__, lookup, ptrs, klass)
+        timed('%s existing' % klass.__name__, lookup,
+              ptrs * options.repeat, klass)
+        del objs
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
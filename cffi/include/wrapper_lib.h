@@ -1,11 +1,23 @@
 #include <cstring>
 #include <cstdlib>
+#include <cstddef>
+#include <set>
+#include <string>
+
+// Only one of a module's source files defines these. The others (eg the
+// files with the code of the module's classes) define WL_EXTERN_GLOBALS
+// before including this header.
+#ifdef WL_EXTERN_GLOBALS
+#    define WL_GLOBAL extern
+#else
+#    define WL_GLOBAL
+#endif
 
 extern "C"
 {
-    void (*WL_ADJUST_REFCOUNT)(void *, int);
-    char **WL_EXCEPTION_NAME;
-    char **WL_EXCEPTION_STRING;
+    WL_GLOBAL void (*WL_ADJUST_REFCOUNT)(void *, int);
+    WL_GLOBAL char **WL_EXCEPTION_NAME;
+    WL_GLOBAL char **WL_EXCEPTION_STRING;
 }
 
 #define WL_SET_EXCEPTION(name, string)\
@@ -28,6 +40,27 @@ extern "C"
 #    define WL_C_INTERNAL extern "C"
 #endif
 
+// Returns a copy of name that stays at the same address for as long as the
+// module is loaded and that is shared by all equal names. This lets Python
+// cache lookups by the returned pointer rather than by the string. name must
+// have been allocated with malloc and is freed.
+inline const char * WL_intern_classname(const char *name)
+{
+    static std::set<std::string> names;
+    const char *interned = names.insert(name).first->c_str();
+    free((void*)name);
+    return interned;
+}
+
+// The offset of Base within Derived. A dummy address is used because casting
+// NULL always gives NULL. Only valid for non-virtual inheritance.
+template<typename Derived, typename Base>
+inline ptrdiff_t WL_base_offset()
+{
+    Derived *derived = reinterpret_cast<Derived*>(0x1000);
+    return (char*)(Base*)derived - (char*)derived;
+}
+
 template<typename T, typename CType>
 struct WL_mappedtype
 {
@@ -3,7 +3,6 @@ import os
 import sys
 import imp
 import weakref
-import pickle
 import pytest
 
 import wrapper_lib
@@ -20,7 +19,9 @@ from etgtools.extractors import (
     MappedTypeDef_cffi, ArgsString)
 
 from etgtools.cffi_generator import CffiWrapperGenerator
-from etgtools.cffi.bindgen import BindingGenerator, LiteralVerifyArg
+from etgtools.deffile import writeDefFile
+from etgtools.cffi.bindgen import (BindingGenerator, LiteralVerifyArg,
+                                   compile_extension)
 
 from buildtools.config import Config
 cfg = Config(noWxConfig=True).ROOT_DIR
@@ -34,7 +35,8 @@ class TestBindGen(object):
 
         cls.tmpdir = pytest.ensuretemp('build', dir=True)
         cls.gen = cls.create_generators()
-        cls.mod = cls.build_module('_core')
+        # Compile _core the way build.py does
+        cls.mod = cls.build_module('_core', compile=False, class_shards=3)
         cls.mod2 = cls.build_module('_extra')
 
     @classmethod
@@ -43,6 +45,11 @@ class TestBindGen(object):
 
         module = ModuleDef('bindgen_test', '_core', '_core')
         module.addHeaderCode('#include <test_bindgen.h>')
+        # Used by class code, which is split into separate files
+        module.addCppCode('#define STATIC_CPPMETHOD_RESULT 1.0')
+        # Defined only in _core.cpp, the class files see the declaration
+        module.addHeaderCode('double cppcode_helper(double f);')
+        module.addCppCode('double cppcode_helper(double f) { return f * 3; }')
 
         module.addPyCode('from _core import *', 0)
         module.addPyCode('import _core', 0)
@@ -206,8 +213,11 @@ class TestBindGen(object):
         m.setCppCode('return self->get() * f;')
         c.addCppCtor('(char a)', 'return new CtorsClass((int)a);')
         c.addCppMethod('double', 'cppmethod', '()', 'return self->get() * 2;')
-        c.addCppMethod('double', 'static_cppmethod', '()', 'return 1.0;',
+        c.addCppMethod('double', 'static_cppmethod', '()',
+                       'return STATIC_CPPMETHOD_RESULT;',
                        isStatic=True)
+        c.addCppMethod('double', 'helper_cppmethod', '()',
+                       'return cppcode_helper(self->get());')
         c.addPyMethod('double_i', '(self)', 'return self.get() * 2')
         c.addItem(m)
 
@@ -697,7 +707,8 @@ class TestBindGen(object):
             instanceCheck="""\
             import numbers
             return isinstance(py_obj, numbers.Number)""",
-            placeHolder='0'))
+            placeHolder='0',
+            arrayFromBuffer=True))
 
         module.addItem(MappedTypeDef_cffi(
             name='BrokenMappedType', cType='int',
@@ -800,7 +811,7 @@ class TestBindGen(object):
         c = ClassDef(name='DetectableBase')
         c.detectSubclassCode_cffi = ("""\
             const char *name = cpp_obj->get_class_name();
-            char *ret = (char*)malloc(strlen(name) * sizeof(char));
+            char *ret = (char*)malloc((strlen(name) + 1) * sizeof(char));
             strcpy(ret, name);
             return ret;
         """)
@@ -952,9 +963,7 @@ class TestBindGen(object):
         CffiWrapperGenerator.stripIgnoredItems(module.items)
         CffiWrapperGenerator.trimPrefixes(module.items)
 
-        mod_path = cls.tmpdir.join('%s.def' % module.name)
-        with mod_path.open('w') as f:
-            pickle.dump(module, f)
+        writeDefFile(module, str(cls.tmpdir.join('%s.def' % module.name)))
 
         gen.generate(module.name)
 
@@ -977,15 +986,13 @@ class TestBindGen(object):
         CffiWrapperGenerator.stripIgnoredItems(module.items)
         CffiWrapperGenerator.trimPrefixes(module.items)
 
-        mod_path = cls.tmpdir.join('%s.def' % module.name)
-        with mod_path.open('w') as f:
-            pickle.dump(module, f)
+        writeDefFile(module, str(cls.tmpdir.join('%s.def' % module.name)))
 
         gen.generate(module.name)
         return gen
 
     @classmethod
-    def build_module(cls, name):
+    def build_module(cls, name, compile=True, class_shards=0):
         cpp_path = cls.tmpdir.join(name + '.cpp')
         h_path = cls.tmpdir.join(name + '.h')
         py_path = cls.tmpdir.join(name + '.py')
@@ -1003,14 +1010,44 @@ class TestBindGen(object):
         verify_args['extra_link_args'] = link_args
         verify_args['extra_compile_args'] = ["-O0", '-g']
 
+        class_paths = [cls.tmpdir.join('%s_classes%d.cpp' % (name, i))
+                       for i in range(class_shards)]
+        verify_args['sources'].extend(map(str, class_paths))
+        class_files = [path.open('w') for path in class_paths]
+
         with cpp_path.open('w') as cpp_file, py_path.open('w') as py_file,\
              user_py_path.open('w') as user_py_file, h_path.open('w') as h_file:
             # Use distutis via cffi to build the cpp code
-            cls.gen.write_files(
-                name, py_file, user_py_file, cpp_file, h_file, verify_args)
+            ext = cls.gen.write_files(
+                name, py_file, user_py_file, cpp_file, h_file, verify_args,
+                compile=compile, class_cppfiles=class_files)
+        for f in class_files:
+            f.close()
+        if not compile:
+            compile_extension(ext, jobs=len(verify_args['sources']))
 
         return user_py_path.pyimport()
 
+    def test_class_shards(self):
+        # The module has cppCode that defines things, which stays in _core.cpp
+        # while the classes are split over the class files
+        for i in range(3):
+            code = self.tmpdir.join('_core_classes%d.cpp' % i).read()
+            assert 'WL_EXTERN_GLOBALS' in code
+            assert 'cppcode_helper(double f) {' not in code
+            assert '_88_' in code
+        code = self.tmpdir.join('_core.cpp').read()
+        assert 'cppcode_helper(double f) {' in code
+
+    def test_dependencies(self):
+        assert self.gen.dependencies('_core') == set([
+            str(self.tmpdir.join('_core.def'))])
+        assert self.gen.dependencies('_extra') == set([
+            str(self.tmpdir.join('_core.def')),
+            str(self.tmpdir.join('_extra.def'))])
+        assert (self.gen.dependencies_hash('_core') !=
+                self.gen.dependencies_hash('_extra'))
+
     def test_define(self):
         assert self.mod.SOME_INT == 15
 
@@ -1033,6 +1070,7 @@ class TestBindGen(object):
         obj = self.mod.DefaultsClass()
         assert obj.defaults_enum() == self.mod.DefaultsClass.Defaults_A
         assert obj.defaults_array() == -1
+        assert obj.defaults_array([1, 2, 3]) == 6
 
         assert obj.defaults_meth() == 15
         assert obj.defaults_meth('test') == 14
@@ -1211,6 +1249,7 @@ class TestBindGen(object):
 
         assert obj.static_cppmethod() == 1.0
         assert self.mod.CtorsClass.static_cppmethod() == 1.0
+        assert obj.helper_cppmethod() == 12
 
         obj = self.mod.CtorsClass('a')
         assert obj.get() == ord('a')
@@ -1219,6 +1258,25 @@ class TestBindGen(object):
         assert self.mod.overloaded_func() == 20
         assert self.mod.overloaded_func(12) == 6
 
+    def test_overloaded_func_repeated_signatures(self):
+        # Calls with a previously seen signature go through the dispatch
+        # table; make sure they still reach the right overload
+        for i in range(3):
+            assert self.mod.overloaded_func() == 20
+            assert self.mod.overloaded_func(12) == 6
+            assert self.mod.overloaded_func(12.0) == 6
+
+        for i in range(2):
+            with pytest.raises(TypeError) as excinfo:
+                self.mod.overloaded_func('12')
+            assert 'overload #1' in str(excinfo.value)
+
+    def test_overloaded_ctors_repeated_signatures(self):
+        for i in range(3):
+            obj = self.mod.CtorsClass(12)
+            assert self.mod.CtorsClass(obj).get() == 12
+            assert self.mod.CtorsClass().get() == 0
+
     def test_virtual_dtor(self):
         obj = self.mod.VDtorClass()
         obj.delete_self()
@@ -1406,6 +1464,17 @@ class TestBindGen(object):
         objs = [(1, 2), (3, 4)]
         assert AC.sum_mapped_type(objs) == 10
 
+    def test_array_from_buffer(self):
+        import ctypes
+        obj = self.mod.DefaultsClass()
+        assert obj.defaults_array([1, 2.5, 3]) == 6
+        assert obj.defaults_array((ctypes.c_int * 3)(1, 2, 3)) == 6
+        assert obj.defaults_array(((ctypes.c_int * 2) * 2)((1, 2), (3, 4))) == 10
+        # Other buffers are only accepted if they're sequences
+        assert obj.defaults_array(bytearray('\x01\x02')) == 3
+        with pytest.raises(TypeError):
+            obj.defaults_array((ctypes.c_double * 2)(1.5, 2))
+
     def test_mappedtype(self):
         assert self.mod.std_string_len("Test") == 4
         assert self.mod.std_string_len(["Test", "Two"]) == 7
@@ -0,0 +1,93 @@
+import sys
+import pytest
+
+# Manually add the top-level directory to our path so we can import etgtools
+# modules
+sys.path.append("../..")
+from etgtools.extractors import (ModuleDef, ClassDef, FunctionDef, ParamDef,
+                                 GlobalVarDef)
+from etgtools.deffile import (writeDefFile, DefFile, DefFileError, HEADER,
+                              MAGIC, VERSION)
+
+def make_module():
+    module = ModuleDef('deffile_test', '_core', '_core')
+    module.addHeaderCode('#include <deffile_test.h>')
+    module.includes.append('other')
+
+    # Items extracted from XML refer to their module
+    c = ClassDef(name='SimpleClass', module=module)
+    c.addMethod('int', 'simple_method', '(double f)')
+    module.addItem(c)
+    module.addItem(FunctionDef(
+        type='int', argsString='(int i)', name='simple_func',
+        items=[ParamDef(type='int', name='i')]))
+    module.addItem(GlobalVarDef(type='int', name='simple_var'))
+    return module
+
+class TestDefFile(object):
+    def test_round_trip(self, tmpdir):
+        path = str(tmpdir.join('_core.def'))
+        assert writeDefFile(make_module(), path)
+
+        deffile = DefFile(path)
+        assert deffile.name == '_core'
+        assert deffile.attrs['includes'] == ['other']
+        assert len(deffile) == 3
+
+        module = deffile.loadModule()
+        assert isinstance(module, ModuleDef)
+        assert module.headerCode == ['#include <deffile_test.h>']
+        assert [item.name for item in module.items] == [
+            'SimpleClass', 'simple_func', 'simple_var']
+        assert module.items[0].module is module
+        method = module.items[0].find('simple_method')
+        assert method.klass is module.items[0]
+        assert method.type == 'int'
+
+        assert deffile.loadItem(1).name == 'simple_func'
+        # The items share one copy of each string
+        assert deffile.loadItem(1).type is deffile.loadItem(2).type
+
+    def test_string_table(self, tmpdir):
+        path = str(tmpdir.join('_core.def'))
+        writeDefFile(make_module(), path)
+        # The string table is compressed like the items
+        assert 'simple_func' not in open(path, 'rb').read()
+
+        deffile = DefFile(path)
+        assert deffile._strings is None
+        assert deffile.loadItem(2).name == 'simple_var'
+        assert 'simple_func' in deffile.strings
+
+    def test_fresh_attrs(self, tmpdir):
+        path = str(tmpdir.join('_core.def'))
+        writeDefFile(make_module(), path)
+        deffile = DefFile(path)
+        deffile.loadModule().headerCode.append('more')
+        assert deffile.loadModule().headerCode == [
+            '#include <deffile_test.h>']
+
+    def test_unchanged_not_written(self, tmpdir):
+        path = str(tmpdir.join('_core.def'))
+        assert writeDefFile(make_module(), path)
+        hashes = DefFile(path).itemHashes
+        assert not writeDefFile(make_module(), path)
+
+        module = make_module()
+        module.items[1].type = 'long'
+        assert writeDefFile(module, path)
+        new_hashes = DefFile(path).itemHashes
+        assert new_hashes[0] == hashes[0]
+        assert new_hashes[1] != hashes[1]
+        assert new_hashes[2] == hashes[2]
+
+    def test_bad_files(self, tmpdir):
+        path = tmpdir.join('_core.def')
+        path.write('not a def file')
+        with pytest.raises(DefFileError):
+            DefFile(str(path))
+
+        path.write(HEADER.pack(MAGIC, VERSION + 1))
+        with pytest.raises(DefFileError) as exc_info:
+            DefFile(str(path))
+        assert 'version' in str(exc_info.value)
@@ -3,17 +3,20 @@ from cppwrapper import (
     VirtualDispatcher, register_cpp_classname, obj_from_ptr, get_ptr,
     forget_ptr, take_ownership, give_ownership, keep_reference, MappedBase,
     is_alive,
-    instancecheck, convert_to_type, init_wrapper, hassubclass, CastData)
+    instancecheck, convert_to_type, init_wrapper, hassubclass, CastData,
+    lazy_members, populate_lazy_members)
 from multimethod import (
     MMTypeCheckMeta, MMTypeError, MMInternalError, check_arg_type,
-    check_args_types, raise_mm_arg_failure)
-from annotations import create_array_type, allocate_cstring, allocate_cunicode
+    check_args_types, raise_mm_arg_failure, multimethod)
+from annotations import (
+    create_array_type, buffer_array, allocate_cstring, allocate_cunicode)
 from deprecated import deprecated_msg
 from exceptions import register_exception, check_exception
 from refcounting import adjust_refcount, get_refcounted_handle
 from abstract import (
     abstract_class, concrete_subclass, purevirtual_abstract_class)
 from voidptr import VoidPtrABC
+from typecheck import typecheck_cache_stats, clear_typecheck_cache
 from defaults import default_arg_indicator
 
 classname_registry = {}
@@ -1,10 +1,11 @@
 import cffi
 
-ffi = cffi.FFI()
-ffi.cdef("""
-void free(void*);
-""")
+from _ffi_build import CDEF, SOURCE
 
-clib = ffi.verify("""
-#include <stdlib.h>
-""")
+try:
+    from _cffi_wrapper_lib import ffi, lib as clib
+except ImportError:
+    # The out-of-line module hasn't been built, parse the cdef instead
+    ffi = cffi.FFI()
+    ffi.cdef(CDEF)
+    clib = ffi.verify(SOURCE)
@@ -0,0 +1,26 @@
+"""
+Declarations for wrapper_lib's own FFI object.
+
+``compile_ffi`` builds them into an out-of-line module so that importing
+wrapper_lib doesn't need to parse the cdef and hash the source like
+``ffi.verify()`` does. ``./build.py cffi_gen`` puts the module next to the
+generated ones. This file must not import wrapper_lib; the build loads it on
+its own.
+"""
+import cffi
+
+CDEF = """
+void free(void*);
+"""
+
+SOURCE = """
+#include <stdlib.h>
+"""
+
+MODULE_NAME = '_cffi_wrapper_lib'
+
+def compile_ffi(tmpdir='.', **kwargs):
+    ffi = cffi.FFI()
+    ffi.cdef(CDEF)
+    ffi.set_source(MODULE_NAME, SOURCE, **kwargs)
+    return ffi.compile(tmpdir)
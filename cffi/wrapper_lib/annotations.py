@@ -1,60 +1,162 @@
+import sys
+import numbers
 import collections
 
 from _ffi import ffi
 from cppwrapper import CppWrapper, MappedBase, get_ptr, obj_from_ptr
+from typecheck import typecheck_cache
 
 
 #----------------------------------------------------------------------------#
 # Array
 
+# The kinds of numbers described by the struct module format characters that
+# buffers can have. Arrays of primitive C types can be made from buffers of
+# the same kind and size (see buffer_array.)
+BUFFER_FORMAT_KINDS = {
+    'b': 'int', 'h': 'int', 'i': 'int', 'l': 'int', 'q': 'int',
+    'B': 'uint', 'H': 'uint', 'I': 'uint', 'L': 'uint', 'Q': 'uint',
+    'f': 'float', 'd': 'float',
+}
+NATIVE_BYTE_ORDER = '<' if sys.byteorder == 'little' else '>'
+
+def ctype_kind(ctype):
+    if ctype.kind != 'primitive':
+        return None
+    if ctype.cname in ('float', 'double'):
+        return 'float'
+    if ctype.cname.startswith('unsigned') or ctype.cname.startswith('uint'):
+        return 'uint'
+    if ctype.cname in ('char', '_Bool', 'wchar_t'):
+        return None
+    return 'int'
+
+def buffer_array(obj, ctype, item_shape=None):
+    """
+    Return a C array of type ctype that shares its memory with obj, or None
+    if obj doesn't support the buffer protocol or its contents aren't a
+    contiguous run of numbers of the same size and kind as ctype's items.
+    If item_shape is given, obj must also have that shape after its first
+    dimension, eg (2,) for a list of points.
+    """
+    if isinstance(obj, basestring):
+        return None
+    try:
+        view = memoryview(obj)
+    except TypeError:
+        return None
+
+    item = ctype.item
+    kind = ctype_kind(item)
+    fmt = view.format.lstrip('@=' + NATIVE_BYTE_ORDER)
+    if (kind is None or BUFFER_FORMAT_KINDS.get(fmt) != kind or
+        view.itemsize != ffi.sizeof(item)):
+        return None
+    if item_shape is not None and tuple(view.shape[1:]) != tuple(item_shape):
+        return None
+
+    if view.strides is not None:
+        # Only C-contiguous buffers can be used as they are
+        stride = view.itemsize
+        for dim, dim_stride in reversed(zip(view.shape, view.strides)):
+            if dim_stride != stride:
+                return None
+            stride *= dim
+    return ffi.from_buffer(ctype, obj)
+
 class SeqType(type):
     def __instancecheck__(self, seq):
+        if self._from_buffer(seq) is not None:
+            return True
         if not isinstance(seq, collections.Sequence):
             return False
+        if self._all_numbers(seq):
+            return True
 
         if hasattr(self._cls, '_pyobject_mapping_'):
-            type = (self._cls, self._cls._pyobject_mapping)
+            type = (self._cls, self._cls._pyobject_mapping_)
         else:
             type = self._cls
-        for obj in seq:
-            if not isinstance(obj, type):
-                return False
-        return True
+        return typecheck_cache.all_isinstance(seq, type)
 
 class CppWrapperSeq(object):
     __metaclass__ = SeqType
 
+    @classmethod
+    def _from_buffer(self, seq):
+        return None
+
+    @classmethod
+    def _all_numbers(self, seq):
+        return False
+
     @classmethod
     def to_c(self, seq):
-        seq_len = len(seq)
-        array = ffi.new('void*[]', seq_len)
-        keepalive = []
-        for i in range(seq_len):
-            if isinstance(seq[i], self._cls):
-                array[i] = get_ptr(seq[i])
-            else:
-                obj = self._cls._pyobject_mapping_.convert(seq[i])
-                keepalive.append(obj)
-                array[i] = get_ptr(obj)
-
-        return array, seq_len, (array, keepalive)
+        if typecheck_cache.all_isinstance(seq, self._cls):
+            # get_ptr without a class is the object's own pointer
+            ptrs = [obj._cpp_obj for obj in seq]
+            keepalive = None
+        else:
+            ptrs = []
+            keepalive = []
+            for obj in seq:
+                if not isinstance(obj, self._cls):
+                    obj = self._cls._pyobject_mapping_.convert(obj)
+                    keepalive.append(obj)
+                ptrs.append(get_ptr(obj))
+
+        array = ffi.new('void*[]', ptrs)
+        return array, len(ptrs), (array, keepalive)
 
     @classmethod
     def to_py(self, array, len):
-        return [obj_from_ptr(array[i], self._cls) for i in range(len)]
+        cls = self._cls
+        return [obj_from_ptr(ptr, cls) for ptr in ffi.unpack(array, len)]
 
 class MappedTypeSeq(object):
     __metaclass__ = SeqType
 
+    @classmethod
+    def _from_buffer(self, seq):
+        if not self._array_from_buffer:
+            return None
+        return buffer_array(seq, ffi.typeof(self._array_ctype))
+
+    @classmethod
+    def _all_numbers(self, seq):
+        # Only the types of the items are checked, whether their values fit
+        # in the C type is left to the conversion in to_c.
+        return (self._array_from_buffer and
+                typecheck_cache.all_isinstance(seq, numbers.Number))
+
+    @classmethod
+    def _from_numbers(self, seq):
+        # cffi converts a sequence of numbers in one go
+        if not self._array_from_buffer:
+            return None
+        try:
+            return ffi.new(self._array_ctype, seq)
+        except (TypeError, OverflowError):
+            return None
+
     @classmethod
     def to_c(self, seq):
+        # Pass the contents of buffers as they are
+        array = self._from_buffer(seq)
+        if array is not None:
+            return array, len(array), (array, seq)
+        array = self._from_numbers(seq)
+        if array is not None:
+            return array, len(array), array
+
         cdata = [self._cls.to_c(obj) for obj in seq]
         array = ffi.new(self._array_ctype, cdata)
         return array, len(seq), array
 
     @classmethod
     def to_py(self, array, len):
-        return [self._cls.to_py(array[i]) for i in range(len)]
+        to_py = self._cls.to_py
+        return [to_py(cdata) for cdata in ffi.unpack(array, len)]
 
 seq_type_cache = {}
 
@@ -66,6 +168,10 @@ def create_array_type(cls, ctype=None):
         class Seq(MappedTypeSeq):
             _cls = cls
             _array_ctype = ctype
+            # Mapped types whose C type is a number can declare that
+            # converting a Python number is just a cast.
+            _array_from_buffer = (getattr(cls, '_array_from_buffer_', False)
+                                  and ffi.typeof(ctype).item.kind == 'primitive')
         seq_type_cache[cls] = Seq
 
     elif issubclass(cls, CppWrapper):
@@ -77,19 +183,27 @@ def create_array_type(cls, ctype=None):
 #----------------------------------------------------------------------------#
 # C Strings
 
+# Strings are copied into memory from the generated module's malloc because
+# the C++ code that receives them takes ownership and frees them.
+
+def allocate_carray(data, size, ctype, clib):
+    """
+    Copy size bytes from data into memory allocated with clib.malloc and
+    return it cast to ctype.
+    """
+    cstring = clib.malloc(size)
+    ffi.memmove(cstring, data, size)
+    return ffi.cast(ctype, cstring)
+
 def allocate_cstring(s, clib):
+    s = str(s)
     cstring = ffi.cast('char*', clib.malloc(len(s) + 1))
-    for i, c in enumerate(str(s)):
-        cstring[i] = c
-    cstring[i + 1] = '\0'
-
+    ffi.memmove(cstring, s, len(s))
+    cstring[len(s)] = '\0'
     return cstring
 
 def allocate_cunicode(s, clib):
-    size = ffi.sizeof('wchar_t') * (len(s) + 1)
-    cstring = ffi.cast('whchar_t*', clib.malloc(size))
-    for i, c in enumerate(unicode(s)):
-        cstring[i] = c
-    cstring[i + 1] = u'\0'
-
-    return cstring
+    # Let cffi convert to wchar_t (UTF-16 or UTF-32 depending on the platform)
+    # in one go.
+    data = ffi.new('wchar_t[]', unicode(s))
+    return allocate_carray(data, ffi.sizeof(data), 'wchar_t*', clib)
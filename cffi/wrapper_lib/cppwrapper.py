@@ -1,7 +1,8 @@
 import weakref
 import collections
 
-from _ffi import ffi, clib
+from _ffi import ffi
+from typecheck import typecheck_cache
 
 
 class WrapperType(type):
@@ -12,6 +13,12 @@ class WrapperType(type):
     virtual methods on subclasses of CppWrapper.
     """
     def __init__(self, name, bases, attrs):
+        if '_lazy_members_' not in attrs:
+            # This class isn't a generated wrapper, so it's probably a user's
+            # subclass. Lookups through super() bypass __getattr__, so the
+            # lazy members of the base classes have to be filled in now.
+            populate_lazy_members(self)
+
         if '_vtable' in attrs:
             # If the class has a _vtable attribute, then (we'll assume) it is
             # a wrapper for a C++ class that has virtual methods. Thus we need
@@ -79,6 +86,8 @@ class WrapperType(type):
         attr = self.__dict__.get(name, None)
         if isinstance(attr, VirtualMethod):
             attr.func = value
+            # Instances share the class's flags, so only the ones with their
+            # own flags (see VData) need to be updated separately
             for i in attr.indices:
                 self._vdata.default_vflags[i] = 1
             for obj in self._vdata.instances:
@@ -87,10 +96,72 @@ class WrapperType(type):
         else:
             super(WrapperType, self).__setattr__(name, value)
 
+    def __delattr__(self, name):
+        populate_lazy_members(self)
+        super(WrapperType, self).__delattr__(name)
+
+    def __getattr__(self, name):
+        # Only called when the attribute couldn't be found normally.
+        if name.startswith('_') or not populate_lazy_members(self):
+            raise AttributeError("type object '%s' has no attribute '%s'" %
+                                 (self.__name__, name))
+        return getattr(self, name)
+
+class LazyMembers(object):
+    """
+    Holds a function that returns a dict of a class's attributes. The
+    attributes are added to the class the first time a missing attribute is
+    looked up on it, on one of its instances or on one of its subclasses. This
+    keeps the cost of importing a module proportional to the classes that are
+    actually used.
+    """
+    def __init__(self, func):
+        self.func = func
+
+def lazy_members(func):
+    return LazyMembers(func)
+
+def populate_lazy_members(cls):
+    """
+    Add the lazy members of cls and its base classes to their classes. Returns
+    True if any members were added.
+    """
+    populated = False
+    for klass in cls.__mro__:
+        lazy = klass.__dict__.get('_lazy_members_')
+        if not isinstance(lazy, LazyMembers):
+            continue
+        for name, attr in lazy.func().iteritems():
+            # Anything assigned to the class before it was populated was put
+            # there by the user, so it wins.
+            if name not in klass.__dict__:
+                type.__setattr__(klass, name, attr)
+        try:
+            type.__delattr__(klass, '_lazy_members_')
+        except AttributeError:
+            # Another thread populated the class at the same time
+            pass
+        populated = True
+    return populated
+
+# C++ objects can outlive their Python class, so the classes' flag arrays
+# are never freed.
+all_default_vflags = []
+
 class VData(object):
+    """
+    The virtual method data of a wrapper class.
+
+    The C++ objects of a class's instances point at its default_vflags (see
+    set_vflags) so that overriding a virtual method on the class updates all
+    of them at once. set_vflag gives an object its own copy of the flags the
+    first time one of its methods is overridden, and the object is then added
+    to instances.
+    """
     def __init__(self, ffi, vtable, set_vflag, set_vflags, direct_wrapper):
         self.vtable = vtable
         self.default_vflags = ffi.new('unsigned char[]', len(vtable))
+        all_default_vflags.append(self.default_vflags)
         self.set_vflag = set_vflag
         self.set_vflags = set_vflags
         self.instances = weakref.WeakSet()
@@ -98,47 +169,37 @@ class VData(object):
         self.direct_wrapper = direct_wrapper
 
 class CastData(object):
+    """
+    The offsets of a wrapped class's bases within it, as computed by the C++
+    compiler at module init (see WL_base_offset.) ancestors holds the offset
+    of every direct and indirect base. Only the ones that aren't 0 are kept in
+    offsets, and classes whose bases all have a 0 offset have zero_offsets
+    set, so that get_ptr can skip the table entirely in the common case.
+    """
+    def __init__(self, bases):
+        self.ancestors = { }
+        for base, offset in bases:
+            self.ancestors[base] = offset
+            # Copy the offsets of each base's bases, adding the base's offset.
+            # Bases at offset 0 within a base may not be there in self.
+            for base_base, base_offset in base._castdata.ancestors.items():
+                self.ancestors[base_base] = base_offset + offset
+        self.offsets = dict((base, offset)
+                            for base, offset in self.ancestors.items()
+                            if offset != 0)
+        self.zero_offsets = not self.offsets
+
+        # The distinct offsets of the bases that have vtables. Objects are
+        # also registered in object_map at these offsets (see remember_ptr)
+        self.vdata_offsets = tuple(set(
+            offset for base, offset in self.offsets.items()
+            if getattr(base, '_vdata', None)))
+
     def get_offset_ptr(self, ptr, cls):
-        try:
-            return ptr + self.offsets[cls]
-        except KeyError:
-            # 0 offsets aren't stored, so when the lookup fails, assume the
-            # pointer the same for the conversion (ie do no error handling.)
+        if self.zero_offsets:
             return ptr
-        except AttributeError:
-            self.setup_offsets_table(ptr)
-            return self.get_offset_ptr(ptr, cls)
-
-    def get_offsets_table(self, ptr):
-        try:
-            return self.offsets
-        except AttributeError:
-            self.setup_offsets_table(ptr)
-            return self.offsets
-
-    def setup_offsets_table(self, ptr):
-        # Setup of the offsets table is delayed until we have an instance.
-        # Technically, casting with a dummy pointer is possible, but is
-        # undefined behavior. This should be slightly safer and gives us a path
-        # to potentially support virtual inhertiance at a later date.
-        self.offsets = { }
-        for base, cast_func in self.castfuncs:
-            casted_ptr = cast_func(ptr)
-
-            offset = casted_ptr - ptr
-            if offset != 0:
-                # Only store non-0 offsets. Unstored offsets are assume 0.
-                self.offsets[base] = offset
-                # Copy the offsets to each base's base, adding the offset
-                for (base_base, base_cast_func) in base._castdata.castfuncs:
-                    casted_ptr = base_cast_func(ptr)
-                    self.offsets[base_base] = (casted_ptr - ptr) + offset
-            else:
-                # Copy the offsets to each base's base
-                self.offsets.update(base._castdata.get_offsets_table(ptr))
-
-    def __init__(self, castfuncs):
-        self.castfuncs = castfuncs
+        offset = self.offsets.get(cls, 0)
+        return ptr + offset if offset != 0 else ptr
 
 class VirtualMethod(object):
     """
@@ -173,6 +234,7 @@ class VirtualMethod(object):
             # Python create the object
             for i in self.indices:
                 obj._vdata.set_vflag(obj, i)
+            obj._vdata.instances.add(obj)
 
     def __repr__(self):
         return '<VirtualMethod%s: %s>' % (self.indices,
@@ -205,6 +267,10 @@ class VirtualDispatcher(object):
 class CppWrapper(object):
     __metaclass__ = WrapperType
 
+    # Wrappers of classes with detectSubclassCode override this with a
+    # function returning the class name of the C++ object (see obj_from_ptr)
+    _get_cpp_classname_ = None
+
     def __init__(self, cpp_obj, py_owned=True, py_created=True,
                  external_ref=False):
         self._cpp_obj = cpp_obj if cpp_obj is not None else ffi.NULL
@@ -212,15 +278,14 @@ class CppWrapper(object):
         self._py_created = py_created
         remember_ptr(self, self._cpp_obj, external_ref)
 
-        self._parent = None
-        self._child = None
-        self._next_sibling = None
-        self._prev_sibling = None
+        # See _attach_to_parent
+        self._children = None
+        self._siblings = None
+        self._sibling_index = -1
 
         if hasattr(self, '_vdata') and self._py_created:
             # See comment about about setting vflags and _py_created
             self._vdata.set_vflags(self, self._vdata.default_vflags)
-            self._vdata.instances.add(self)
 
     def __del__(self):
         # We have to check forget_ptr because it may be garbage collected by
@@ -228,6 +293,13 @@ class CppWrapper(object):
         if not self._py_owned and forget_ptr is not None:
             forget_ptr(self._cpp_obj)
 
+    def __getattr__(self, name):
+        # Only called when the attribute couldn't be found normally.
+        if name.startswith('_') or not populate_lazy_members(type(self)):
+            raise AttributeError("'%s' object has no attribute '%s'" %
+                                 (type(self).__name__, name))
+        return getattr(self, name)
+
     @classmethod
     def _from_ptr(cls, ptr, py_owned=False, external_ref=False):
         obj = CppWrapper.__new__(cls, _override_abstract_class=True)
@@ -246,43 +318,68 @@ def hassubclass(cls):
 def global_dtor(ptr):
     # TODO: set the wrapper object's ptr to NULL and add checks to prevent
     #       calls to objects that have been deleted.
-    if not ptr in object_map:
+    obj = lookup_ptr(ptr)
+    if obj is None:
         # TODO: raise an exception? This is called via a cffi callback, so the
         #       exception wouldn't propagate to regular python code
         return
     else:
         # Clear the wrapper object's pointer so it we don't try calling methods
         # on a deleted object.
-        object_map[ptr]._cpp_obj = ffi.NULL
+        obj._cpp_obj = ffi.NULL
 
     forget_ptr(ptr)
 
 
 cpp_owned_objects = set()
-object_map = weakref.WeakValueDictionary()
+
+# Maps pointers to C++ objects to weak references to their wrappers. This is
+# a plain dict rather than a WeakValueDictionary because it's used for almost
+# every pointer returned to Python, and the WeakValueDictionary's methods are
+# written in Python. Entries are removed by the weak references' callbacks.
+object_map = {}
+
+def lookup_ptr(ptr):
+    ref = object_map.get(ptr)
+    if ref is None:
+        return None
+    return ref()
 
 classname_registry = { }
 
+# Maps the class names returned by _get_cpp_classname_ to the registered
+# wrapper classes (or None.) The names are interned by WL_intern_classname,
+# so the char pointers themselves are used as keys and the names don't need
+# to be copied into Python strings.
+classname_cache = { }
+
 def register_cpp_classname(cppname, subclass):
     assert issubclass(subclass, CppWrapper)
     classname_registry[cppname] = subclass
+    classname_cache.clear()
+
+def get_cpp_class(ptr, klass):
+    str_ptr = klass._get_cpp_classname_(ptr)
+    try:
+        subclass = classname_cache[str_ptr]
+    except KeyError:
+        subclass = classname_registry.get(ffi.string(str_ptr))
+        classname_cache[str_ptr] = subclass
+    return klass if subclass is None else subclass
 
 def obj_from_ptr(ptr, klass=CppWrapper, is_new=False):
     if ptr == ffi.NULL:
         return None
-    if hasattr(klass, '_get_cpp_classname_'):
-        str_ptr = klass._get_cpp_classname_(ptr)
-        classname = ffi.string(str_ptr)
-        clib.free(str_ptr)
-
-        klass = classname_registry.get(classname, klass)
-    if object_map is None or ptr not in object_map:
-        # If an python object for this pointer doesn't yet exist, create one
-        obj = klass._from_ptr(ptr, is_new)
-        object_map[ptr] = obj
-        return obj
+    if klass._get_cpp_classname_ is not None:
+        klass = get_cpp_class(ptr, klass)
+
+    ref = object_map.get(ptr)
+    obj = ref() if ref is not None else None
+    if obj is None:
+        # If an python object for this pointer doesn't yet exist, create one.
+        # Creating it adds it to object_map.
+        return klass._from_ptr(ptr, is_new)
 
-    obj = object_map[ptr]
     if isinstance(obj, klass):
         return obj
 
@@ -295,15 +392,10 @@ def obj_from_ptr(ptr, klass=CppWrapper, is_new=False):
     # the latter. That is to say, we'll replace the old object with a new one
     # with the correct class
 
-    old_parent = obj._parent
+    old_obj = obj
     obj = klass._from_ptr(ptr, is_new)
-
-    if old_parent is not None:
-        _detach_from_parent(obj)
-        object_map[ptr] = obj
-        _attach_to_parent(obj, old_parent())
-    else:
-        object_map[ptr] = obj
+    # The new object takes the old one's place among its parent's children
+    _replace_child(old_obj, obj)
     return obj
 
 def get_ptr(obj, cls=None):
@@ -311,7 +403,10 @@ def get_ptr(obj, cls=None):
         return ffi.NULL
 
     if isinstance(obj, CppWrapper):
-        return obj._castdata.get_offset_ptr(obj._cpp_obj, cls)
+        castdata = obj._castdata
+        if castdata.zero_offsets:
+            return obj._cpp_obj
+        return castdata.get_offset_ptr(obj._cpp_obj, cls)
 
     raise TypeError('obj is not a wrapper for a C++ object')
 
@@ -322,20 +417,33 @@ def remember_ptr(obj, ptr, external_ref=False):
         # In some (one) situtations, obj needs to be kept alive even if it
         # stops being referenced by Python.
         cpp_owned_objects.add(obj)
-    object_map[ptr] = obj
-    for basecls, offset in obj._castdata.get_offsets_table(ptr).items():
-        if getattr(basecls, '_vdata', None):
-            object_map[ptr + offset] = obj
+
+    # The object is also registered at the addresses of its bases with
+    # vtables, since those are what virtual method callbacks receive.
+    offsets = obj._castdata.vdata_offsets
+    ptrs = (ptr,) + tuple(ptr + offset for offset in offsets)
+
+    ref = weakref.ref(obj, lambda ref, forget=_forget_ref: forget(ref, ptrs))
+    for p in ptrs:
+        object_map[p] = ref
+
+def _forget_ref(ref, ptrs):
+    if object_map is None:
+        # The module is being torn down
+        return
+    for p in ptrs:
+        # A new object may have been registered in the meantime
+        if object_map.get(p) is ref:
+            del object_map[p]
 
 def forget_ptr(ptr):
-    if ptr in object_map:
-        obj = object_map[ptr]
+    obj = lookup_ptr(ptr)
+    if obj is not None:
         cpp_owned_objects.discard(obj)
         del object_map[ptr]
 
-        for basecls, offset in obj._castdata.get_offsets_table(ptr).items():
-            if getattr(basecls, '_vdata', None):
-                del object_map[ptr + offset]
+        for offset in obj._castdata.vdata_offsets:
+            object_map.pop(ptr + offset, None)
 
         _detach_children(obj)
         # TODO: does obj need to detach from its parent too?
@@ -381,65 +489,73 @@ def give_ownership(obj, parent=None, external_ref=False):
         cpp_owned_objects.add(obj)
 
 def instancecheck(obj, cls):
-    return isinstance(obj, cls) or (hasattr(cls, '_pyobject_mapping_') and
-                                    isinstance(obj, cls._pyobject_mapping_))
+    return typecheck_cache.isinstance(obj, cls) or (
+        hasattr(cls, '_pyobject_mapping_') and
+        isinstance(obj, cls._pyobject_mapping_))
 
 def convert_to_type(obj, cls):
-    if isinstance(obj, cls):
+    if typecheck_cache.isinstance(obj, cls):
         return obj
     if (hasattr(cls, '_pyobject_mapping_') and
         isinstance(obj, cls._pyobject_mapping_)):
         return cls._pyobject_mapping_.convert(obj)
     return None
 
+# Ownership by a parent is tracked with a _ChildList on the parent, which
+# holds strong references to its children. Each child knows its index in the
+# list and holds a weak reference to the list, which is shared by all of the
+# children of the same parent. Children never reference their parent itself,
+# so no reference cycles (which __del__ would make uncollectable) are created.
+
+class _ChildList(list):
+    __slots__ = ('ref', '__weakref__')
+
+    def __init__(self):
+        super(_ChildList, self).__init__()
+        self.ref = weakref.ref(self)
+
 def _detach_from_parent(obj):
-    if obj._parent is None:
+    if obj._siblings is None:
         # No parent to detach from
         return
 
-    parent = obj._parent()
-    if parent is None or obj._prev_sibling is None:
-        # The parent has been garbage collected, but this object is still
-        # attached to it, which shouldn't be possible. Maybe an exception
-        # should be thrown?
+    children = obj._siblings()
+    obj._siblings = None
+    if children is None:
+        # All of the parent's children were detached at once
         return
 
-    if parent._child is obj:
-        parent._child = obj._next_sibling
-    else:
-        # If obj isn't the first child, it has a previous sibling
-        obj._prev_sibling()._next_sibling = obj._next_sibling
-    if obj._next_sibling is not None:
-        obj._next_sibling = obj._prev_sibling
-
-    obj._parent = None
-    obj._prev_sibling = None
-    obj._next_sibling = None
+    # Fill the hole with the last child so the list stays compact
+    last = children.pop()
+    if last is not obj:
+        children[obj._sibling_index] = last
+        last._sibling_index = obj._sibling_index
 
 def _detach_children(obj):
-    child = obj._child
-    while child is not None:
-        next = child._next_sibling
-        child._prev_sibling = None
-        child._next_sibling = None
-        child = next
-
-    obj._child = None
+    # The children's weak references to the list die with it, which marks
+    # them as detached; there's no need to visit each one.
+    obj._children = None
 
 def _attach_to_parent(obj, parent):
     # obj shouldn't already be attached to a parent when this is called
+    children = parent._children
+    if children is None:
+        children = parent._children = _ChildList()
 
-    if parent._child is None:
-        obj._parent = weakref.ref(parent)
-    else:
-        # Don't create a new weakref object if we don't have too
-        obj._parent = parent._child._parent
+    obj._siblings = children.ref
+    obj._sibling_index = len(children)
+    children.append(obj)
 
-        # obj is being inserted at the front of the list
-        parent._child._prev_sibling = weakref.ref(obj)
+def _replace_child(old_obj, new_obj):
+    if old_obj._siblings is None:
+        return
 
-    obj._next_sibling = parent._child
-    parent._child = obj
+    children = old_obj._siblings()
+    if children is not None:
+        children[old_obj._sibling_index] = new_obj
+        new_obj._siblings = old_obj._siblings
+        new_obj._sibling_index = old_obj._sibling_index
+    old_obj._siblings = None
 
 
 class MappedType(type):
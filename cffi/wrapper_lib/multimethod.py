@@ -1,4 +1,7 @@
+import functools
+
 from .defaults import DefaultArgIndicator
+from .typecheck import typecheck_cache
 
 class MMTypeCheckMeta(type):
     def __instancecheck__(self, instance):
@@ -25,12 +28,14 @@ def check_args_types(*args):
     for a in args:
         arg_type, arg_value, arg_name = a
 
-        if not isinstance(arg_value, (arg_type, DefaultArgIndicator)):
+        if not (isinstance(arg_value, DefaultArgIndicator) or
+                typecheck_cache.isinstance(arg_value, arg_type)):
             raise TypeError("argument '%s' has unexpected type '%s'" %
                             (arg_name, type(arg_value)))
 
 def check_arg_type(arg_name, arg_type, arg_value):
-    if not isinstance(arg_value, (arg_type, DefaultArgIndicator)):
+    if not (isinstance(arg_value, DefaultArgIndicator) or
+            typecheck_cache.isinstance(arg_value, arg_type)):
         raise MMTypeError(arg_name, type(arg_value))
 
 def raise_mm_arg_failure(exception_list):
@@ -45,3 +50,84 @@ def raise_mm_arg_failure(exception_list):
 
     raise TypeError('arguments did not match any overloaded call:\n%s' %
                     '\n'.join(errmsgs))
+
+def multimethod(func):
+    """
+    Decorator for the dispatcher of an overloaded function. The decorated
+    function only supplies the name and docstring; overloads are added, in
+    order, with the ``overload`` attribute of the returned function:
+
+        @wrapper_lib.multimethod
+        def func(*args, **kwargs):
+            "docstring"
+        @func.overload
+        def func(i):
+            ...
+
+    The first time a call signature (the number of arguments and their types)
+    is seen, every overload is tried in turn, exactly as if they were called by
+    hand. The overload that accepted the arguments is remembered so later calls
+    with the same signature go straight to it without any exceptions being
+    raised. Earlier overloads that rejected the arguments after looking at
+    their values (eg a mapped type that checks a sequence's length) are
+    remembered too and still tried first, so the overload that is called never
+    depends on the order of earlier calls.
+    """
+    overloads = []
+    # Maps the number of positional arguments to a dict that maps the tuple of
+    # the arguments' types to the overloads to try, in order: the ones that
+    # rejected the arguments by their values, then the one that accepted them.
+    dispatch_table = {}
+
+    @functools.wraps(func)
+    def dispatcher(*args, **kwargs):
+        key = tuple(map(type, args))
+        if kwargs:
+            key += tuple(sorted((k, type(v)) for k, v in kwargs.iteritems()))
+        table = dispatch_table.get(len(args))
+        if table is None:
+            table = dispatch_table[len(args)] = {}
+
+        cached_errors = {}
+        for overload in table.get(key, ()):
+            try:
+                return overload(*args, **kwargs)
+            except (TypeError, MMTypeError) as e:
+                # The types matched an earlier call, but the values didn't.
+                # Fall back to trying every overload, but don't call this one
+                # again.
+                cached_errors[overload] = e
+            except MMInternalError as e:
+                raise e.exception
+
+        error_list = []
+        value_checked = []
+        for overload in overloads:
+            if overload in cached_errors:
+                error_list.append(cached_errors[overload])
+                value_checked.append(overload)
+                continue
+            value_checks = typecheck_cache.value_checks
+            try:
+                retval = overload(*args, **kwargs)
+            except (TypeError, MMTypeError) as e:
+                error_list.append(e)
+                if typecheck_cache.value_checks != value_checks:
+                    value_checked.append(overload)
+                continue
+            except MMInternalError as e:
+                table[key] = tuple(value_checked) + (overload,)
+                raise e.exception
+            table[key] = tuple(value_checked) + (overload,)
+            return retval
+
+        raise_mm_arg_failure(error_list)
+
+    def overload(func):
+        overloads.append(func)
+        dispatch_table.clear()
+        return dispatcher
+
+    dispatcher.overload = overload
+    dispatcher.overloads = overloads
+    return dispatcher
@@ -1,6 +1,6 @@
 import contextlib
 
-from _ffi import ffi, clib
+from _ffi import ffi
 
 refcounts = { }
 
@@ -44,4 +44,3 @@ def get_refcounted_handle(obj):
 # handle instead of the handle itself. Only the original handle keeps the
 # association alive, so the association would die almost immediately.
 adjust_refcount_cb = ffi.callback('void(*)(void*, int)')(adjust_refcount)
-clib.wrapper_lib_adjust_refcount = adjust_refcount_cb
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import cffi
+import pytest
+import wrapper_lib
+
+ffi = wrapper_lib._ffi.ffi
+
+libc_ffi = cffi.FFI()
+libc_ffi.cdef("""
+void* malloc(size_t);
+void free(void*);
+""")
+libc = libc_ffi.dlopen(None)
+
+class TestAllocateCString(object):
+    @pytest.mark.parametrize('s', ['', 'a', 'abc\xff', 'x' * 100000])
+    def test_cstring(self, s):
+        cstring = wrapper_lib.allocate_cstring(s, libc)
+        try:
+            assert ffi.typeof(cstring) is ffi.typeof('char*')
+            assert ffi.string(cstring) == s
+            assert cstring[len(s)] == '\0'
+        finally:
+            libc.free(cstring)
+
+    @pytest.mark.parametrize('s', [u'', u'a', u'abc\xe9中', u'x' * 100000,
+                                   u'\U0001f600'])
+    def test_cunicode(self, s):
+        cstring = wrapper_lib.allocate_cunicode(s, libc)
+        try:
+            assert ffi.typeof(cstring) is ffi.typeof('wchar_t*')
+            assert ffi.string(cstring) == s
+        finally:
+            libc.free(cstring)
+
+    def test_conversion(self):
+        cstring = wrapper_lib.allocate_cstring(u'abc', libc)
+        assert ffi.string(cstring) == 'abc'
+        libc.free(cstring)
+
+        cstring = wrapper_lib.allocate_cunicode('abc', libc)
+        assert ffi.string(cstring) == u'abc'
+        libc.free(cstring)
+
+class TestBufferArray(object):
+    def test_item_shape(self):
+        import ctypes
+        points = ((ctypes.c_int * 2) * 3)((1, 2), (3, 4), (5, 6))
+        array = wrapper_lib.buffer_array(points, ffi.typeof('int[]'), (2,))
+        assert list(array) == [1, 2, 3, 4, 5, 6]
+
+        # The memory is shared
+        points[1][0] = 10
+        assert array[2] == 10
+
+        flat = (ctypes.c_int * 6)(1, 2, 3, 4, 5, 6)
+        assert wrapper_lib.buffer_array(flat, ffi.typeof('int[]')) is not None
+        assert wrapper_lib.buffer_array(flat, ffi.typeof('int[]'), (2,)) is None
+        triples = ((ctypes.c_int * 3) * 2)()
+        assert wrapper_lib.buffer_array(triples, ffi.typeof('int[]'), (2,)) is None
+        doubles = ((ctypes.c_double * 2) * 2)()
+        assert wrapper_lib.buffer_array(doubles, ffi.typeof('int[]'), (2,)) is None
@@ -21,7 +21,8 @@ public:
     int non_virtual_meth(int);
     virtual int virtual_meth(int);
 
-    char vflags[2];
+    char *vflags;
+    char own_vflags[2];
 };
 
 #define METHIDX_DtorObj_88_virtual_meth 1
@@ -44,12 +45,18 @@ extern "C"
 
     void DtorObj_set_vflag(void* self, int i)
     {
-        ((DtorObj*)self)->vflags[i] = 1;
+        DtorObj *obj = (DtorObj*)self;
+        if(obj->vflags != obj->own_vflags)
+        {
+            memcpy(obj->own_vflags, obj->vflags, sizeof(obj->own_vflags));
+            obj->vflags = obj->own_vflags;
+        }
+        obj->own_vflags[i] = 1;
     }
 
     void DtorObj_set_vflags(void* self, char* flags)
     {
-        memcpy(((DtorObj*)self)->vflags, flags, sizeof(((DtorObj*)self)->vflags));
+        ((DtorObj*)self)->vflags = flags;
     }
 
     void* DtorObj_88_DtorObj()
@@ -95,7 +102,8 @@ int DtorObjBase::virtual_meth(int i)
 
 DtorObj::DtorObj()
 {
-    memset(this->vflags, 0, sizeof(this->vflags));
+    memset(this->own_vflags, 0, sizeof(this->own_vflags));
+    this->vflags = this->own_vflags;
 }
 
 DtorObj::~DtorObj()
@@ -6,7 +6,7 @@ from os import path
 
 from wrapper_lib import (
     CppWrapper, VirtualMethod, VirtualDispatcher, obj_from_ptr,
-    forget_ptr, take_ownership, give_ownership)
+    forget_ptr, take_ownership, give_ownership, CastData)
 
 ffi = cffi.FFI()
 ffi.cdef('''
@@ -53,6 +53,8 @@ def collect_all_wrappers():
 
 
 class NoDtorObj(CppWrapper):
+    _castdata = CastData([])
+
     def __init__(self):
         cpp_obj = clib.NoDtorObj_88_NoDtorObj()
         CppWrapper.__init__(self, cpp_obj)
@@ -67,6 +69,7 @@ class NoDtorObjSubClass(NoDtorObj):
 
 class DtorObj(CppWrapper):
     _vtable = clib.DtorObj_vtable
+    _castdata = CastData([])
 
     def __init__(self):
         cpp_obj = clib.DtorObj_88_DtorObj()
@@ -139,6 +142,21 @@ class TestMethodCalls(object):
         obj = TmpDtorObjSubClass()
         assert clib.call_virtual_meth(obj._cpp_obj, 10) == -10
 
+    def test_replacing_class_virtual_method_shared_flags(self):
+        class TmpDtorObjSubClass(DtorObj):
+            pass
+        def override(self, i):
+            return -i
+
+        objs = [TmpDtorObjSubClass() for i in range(3)]
+        objs[0].virtual_meth = lambda i: i * 2
+        # Only instances with their own flags need to be updated separately
+        assert list(TmpDtorObjSubClass._vdata.instances) == [objs[0]]
+
+        TmpDtorObjSubClass.virtual_meth = override
+        results = [clib.call_virtual_meth(obj._cpp_obj, 10) for obj in objs]
+        assert results == [20, -10, -10]
+
     def test_replacing_overriden_instance_virtual_method(self):
         def override(i):
             return -i
@@ -372,3 +390,26 @@ class TestObjectLookup(object):
         dup = obj_from_ptr(ptr, NoDtorObj)
         assert dup is not obj
         assert obj_from_ptr(ptr) is dup
+
+class TestCastData(object):
+    def test_offsets_of_bases_of_bases(self):
+        # class B : public C; class D : public A, public B
+        class A(object):
+            _castdata = CastData([])
+        class C(object):
+            _castdata = CastData([])
+            _vdata = True
+        class B(object):
+            _castdata = CastData([(C, 0)])
+        class D(object):
+            _castdata = CastData([(A, 0), (B, 8)])
+
+        castdata = D._castdata
+        assert not castdata.zero_offsets
+        assert castdata.offsets == {B: 8, C: 8}
+        assert castdata.vdata_offsets == (8,)
+
+        ptr = ffi.cast('char*', 0x1000)
+        assert castdata.get_offset_ptr(ptr, A) == ptr
+        assert castdata.get_offset_ptr(ptr, C) == ptr + 8
+        assert B._castdata.zero_offsets
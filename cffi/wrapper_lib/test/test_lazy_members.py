@@ -0,0 +1,85 @@
+import pytest
+import wrapper_lib
+
+def make_classes():
+    class LazyBase(wrapper_lib.CppWrapper):
+        eager = 'eager'
+
+        @wrapper_lib.lazy_members
+        def _lazy_members_():
+            def meth(self):
+                return 'base'
+            @staticmethod
+            def static_meth():
+                return 'static'
+            return locals()
+
+    class LazySubclass(LazyBase):
+        @wrapper_lib.lazy_members
+        def _lazy_members_():
+            def sub_meth(self):
+                return 'sub'
+            return locals()
+
+    return LazyBase, LazySubclass
+
+def new(cls):
+    # Skip CppWrapper.__init__, there's no C++ object behind these classes
+    return cls.__new__(cls)
+
+class TestLazyMembers(object):
+    def test_not_populated_at_creation(self):
+        LazyBase, LazySubclass = make_classes()
+        assert 'meth' not in LazyBase.__dict__
+        assert 'sub_meth' not in LazySubclass.__dict__
+        assert LazyBase.eager == 'eager'
+        assert 'meth' not in LazyBase.__dict__
+
+    def test_class_attribute(self):
+        LazyBase, LazySubclass = make_classes()
+        assert LazyBase.static_meth() == 'static'
+        assert 'meth' in LazyBase.__dict__
+        assert '_lazy_members_' not in LazyBase.__dict__
+
+    def test_instance_attribute(self):
+        LazyBase, LazySubclass = make_classes()
+        obj = new(LazySubclass)
+        assert obj.meth() == 'base'
+        assert obj.sub_meth() == 'sub'
+
+    def test_missing_attribute(self):
+        LazyBase, LazySubclass = make_classes()
+        obj = new(LazyBase)
+        with pytest.raises(AttributeError):
+            obj.missing
+        with pytest.raises(AttributeError):
+            LazyBase.missing
+        # Private names never trigger populating the class
+        with pytest.raises(AttributeError):
+            obj._missing
+        assert 'meth' in LazyBase.__dict__
+
+    def test_private_name_does_not_populate(self):
+        LazyBase, LazySubclass = make_classes()
+        assert not hasattr(LazyBase, '_missing')
+        assert 'meth' not in LazyBase.__dict__
+
+    def test_user_subclass_populates_bases(self):
+        LazyBase, LazySubclass = make_classes()
+        class UserSubclass(LazySubclass):
+            def meth(self):
+                return 'user ' + super(UserSubclass, self).meth()
+        assert 'meth' in LazyBase.__dict__
+        assert new(UserSubclass).meth() == 'user base'
+
+    def test_monkeypatch_before_populating(self):
+        LazyBase, LazySubclass = make_classes()
+        LazyBase.meth = lambda self: 'patched'
+        assert new(LazyBase).meth() == 'patched'
+        assert new(LazyBase).static_meth() == 'static'
+
+    def test_delete_before_populating(self):
+        LazyBase, LazySubclass = make_classes()
+        del LazyBase.meth
+        with pytest.raises(AttributeError):
+            new(LazyBase).meth
@@ -0,0 +1,83 @@
+import gc
+import itertools
+import wrapper_lib
+from wrapper_lib import CppWrapper, CastData, obj_from_ptr, forget_ptr
+from wrapper_lib.cppwrapper import object_map, lookup_ptr, classname_cache
+
+ffi = wrapper_lib._ffi.ffi
+addresses = itertools.count(0x100000, 0x10)
+
+class Obj(CppWrapper):
+    _castdata = CastData([])
+
+    def __init__(self):
+        CppWrapper.__init__(self, ffi.cast('void*', next(addresses)))
+
+class OtherObj(Obj):
+    pass
+
+# Stand-ins for interned class names returned by _get_cpp_classname_
+CLASSNAMES = {'Base': ffi.new('char[]', 'Base'),
+              'Derived': ffi.new('char[]', 'Derived')}
+dynamic_types = {}
+
+class Base(CppWrapper):
+    _castdata = CastData([])
+
+    @staticmethod
+    def _get_cpp_classname_(ptr):
+        return ffi.cast('char*', CLASSNAMES[dynamic_types[ptr]])
+
+class Derived(Base):
+    pass
+
+wrapper_lib.register_cpp_classname('Derived', Derived)
+
+class TestObjectMap(object):
+    def test_lookup(self):
+        obj = Obj()
+        assert lookup_ptr(obj._cpp_obj) is obj
+        assert obj_from_ptr(obj._cpp_obj, Obj) is obj
+        assert obj_from_ptr(ffi.cast('void*', obj._cpp_obj)) is obj
+
+    def test_dead_wrappers_removed(self):
+        obj = Obj()
+        ptr = obj._cpp_obj
+        del obj
+        gc.collect()
+        assert ptr not in object_map
+        assert lookup_ptr(ptr) is None
+
+    def test_forget_ptr(self):
+        obj = Obj()
+        ptr = obj._cpp_obj
+        forget_ptr(ptr)
+        assert lookup_ptr(ptr) is None
+        assert obj_from_ptr(ptr, Obj) is not obj
+
+    def test_replaced_wrapper_stays_registered(self):
+        obj = Obj()
+        ptr = obj._cpp_obj
+        other = obj_from_ptr(ptr, OtherObj)
+        assert other is not obj
+
+        # The old wrapper dying mustn't remove the new one
+        del obj
+        gc.collect()
+        assert lookup_ptr(ptr) is other
+
+    def test_dynamic_class(self):
+        base_ptr = ffi.cast('void*', next(addresses))
+        derived_ptr = ffi.cast('void*', next(addresses))
+        dynamic_types[base_ptr] = 'Base'
+        dynamic_types[derived_ptr] = 'Derived'
+        cached = len(classname_cache)
+
+        assert type(obj_from_ptr(base_ptr, Base)) is Base
+        assert type(obj_from_ptr(derived_ptr, Base)) is Derived
+        assert len(classname_cache) == cached + 2
+
+        derived_ptr = ffi.cast('void*', next(addresses))
+        dynamic_types[derived_ptr] = 'Derived'
+        assert type(obj_from_ptr(derived_ptr, Base)) is Derived
+        assert len(classname_cache) == cached + 2
@@ -0,0 +1,104 @@
+import gc
+import weakref
+import itertools
+import wrapper_lib
+from wrapper_lib import (
+    CppWrapper, CastData, obj_from_ptr, give_ownership, take_ownership)
+
+ffi = wrapper_lib._ffi.ffi
+addresses = itertools.count(0x1000, 0x10)
+
+class Obj(CppWrapper):
+    _castdata = CastData([])
+
+    def __init__(self):
+        CppWrapper.__init__(self, ffi.cast('void*', next(addresses)))
+
+class OtherObj(Obj):
+    pass
+
+def alive(refs):
+    gc.collect()
+    return [wk() is not None for wk in refs]
+
+class TestOwnership(object):
+    def test_parent_keeps_children_alive(self):
+        parent = Obj()
+        children = [Obj() for i in range(3)]
+        refs = map(weakref.ref, children)
+        for child in children:
+            give_ownership(child, parent)
+
+        del children, child
+        assert alive(refs) == [True] * 3
+        del parent
+        assert alive(refs) == [False] * 3
+
+    def test_take_ownership(self):
+        parent = Obj()
+        children = [Obj() for i in range(4)]
+        refs = map(weakref.ref, children)
+        for child in children:
+            give_ownership(child, parent)
+
+        # Detach from the middle and the end of the parent's children, and
+        # detach one child twice
+        take_ownership(children[1])
+        take_ownership(children[3])
+        take_ownership(children[3])
+        del children, child
+        assert alive(refs) == [True, False, True, False]
+
+        del parent
+        assert alive(refs) == [False] * 4
+
+    def test_change_parent(self):
+        parent1 = Obj()
+        parent2 = Obj()
+        child = Obj()
+        ref = weakref.ref(child)
+        give_ownership(child, parent1)
+        give_ownership(child, parent2)
+
+        del child, parent1
+        assert alive([ref]) == [True]
+        del parent2
+        assert alive([ref]) == [False]
+
+    def test_parent_deleted_by_cpp(self):
+        parent = Obj()
+        child = Obj()
+        give_ownership(parent, None, True)
+        give_ownership(child, parent)
+
+        ref = weakref.ref(child)
+        del child
+        wrapper_lib.forget_ptr(parent._cpp_obj)
+        assert alive([ref]) == [False]
+
+    def test_detach_after_parent_dies(self):
+        parent = Obj()
+        child = Obj()
+        give_ownership(child, parent)
+        del parent
+        gc.collect()
+
+        take_ownership(child)
+        parent = Obj()
+        give_ownership(child, parent)
+        assert child._siblings() is parent._children
+
+    def test_replaced_object_takes_slot(self):
+        parent = Obj()
+        child = Obj()
+        give_ownership(child, parent)
+
+        dup = obj_from_ptr(child._cpp_obj, OtherObj)
+        assert dup is not child
+        ref = weakref.ref(dup)
+        del dup
+        assert alive([ref]) == [True]
+        assert child._siblings is None
+
+        del parent
+        assert alive([ref]) == [False]
@@ -0,0 +1,133 @@
+import numbers
+import weakref
+import pytest
+import wrapper_lib
+from wrapper_lib.typecheck import TypeCheckCache, typecheck_cache
+
+class Plain(object):
+    pass
+
+class PairOnly(object):
+    __metaclass__ = wrapper_lib.MMTypeCheckMeta
+
+    @staticmethod
+    def __instancecheck__(obj):
+        return isinstance(obj, tuple) and len(obj) == 2
+
+class TestTypeCheckCache(object):
+    def test_static_types_cached(self):
+        cache = TypeCheckCache()
+        assert cache.isinstance(1, numbers.Number)
+        assert cache.isinstance(2, numbers.Number)
+        assert cache.isinstance(Plain(), (int, Plain))
+        assert cache.isinstance(Plain(), (int, Plain))
+        assert cache.stats() == {'hits': 2, 'misses': 2, 'size': 2}
+
+    def test_rejections_not_cached(self):
+        cache = TypeCheckCache()
+        assert not cache.isinstance('a', numbers.Number)
+        assert not cache.isinstance('a', numbers.Number)
+        assert cache.stats() == {'hits': 0, 'misses': 2, 'size': 0}
+
+    def test_value_dependent_types_not_cached(self):
+        cache = TypeCheckCache()
+        assert cache.isinstance((1, 2), (Plain, PairOnly))
+        assert not cache.isinstance((1, 2, 3), (Plain, PairOnly))
+        assert cache.stats()['hits'] == 0
+
+    def test_proxies_not_cached(self):
+        cache = TypeCheckCache()
+        obj = Plain()
+        assert cache.isinstance(weakref.proxy(obj), Plain)
+        assert cache.stats()['size'] == 0
+
+    def test_clear(self):
+        cache = TypeCheckCache()
+        cache.isinstance(1, int)
+        cache.clear()
+        assert cache.stats() == {'hits': 0, 'misses': 0, 'size': 0}
+
+    def test_check_arg_type(self):
+        wrapper_lib.check_arg_type('i', numbers.Number, 10)
+        wrapper_lib.check_arg_type('i', numbers.Number,
+                                   wrapper_lib.default_arg_indicator)
+        with pytest.raises(wrapper_lib.MMTypeError):
+            wrapper_lib.check_arg_type('i', numbers.Number, 'a')
+        with pytest.raises(wrapper_lib.MMTypeError):
+            wrapper_lib.check_arg_type('i', numbers.Number, 'a')
+
+        hits = wrapper_lib.typecheck_cache_stats()['hits']
+        wrapper_lib.check_arg_type('i', numbers.Number, 11)
+        assert wrapper_lib.typecheck_cache_stats()['hits'] == hits + 1
+
+    def test_voidptr(self):
+        ffi = wrapper_lib._ffi.ffi
+        assert isinstance(ffi.new('char[]', 'abc'), wrapper_lib.VoidPtrABC)
+        assert isinstance(ffi.new('char[]', 'a'), wrapper_lib.VoidPtrABC)
+        assert isinstance(10, wrapper_lib.VoidPtrABC)
+        assert not isinstance('abc', wrapper_lib.VoidPtrABC)
+        assert not isinstance('abc', wrapper_lib.VoidPtrABC)
+
+    def test_all_isinstance(self):
+        cache = TypeCheckCache()
+        assert cache.all_isinstance([1, 2, 3.0], numbers.Number)
+        assert cache.all_isinstance([4, 5.0], numbers.Number)
+        assert cache.stats() == {'hits': 2, 'misses': 2, 'size': 2}
+        assert not cache.all_isinstance([1, 'a'], numbers.Number)
+
+        assert cache.all_isinstance([(1, 2), (3, 4)], PairOnly)
+        assert not cache.all_isinstance([(1, 2), (3, 4, 5)], PairOnly)
+
+class AnySeq(object):
+    __metaclass__ = wrapper_lib.MMTypeCheckMeta
+
+    @staticmethod
+    def __instancecheck__(obj):
+        return isinstance(obj, (tuple, list))
+
+class TestMultimethodDispatch(object):
+    def make_func(self):
+        @wrapper_lib.multimethod
+        def func(*args, **kwargs):
+            pass
+        @func.overload
+        def func(obj):
+            wrapper_lib.check_arg_type('obj', Plain, obj)
+            return 'plain'
+        @func.overload
+        def func(i):
+            wrapper_lib.check_arg_type('i', numbers.Number, i)
+            return 'number'
+        @func.overload
+        def func(p):
+            wrapper_lib.check_arg_type('p', PairOnly, p)
+            return 'pair'
+        @func.overload
+        def func(s):
+            wrapper_lib.check_arg_type('s', AnySeq, s)
+            return 'seq'
+        return func
+
+    def test_overlapping_overloads(self):
+        # A 3-tuple only matches the second overload, but that mustn't stop a
+        # later 2-tuple from reaching the first
+        func = self.make_func()
+        for i in range(2):
+            assert func((1, 2, 3)) == 'seq'
+            assert func((1, 2)) == 'pair'
+            assert func([1, 2]) == 'seq'
+
+        func = self.make_func()
+        assert func((1, 2)) == 'pair'
+        assert func((1, 2, 3)) == 'seq'
+        assert func((1, 2)) == 'pair'
+
+    def test_type_only_rejections(self):
+        func = self.make_func()
+        assert func(1) == 'number'
+        value_checks = typecheck_cache.value_checks
+        assert func(2) == 'number'
+        assert func((1, 2)) == 'pair'
+        # The first overload rejected ints by their type, so no checks that
+        # look at the values were run for them
+        assert typecheck_cache.value_checks == value_checks + 1
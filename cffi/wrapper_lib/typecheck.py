@@ -0,0 +1,110 @@
+import abc
+
+# Metaclass __instancecheck__ implementations whose result depends only on the
+# type of the object being checked. Classes with any other __instancecheck__
+# (eg MMTypeCheckMeta or MappedType) may look at the object's value, such as
+# the length of a sequence, so their results can't be cached.
+TYPE_ONLY_INSTANCECHECKS = (type.__instancecheck__,
+                            abc.ABCMeta.__instancecheck__)
+
+def _flatten_types(arg_type):
+    if isinstance(arg_type, tuple):
+        for t in arg_type:
+            for i in _flatten_types(t):
+                yield i
+    else:
+        yield arg_type
+
+class TypeCheckCache(object):
+    """
+    An inline cache for the ``isinstance`` checks done on every argument of a
+    wrapped call. The cache is keyed on the type (or tuple of types) being
+    checked against and the type of the object being checked.
+
+    The parts of a check that depend only on the object's type are remembered
+    once they succeed, so a repeated type skips them entirely. Parts that may
+    inspect the object's value are run every time the cached parts don't
+    accept the object; value_checks counts how many times that happened.
+    """
+    def __init__(self):
+        self.accepted = set()
+        self.split_types = {}
+        self.hits = 0
+        self.misses = 0
+        self.value_checks = 0
+
+    def split(self, arg_type):
+        try:
+            return self.split_types[arg_type]
+        except KeyError:
+            pass
+
+        static = []
+        dynamic = []
+        for t in _flatten_types(arg_type):
+            check = getattr(type(t), '__instancecheck__', None)
+            if check in TYPE_ONLY_INSTANCECHECKS:
+                static.append(t)
+            else:
+                dynamic.append(t)
+        split = self.split_types[arg_type] = (tuple(static), tuple(dynamic))
+        return split
+
+    def isinstance(self, obj, arg_type):
+        key = (arg_type, type(obj))
+        if key in self.accepted:
+            self.hits += 1
+            return True
+        self.misses += 1
+
+        static, dynamic = self.split(arg_type)
+        if isinstance(obj, static):
+            # isinstance also looks at __class__, which proxy objects use to
+            # pretend to be something else. Only trust the object's type when
+            # it isn't pretending.
+            if getattr(obj, '__class__', None) is type(obj):
+                self.accepted.add(key)
+            return True
+        if dynamic:
+            self.value_checks += 1
+        return isinstance(obj, dynamic)
+
+    def all_isinstance(self, seq, arg_type):
+        """
+        Check that every item in seq is an instance of arg_type. Items whose
+        type has already been accepted aren't looked at individually.
+        """
+        accepted = self.accepted
+        unchecked = [t for t in set(map(type, seq))
+                     if (arg_type, t) not in accepted]
+        if not unchecked:
+            self.hits += 1
+            return True
+
+        unchecked = set(unchecked)
+        for obj in seq:
+            if type(obj) in unchecked and not self.isinstance(obj, arg_type):
+                return False
+        return True
+
+    def clear(self):
+        self.accepted.clear()
+        self.split_types.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self.accepted)}
+
+typecheck_cache = TypeCheckCache()
+
+def typecheck_cache_stats():
+    """
+    Return a dict with the number of ``hits`` and ``misses`` of the argument
+    type-check cache, and the number of (type, argument type) pairs in it.
+    """
+    return typecheck_cache.stats()
+
+def clear_typecheck_cache():
+    typecheck_cache.clear()
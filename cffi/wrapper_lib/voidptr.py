@@ -4,10 +4,26 @@ from _ffi import ffi
 class VoidPtrABC(object):
     __metaclass__ = MMTypeCheckMeta
 
+    # Whether an object can be cast to void* depends on its type, or for cdata
+    # objects, its C type. Remember the answers so the trial cast only happens
+    # once per type.
+    _castable = {}
+
     @classmethod
     def __instancecheck__(cls, obj):
+        if isinstance(obj, ffi.CData):
+            key = ffi.typeof(obj)
+        else:
+            key = type(obj)
+        try:
+            return cls._castable[key]
+        except KeyError:
+            pass
+
         try:
             ffi.cast('void*', obj)
-            return True
+            castable = True
         except TypeError:
-            return False
+            castable = False
+        cls._castable[key] = castable
+        return castable
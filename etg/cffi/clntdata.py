@@ -14,6 +14,7 @@ def run():
 
     module.addHeaderCode("""
     typedef WL_RefCountedPyObjBase<wxClientData> wxPyClientData;
+    extern "C" void* new_wxPyClientData(void *ptr);
     """)
 
     module.addCppCode("""
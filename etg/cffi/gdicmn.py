@@ -24,3 +24,42 @@ def run(module):
         'Get',
         pyArgs=etgtools.ArgsString('(WL_Self self)'),
         pyBody="return (self.x, self.y)"))
+
+    # Lists of points, such as the ones given to wx.DC.DrawLines, are built
+    # in C++ from an array of coordinates. A Nx2 buffer of C ints, such as a
+    # NumPy int32 array, is used as it is; other sequences are flattened and
+    # converted by cffi in one go.
+    module.addHeaderCode('extern "C" void* wxPyPointList_FromArray(const int *xy, int count);')
+    module.addCppCode("""
+    extern "C" void* wxPyPointList_FromArray(const int *xy, int count)
+    {
+        wxPointList *list = new wxPointList;
+        list->DeleteContents(true);
+        for (int i = 0; i < count; i++)
+            list->Append(new wxPoint(xy[2 * i], xy[2 * i + 1]));
+        return list;
+    }
+    """)
+    module.addCdef_cffi('void* wxPyPointList_FromArray(const int *, int);')
+
+    c = module.findItem('wxPointList')
+    c.instanceCheck_cffi = """\
+    if wrapper_lib.buffer_array(py_obj, ffi.typeof('int[]'), (2,)) is not None:
+        return True
+    return (isinstance(py_obj, collections.Sequence) and
+            not isinstance(py_obj, basestring))
+    """
+    c.convertFromPyObject_cffi = """\
+    import itertools
+    array = wrapper_lib.buffer_array(py_obj, ffi.typeof('int[]'), (2,))
+    if array is None:
+        coords = list(itertools.chain.from_iterable(py_obj))
+        if len(coords) != 2 * len(py_obj):
+            raise TypeError("Sequence of Point compatible objects expected.")
+        try:
+            array = ffi.new('int[]', coords)
+        except TypeError:
+            array = ffi.new('int[]', [int(i) for i in coords])
+    ptr = clib.wxPyPointList_FromArray(array, len(array) // 2)
+    return wrapper_lib.obj_from_ptr(ptr, {PYNAME}, True)
+    """
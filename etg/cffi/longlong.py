@@ -26,7 +26,11 @@ def run():
         """,
         c2py="return cdata",
 
-        instanceCheck="return isinstance(py_obj, numbers.Number)"))
+        instanceCheck="return isinstance(py_obj, numbers.Number)",
+
+        # Arrays of long long can be made straight from lists of numbers and
+        # from buffers
+        arrayFromBuffer=True))
 
     #-----------------------------------------------------------------
     tools.doCommonTweaks(module)
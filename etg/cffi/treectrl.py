@@ -7,6 +7,7 @@ def run(module):
     module.addHeaderCode('#include <wx/treectrl.h>')
     module.addHeaderCode("""
     typedef WL_RefCountedPyObjBase<wxTreeItemData> wxPyTreeItemData;
+    extern "C" void* new_wxPyTreeItemData(void *ptr);
     """)
     module.addCppCode("""
     extern "C" void* new_wxPyTreeItemData(void *ptr)
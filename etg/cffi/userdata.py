@@ -14,6 +14,7 @@ def run():
 
     module.addHeaderCode("""
     typedef WL_RefCountedPyObjBase<wxObject> wxPyUserData;
+    extern "C" void* new_wxPyUserData(void *ptr);
     """)
 
     module.addCppCode("""
@@ -39,6 +39,7 @@ def run():
         argsString='(const wxString& str)',
         items=[ParamDef(type='const wxString&', name='str')]))
 
+    module.addHeaderCode('wxString testStringTypemap(const wxString& str);')
     module.addCppCode("""\
     wxString testStringTypemap(const wxString& str)
     {
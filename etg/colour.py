@@ -318,6 +318,7 @@ def run():
         
     
     # Just for TESTING, remove it later
+    module.addHeaderCode('wxColour testColourTypeMap(const wxColour& c);')
     module.addCppCode("""\
     wxColour testColourTypeMap(const wxColour& c)
     {
@@ -73,6 +73,11 @@ def run():
     
    
     # Add some code for getting the version numbers
+    module.addHeaderCode("""
+        extern const int MAJOR_VERSION;
+        extern const int MINOR_VERSION;
+        extern const int RELEASE_NUMBER;
+        """)
     module.addCppCode("""
         #include <wx/version.h>
         const int MAJOR_VERSION = wxMAJOR_VERSION;
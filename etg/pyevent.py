@@ -75,6 +75,7 @@ def run():
     
     
     # TODO: Temporary testing code, get rid of this later
+    module.addHeaderCode('wxEvent* testCppClone(wxEvent& evt);')
     module.addCppCode("""\
         wxEvent* testCppClone(wxEvent& evt) {
             return evt.Clone();
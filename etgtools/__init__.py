@@ -20,6 +20,7 @@ sys.path.insert(0, os.path.abspath(os.path.split(__file__)[0]+'/..'))
 
 from buildtools.config import Config
 from .extractors import *
+from .xmlcache import ExtractCache, parseXML
 
 #---------------------------------------------------------------------------
 cfg = Config(noWxConfig=True)
@@ -27,6 +28,10 @@ cfg = Config(noWxConfig=True)
 phoenixRoot = cfg.ROOT_DIR
 XMLSRC = cfg.DOXY_XML_DIR
 
+# Classes extracted from the XML files are cached here, unless --nocache is
+# given on the command line.
+extractCache = ExtractCache(os.path.join(phoenixRoot, 'build', 'etgcache'))
+
 
 #---------------------------------------------------------------------------
 
@@ -72,12 +77,8 @@ def parseDoxyXML(module, class_or_filename_list):
         if verbose():
             print("Loading %s..." % pathname)
         _filesparsed.add(pathname)
-        
-        root = et.parse(pathname).getroot()
-        for element in root:
-            # extract and add top-level elements from the XML document
-            item = module.addElement(element)
-            
+
+        for item in _extractItems(module, pathname):
             # Also automatically parse the XML for the include file to get related
             # typedefs, functions, enums, etc.
             # Make sure though, that for interface files we only parse the one
@@ -98,8 +99,26 @@ def parseDoxyXML(module, class_or_filename_list):
     
     module.parseCompleted()
 
-#---------------------------------------------------------------------------
-        
+
+def _extractItems(module, pathname):
+    """
+    Extract and add the top-level elements of an XML document to the module,
+    and return the items made from them. The items of documents that only
+    describe classes are cached.
+    """
+    useCache = '--nocache' not in sys.argv
+    items = extractCache.load(pathname, module) if useCache else None
+    if items is not None:
+        module.items.extend(items)
+        return items
+
+    with extractCache.recording() as deps:
+        root = parseXML(pathname, cache=False)
+        items = [module.addElement(element) for element in root]
+    if useCache and all(element.get('kind') in ('class', 'struct')
+                        for element in root):
+        extractCache.store(pathname, items, deps, module)
+    return items
 
 #---------------------------------------------------------------------------
         
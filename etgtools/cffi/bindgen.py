@@ -1,8 +1,14 @@
+import os
 import cPickle as pickle
 import cStringIO
+import hashlib
 import warnings
+from multiprocessing.pool import ThreadPool
+from distutils.core import Distribution
+from distutils.command.build_ext import build_ext
 
 from module import Module
+from ..deffile import DefFile
 
 class LiteralVerifyArg(str):
     """
@@ -12,38 +18,158 @@ class LiteralVerifyArg(str):
 
 class BindingGenerator(object):
     # TODO: maybe I want defdir instead of path_pattern?
-    def __init__(self, path_pattern):
+    def __init__(self, path_pattern, lazy_classes=False):
         self.path_pattern = path_pattern
+        self.lazy_classes = lazy_classes
         self.modules = { }
+        self.defs = { }
+
+    def load_def(self, module_name):
+        if module_name not in self.defs:
+            self.defs[module_name] = DefFile(self.path_pattern % module_name)
+        return self.defs[module_name]
+
+    def included_defs(self, module_name):
+        """
+        Return the DefFiles of a module and of the modules it includes,
+        recursively.
+        """
+        defs = [self.load_def(module_name)]
+        for deffile in defs:
+            for mod in deffile.attrs['includes']:
+                defs.append(self.load_def(mod))
+        return defs
+
+    def dependency_defs(self, module_name):
+        """
+        Return the set of DefFiles that the code generated for module_name
+        depends on: its own, those of the modules it includes and those of
+        the modules it imports, recursively. Only the index of each file is
+        read.
+        """
+        defs = set()
+        for deffile in self.included_defs(module_name):
+            defs.add(deffile)
+            for mod in deffile.attrs['imports']:
+                defs.update(self.dependency_defs(mod))
+        return defs
+
+    def dependencies(self, module_name):
+        """
+        Return the paths of the .def files returned by dependency_defs.
+        """
+        return set(deffile.path for deffile in
+                   self.dependency_defs(module_name))
+
+    def dependencies_hash(self, module_name):
+        """
+        Return a hash of the contents of the .def files returned by
+        dependency_defs. It only changes when their contents do.
+        """
+        defs = sorted(self.dependency_defs(module_name),
+                      key=lambda deffile: deffile.path)
+        return hashlib.sha1(''.join(d.hash for d in defs)).hexdigest()
 
     def generate(self, module_name):
         if module_name in self.modules:
             return
 
-        with open(self.path_pattern % module_name, 'rb') as f:
-            module = pickle.load(f)
-
-        for mod in module.includes:
-            with open(self.path_pattern % mod, 'rb') as f:
-                mod = pickle.load(f)
+        # The items of the module and the modules it includes are loaded
+        # straight into one module; only its attributes are copied.
+        defs = self.included_defs(module_name)
+        module = defs[0].newModule()
+        for deffile in defs:
+            if deffile is not defs[0]:
                 for attr in ('headerCode', 'cppCode', 'initializerCode',
                              'preInitializerCode', 'postInitializerCode',
-                             'includes', 'imports', 'items', 'cdefs_cffi'):
-                    getattr(module, attr).extend(getattr(mod, attr))
+                             'includes', 'imports', 'cdefs_cffi'):
+                    getattr(module, attr).extend(deffile.attrs[attr])
+            module.items.extend(deffile.items(module))
 
         imported_modules = []
         for mod in module.imports:
             self.generate(mod)
             imported_modules.append(self.modules[mod])
 
-        module = Module(module)
+        module = Module(module, self.lazy_classes)
         self.modules[module.name] = module
         module.setup(imported_modules)
 
     def write_files(self, module_name, pyfile, userpyfile, cppfile, hfile,
-                    verify_args):
-        self.modules[module_name].write_files(pyfile, userpyfile, cppfile,
-                                              hfile, verify_args)
+                    verify_args, tmpdir='cffi', compile=True,
+                    class_cppfiles=()):
+        """
+        Write the generated code of a module and compile it into tmpdir. If
+        compile is False, return the distutils Extension to pass to
+        compile_extension instead. See Module.write_files for
+        class_cppfiles.
+        """
+        return self.modules[module_name].write_files(
+            pyfile, userpyfile, cppfile, hfile, verify_args, tmpdir, compile,
+            class_cppfiles)
+
+class ParallelBuildExt(build_ext):
+    """
+    A build_ext command that compiles the source files of an extension up to
+    jobs at a time. If slots is set, it's a semaphore that is held while
+    compiling each source file.
+    """
+    def initialize_options(self):
+        build_ext.initialize_options(self)
+        self.jobs = 1
+        self.slots = None
+
+    def compile_sources(self, compile, sources, *args, **kwargs):
+        def compile_one(source):
+            if self.slots is None:
+                return compile([source], *args, **kwargs)
+            with self.slots:
+                return compile([source], *args, **kwargs)
+
+        pool = ThreadPool(max(self.jobs, 1))
+        try:
+            objects = pool.map(compile_one, sources)
+        finally:
+            pool.close()
+            pool.join()
+        return sum(objects, [])
+
+    def build_extension(self, ext):
+        # build_ext compiles all of the sources with one call to its compiler,
+        # which compiles them one after the other.
+        compile = self.compiler.compile
+        self.compiler.compile = (lambda sources, *args, **kwargs:
+                                 self.compile_sources(compile, sources, *args,
+                                                      **kwargs))
+        try:
+            return build_ext.build_extension(self, ext)
+        finally:
+            del self.compiler.compile
+
+def compile_extension(ext, tmpdir='cffi', jobs=1, slots=None):
+    """
+    Compile an Extension returned by BindingGenerator.write_files into tmpdir
+    and return the path of the compiled module. This only needs the Extension,
+    so it can be run in another process.
+
+    Up to jobs of the extension's source files are compiled at the same time.
+    If slots is given, it's a semaphore that is held while compiling each
+    source file, to limit the number of compilers run by several processes.
+    """
+    dist = Distribution({'ext_modules': [ext],
+                         'cmdclass': {'build_ext': ParallelBuildExt}})
+    dist.parse_config_files()
+    options = dist.get_option_dict('build_ext')
+    options['force'] = ('compile_extension', True)
+    options['build_lib'] = ('compile_extension', tmpdir)
+    options['build_temp'] = ('compile_extension', tmpdir)
+
+    cmd = dist.get_command_obj('build_ext')
+    cmd.jobs = jobs
+    cmd.slots = slots
+    dist.run_command('build_ext')
+    [path] = cmd.get_outputs()
+    return os.path.abspath(path)
 
 
     """
@@ -156,28 +156,30 @@ class OverloadManager(object):
     @utils.call_once
     def print_pycode(self, pyfile, indent):
         pyname = self.functions[0].pyname
-        pyfile.write(nci("def %s(*args, **kwargs):" % pyname, indent))
+        pyfile.write(nci("""\
+        @wrapper_lib.multimethod
+        def %s(*args, **kwargs):""" % pyname, indent))
 
         # Print the docstring of every overload joined together
         docs = [nci(func.docstring) for func in self.functions]
         self.docstring = ''.join(docs)
         utils.print_docstring(self, pyfile, indent + 4)
 
-        pyfile.write(nci("error_list = []", indent + 4))
-
+        # The overloads are defined once, alongside the dispatcher, rather than
+        # every time the dispatcher is called. The dispatcher remembers which
+        # overload accepted each signature it has seen.
         for func in self.functions:
-            func.print_actual_pycode(pyfile, indent + 4)
-            pyfile.write(nci("""\
-            try:
-                return %s(*args, **kwargs)
-            except (TypeError, wrapper_lib.MMTypeError) as e:
-                error_list.append(e)
-            except wrapper_lib.MMInternalError as e:
-                raise e.exception
-            """ % pyname, indent + 4))
+            pyfile.write(nci("@%s.overload" % pyname, indent))
+            func.print_actual_pycode(pyfile, indent)
 
-        pyfile.write(nci("wrapper_lib.raise_mm_arg_failure(error_list)",
-                        indent + 4))
+        self.print_pycode_decorators(pyfile, indent)
+
+    def print_pycode_decorators(self, pyfile, indent):
+        """
+        Subclasses can override this method to wrap the finished dispatcher,
+        eg in a staticmethod.
+        """
+        pass
 
     def is_overloaded(self):
         return len(self.functions) > 1
@@ -334,7 +336,8 @@ class FunctionBase(CppObject):
         if self.has_default_args():
             pyfile.write(nci('defaults_bitflags = 0', indent + 4))
 
-        for param in self.params:
+        # Array sizes are only known once their arrays have been converted
+        for param in sorted(self.params, key=lambda p: p.flags.arraysize):
             param.print_call_cdef_setup(pyfile, indent)
 
     def print_pycode_call(self, pyfile, indent):
@@ -352,6 +355,11 @@ class FunctionBase(CppObject):
                 pyfile.write(nci(conversion, 4))
 
     def print_pycode_ownership_transfer(self, pyfile, indent):
+        # A factory's return value starts out owned by Python. This has to
+        # come first so a transferThis parameter can hand it to a new owner.
+        if self.flags.factory:
+            pyfile.write(nci("wrapper_lib.take_ownership(creturnval)", indent + 4))
+
         # Handle owership of parameters
         # This loop needs to be limited to wrapped types because transfer can
         # be applied to a mapped type, where it has a very different meaning.
@@ -387,8 +395,6 @@ class FunctionBase(CppObject):
         if self.flags.transfer_back:
             pyfile.write(nci("wrapper_lib.take_ownership(creturnval)",
                              indent + 4))
-        if self.flags.factory:
-            pyfile.write(nci("wrapper_lib.take_ownership(creturnval)", indent + 4))
 
     def print_pycode_return(self, pyfile, indent):
         outvars = []
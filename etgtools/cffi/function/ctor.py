@@ -98,7 +98,8 @@ class CtorMethod(Method):
         if self.has_default_args():
             pyfile.write(nci('defaults_bitflags = 0', indent + 4))
 
-        for param in self.params:
+        # Array sizes are only known once their arrays have been converted
+        for param in sorted(self.params, key=lambda p: p.flags.arraysize):
             if isinstance(param, SelfParam):
                 continue
             param.print_call_cdef_setup(pyfile, indent)
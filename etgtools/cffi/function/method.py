@@ -5,14 +5,11 @@ from .operators import get_operator
 
 
 class MethodOverloadManager(OverloadManager):
-    @utils.call_once
-    def print_pycode(self, pyfile, indent):
+    def print_pycode_decorators(self, pyfile, indent):
         indices = [str(f.vtable_index) for f in self.functions if f.virtual]
         if len(indices) > 0:
-            pyfile.write(nci("@wrapper_lib.VirtualMethod(%s)" %
-                             ', '.join(indices), indent))
-
-        super(MethodOverloadManager, self).print_pycode(pyfile, indent)
+            pyfile.write(nci("{0} = wrapper_lib.VirtualMethod({1})({0})".format(
+                self.functions[0].pyname, ', '.join(indices)), indent))
 
 class Method(FunctionBase):
     PREFIX = 'wrappedmeth_'
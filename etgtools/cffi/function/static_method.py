@@ -1,11 +1,11 @@
 from .method import utils, nci, VoidType, Method, SelfParam, OverloadManager
 
 class StaticMethodOverloadManager(OverloadManager):
-    @utils.call_once
-    def print_pycode(self, pyfile, indent):
-        pyfile.write(nci("@staticmethod", indent))
-
-        super(StaticMethodOverloadManager, self).print_pycode(pyfile, indent)
+    def print_pycode_decorators(self, pyfile, indent):
+        super(StaticMethodOverloadManager, self).print_pycode_decorators(
+            pyfile, indent)
+        pyfile.write(nci("{0} = staticmethod({0})".format(
+            self.functions[0].pyname), indent))
 
 class StaticMethod(Method):
     OVERLOAD_MANAGER = StaticMethodOverloadManager
@@ -28,6 +28,7 @@ class MappedType(CppType):
         self.to_cpp_cdefname = self.name + '_to_cpp'
 
         self.default_placeholder = cls.placeHolder
+        self.array_from_buffer = getattr(cls, 'arrayFromBuffer', False)
 
     def build_typeinfo(self, typeinfo):
         typeinfo.c_type = self.ctype
@@ -74,6 +75,9 @@ class MappedType(CppType):
         """.format(self), indent))
         pyfile.write(nci(self.instancecheck_code, indent + 8))
 
+        if self.array_from_buffer:
+            pyfile.write(nci("_array_from_buffer_ = True", indent + 4))
+
         pyfile.write(nci("""\
             @classmethod
             def to_py(cls, cdata):
@@ -89,26 +93,31 @@ class MappedType(CppType):
         pyfile.write(nci(self.convert_to_c_code, indent + 8))
 
     def print_headercode(self, hfile):
+        # The conversions are inline as the header may be included by more
+        # than one of a module's source files.
         hfile.write(nci("""\
         template<>
-        {0.ctype} WL_mappedtype<{0.name}, {0.ctype}>::
+        inline {0.ctype} WL_mappedtype<{0.name}, {0.ctype}>::
             to_c({0.name} *cpp_obj)
         {{
 {1}
         }}
 
         template<>
-        {0.name} * WL_mappedtype<{0.name}, {0.ctype}>::
+        inline {0.name} * WL_mappedtype<{0.name}, {0.ctype}>::
             to_cpp({0.ctype} cdata)
         {{
 {2}
         }}
+        """.format(self, nci(self.to_c_code, 12), nci(self.to_cpp_code, 12))))
 
+    def print_cppcode(self, cppfile):
+        cppfile.write(nci("""\
         extern "C" {0.name} * {0.to_cpp_cdefname}({0.ctype} cdata)
         {{
             return WL_mappedtype<{0.name}, {0.ctype}>::to_cpp(cdata);
         }}
-        """.format(self, nci(self.to_c_code, 12), nci(self.to_cpp_code, 12))))
+        """.format(self)))
 
     def call_cdef_param_setup(self, typeinfo, name):
         if typeinfo.flags.out:
@@ -15,16 +15,32 @@ from . import enum
 from . import pycode
 
 from .base import CppScope
+from .wrappedtype import WrappedType
 
 from .. import extractors
 from ..generators import nci
 
+def is_preprocessor_only(code):
+    """
+    Check if code is only made of preprocessor directives and blank lines.
+    """
+    continued = False
+    for line in code.splitlines():
+        line = line.strip()
+        if line and not continued and not line.startswith('#'):
+            return False
+        continued = line.endswith('\\')
+    return True
+
 class Module(CppScope):
-    def __init__(self, module):
+    def __init__(self, module, lazy_classes=False):
         super(Module, self).__init__(None)
         self.item = module
 
         self.module = self
+        # When set, most methods of wrapped classes are only added to their
+        # classes the first time they're needed, which speeds up importing.
+        self.lazy_classes = lazy_classes
 
         self.name = module.name
         self.pyname = module.name
@@ -85,9 +101,18 @@ class Module(CppScope):
 
     # TODO: change how cppCode/headerCode/etc are handled. It would be more
     #       memory efficient to delay loading them until they are about to be
-    #       printed and deleted immediately after. This will likely be part of
-    #       splitting individual classes into their own translation units.
-    def write_files(self, pyfile, userpyfile, cppfile, hfile, verify_args):
+    #       printed and deleted immediately after.
+    def write_files(self, pyfile, userpyfile, cppfile, hfile, verify_args,
+                    tmpdir='cffi', compile=True, class_cppfiles=()):
+        """
+        If class_cppfiles is given, the code for the module's classes is
+        spread over those files instead of written to cppfile, so that they
+        can be compiled separately. The files must be added to the sources in
+        verify_args. cppCode at the module level that only has preprocessor
+        directives is copied into all of them. Other cppCode is only written
+        to cppfile, so that what it defines is defined once; the functions and
+        variables the classes use from it must be declared in headerCode.
+        """
         hfile.write(nci("""\
         #ifndef INCLUDE_GUARD_{0}s_H
         #define INCLUDE_GUARD_{0}s_H""".format(self.name)))
@@ -105,16 +130,23 @@ class Module(CppScope):
         hfile.write("#endif  /* INCLUDE_GUARD */")
         hfile.flush()
 
-        cppfile.write(nci("""\
+        preamble = nci("""\
         #include <cstring>
         #include <wrapper_lib.h>
 
         #include "{0}.h"
-        """.format(self.name)))
-
+        """.format(self.name))
+        cppfile.write(preamble)
         for line in self.item.cppCode:
             cppfile.write(nci(line))
 
+        for f in class_cppfiles:
+            f.write('#define WL_EXTERN_GLOBALS\n')
+            f.write(preamble)
+            for line in self.item.cppCode:
+                if is_preprocessor_only(line):
+                    f.write(nci(line))
+
         # TODO: Create the types-api object in this function
         # TODO: Does this need to have a module specfic name?
         initfunc = 'cffiinitcode_%s' % (self.item.name)
@@ -130,7 +162,10 @@ class Module(CppScope):
                 cppfile.write(nci(line, 4))
         cppfile.write('}\n')
 
-        self.print_nested_cppcode(cppfile)
+        if class_cppfiles:
+            self.print_sharded_cppcode(cppfile, class_cppfiles)
+        else:
+            self.print_nested_cppcode(cppfile)
         cppfile.flush()
 
         # Write Python preamble
@@ -196,7 +231,37 @@ class Module(CppScope):
         for type in self.types:
             type.print_finalize_pycode(pyfile)
 
-        self.ffi.compile('cffi')
+        if compile:
+            self.ffi.compile(tmpdir)
+        else:
+            return self.ffi.distutils_extension(tmpdir, verbose=False)
+
+    def print_sharded_cppcode(self, cppfile, class_cppfiles):
+        # Each class goes into the file that has the least code so far, which
+        # keeps the files roughly the same size without having to hold all of
+        # the code in memory first.
+        # A class's methods are printed with it, as the class's own code
+        # defines the vtable that they use.
+        subscopes = set(map(id, self.subscopes))
+        sizes = [f.tell() for f in class_cppfiles]
+        for type in self.types:
+            if isinstance(type, WrappedType):
+                i = sizes.index(min(sizes))
+                f = class_cppfiles[i]
+                type.print_cppcode(f)
+                if id(type) in subscopes:
+                    type.print_nested_cppcode(f)
+                sizes[i] = f.tell()
+            else:
+                type.print_cppcode(cppfile)
+        for obj in self.objects:
+            obj.print_cppcode(cppfile)
+        for scope in self.subscopes:
+            if not isinstance(scope, WrappedType):
+                scope.print_nested_cppcode(cppfile)
+
+        for f in class_cppfiles:
+            f.flush()
 
     def build_verify_args(self, verify_args):
         args = []
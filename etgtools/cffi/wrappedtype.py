@@ -239,7 +239,7 @@ class WrappedType(CppScope, CppType):
 
     def print_cdef_and_verify(self, pyfile):
         for base in self.bases:
-            pyfile.write("void* cfficast_{0.cname}_to_{1.cname}(void*);\n"
+            pyfile.write("ptrdiff_t cffioffset_{0.cname}_to_{1.cname}(void);\n"
                          .format(self, base))
 
         if not self.uninstantiable and len(self.virtualmethods) > 0:
@@ -249,7 +249,7 @@ class WrappedType(CppScope, CppType):
             void {0.cname}_set_flags(void *, char*);
             """.format(self, len(self.virtualmethods))))
         if self.convert_subclass_code is not None:
-            pyfile.write("char * cffigetclassname_%s(void *);\n" %
+            pyfile.write("const char * cffigetclassname_%s(void *);\n" %
                          self.cname)
 
     @utils.call_once
@@ -292,7 +292,7 @@ class WrappedType(CppScope, CppType):
 
         pyfile.write(nci(
             "_castdata = wrapper_lib.CastData([%s])\n", indent + 4) % ', '.join(
-            "({1.unscopedpyname}, clib.cfficast_{0.cname}_to_{1.cname})"
+            "({1.unscopedpyname}, clib.cffioffset_{0.cname}_to_{1.cname}())"
             .format(self, base) for base in self.bases)
         )
 
@@ -325,8 +325,15 @@ class WrappedType(CppScope, CppType):
         for obj in self.print_order:
             obj.print_pycode(pyfile, indent + 4)
 
+        lazy_objects = []
         for obj in self.objects:
-            obj.print_pycode(pyfile, indent + 4)
+            if self.module.lazy_classes and self.is_lazy_member(obj):
+                lazy_objects.append(obj)
+            else:
+                obj.print_pycode(pyfile, indent + 4)
+        if self.module.lazy_classes:
+            self.print_lazy_members(pyfile, lazy_objects, indent + 4)
+
         for type in self.types:
             type.print_pycode(pyfile, indent + 4)
         for scope in self.subscopes:
@@ -335,6 +342,36 @@ class WrappedType(CppScope, CppType):
         if self.extra_pycode:
             pyfile.write(nci(self.extra_pycode, indent + 4))
 
+    def is_lazy_member(self, obj):
+        """
+        Check if obj can be added to the class the first time one of the
+        class's attributes is missing instead of when the class is created.
+        """
+        from .function import FunctionBase
+        if not isinstance(obj, FunctionBase):
+            # Member variables and properties are data descriptors, so they
+            # must exist before anything is assigned to an instance.
+            return False
+        if obj.pyname.startswith('_'):
+            # Special methods are looked up on the type directly, bypassing
+            # __getattr__.
+            return False
+        # Virtual methods need to be seen by the metaclass
+        return not any(getattr(f, 'virtual', False)
+                       for f in obj.overload_manager.functions)
+
+    def print_lazy_members(self, pyfile, objects, indent):
+        pyfile.write(nci("""\
+        @wrapper_lib.lazy_members
+        def _lazy_members_():""", indent))
+        if not objects:
+            pyfile.write(nci("return {}", indent + 4))
+            return
+
+        for obj in objects:
+            obj.print_pycode(pyfile, indent + 4)
+        pyfile.write(nci("return locals()", indent + 4))
+
     def print_finalize_pycode(self, pyfile):
         # XXX Should this be a decorator or maybe part of the metaclass?
         #     Should the unscopedname be used? Maybe this should be user
@@ -363,7 +400,10 @@ class WrappedType(CppScope, CppType):
         # TODO: Do I want to always write the flag here or do I pull it in
         #       using a template super-class?
 
-        hfile.write("    signed char vflags[%d];\n" % len(self.virtualmethods))
+        # vflags points either at the flags of the object's Python class or,
+        # once one of the object's methods is overridden, at own_vflags
+        hfile.write("    signed char *vflags;\n")
+        hfile.write("    signed char own_vflags[%d];\n" % len(self.virtualmethods))
 
         hfile.write("};\n\n")
 
@@ -379,9 +419,9 @@ class WrappedType(CppScope, CppType):
 
         for base in self.bases:
             cppfile.write(nci("""\
-            WL_C_INTERNAL void* cfficast_{0.cname}_to_{1.cname}({0.unscopedname} *ptr)
+            WL_C_INTERNAL ptrdiff_t cffioffset_{0.cname}_to_{1.cname}()
             {{
-                return (void*)({1.unscopedname}*)ptr;
+                return WL_base_offset<{0.unscopedname}, {1.unscopedname}>();
             }}
             """.format(self, base)))
 
@@ -391,20 +431,32 @@ class WrappedType(CppScope, CppType):
 
             WL_C_INTERNAL void {0.cname}_set_flag({0.cppname} *self, int i)
             {{
-                self->vflags[i] = 1;
+                if(self->vflags != self->own_vflags)
+                {{
+                    // Stop sharing the class's flags
+                    memcpy(self->own_vflags, self->vflags, sizeof(self->own_vflags));
+                    self->vflags = self->own_vflags;
+                }}
+                self->own_vflags[i] = 1;
             }}
 
             WL_C_INTERNAL void {0.cname}_set_flags({0.cppname} *self, char *flags)
             {{
-                memcpy(self->vflags, flags, sizeof(self->vflags));
+                self->vflags = (signed char*)flags;
             }}""".format(self, len(self.virtualmethods))))
 
         if self.convert_subclass_code is not None:
             cppfile.write(nci("""\
-            WL_C_INTERNAL const char * cffigetclassname_{0.cname}({0.cppname} *cpp_obj)
+            static const char * cffidetectclassname_{0.cname}({0.cppname} *cpp_obj)
             {{""".format(self)))
             cppfile.write(nci(self.convert_subclass_code, 4))
-            cppfile.write("}\n")
+            cppfile.write(nci("""\
+            }}
+
+            WL_C_INTERNAL const char * cffigetclassname_{0.cname}({0.cppname} *cpp_obj)
+            {{
+                return WL_intern_classname(cffidetectclassname_{0.cname}(cpp_obj));
+            }}""".format(self)))
 
     def call_cdef_param_setup(self, typeinfo, name):
         if typeinfo.flags.out:
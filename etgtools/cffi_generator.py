@@ -1,8 +1,8 @@
 import os
-import pickle
 
 import etgtools.extractors as extractors
 import etgtools.generators as generators
+from etgtools.deffile import writeDefFile
 from etgtools.generators import nci, Utf8EncodingStream, textfile_open, wrapText
 
 from buildtools.config import Config
@@ -26,8 +26,7 @@ class CffiWrapperGenerator(generators.WrapperGeneratorBase):
         self.stripIgnoredItems(module.items)
         self.trimPrefixes(module.items)
 
-        with open(outfile, 'wb') as f:
-            pickle.dump(module, f, 2)
+        writeDefFile(module, outfile)
 
     @classmethod
     def stripIgnoredItems(cls, items):
@@ -0,0 +1,218 @@
+"""
+Reading and writing of the .def files that the cffi wrapper generator writes
+for each module and the cffi binding generator reads.
+
+A .def file holds a ModuleDef. Each of the module's items is pickled and
+compressed on its own so that the items can be loaded one at a time, and the
+strings in all of the pickles are replaced by references to a table that
+holds each string once. The file starts with MAGIC and the format's version,
+followed by the items and the compressed string table. Then comes the index:
+a pickle with the position of the string table, the attributes of the module
+other than its items and, for each item, the position of its data and a hash
+of its contents. The file ends with the
+position of the index.
+
+Reading the index is enough to find out what a module includes and imports;
+the string table is only read when the first item is loaded.
+The hashes tell which items, or whether the module as a whole, changed since
+the file was last written, even if it was written again.
+"""
+
+import cPickle as pickle
+import cStringIO
+import hashlib
+import os
+import struct
+import zlib
+
+MAGIC = 'ETGDEF'
+VERSION = 2
+
+HEADER = struct.Struct('<6sI')
+FOOTER = struct.Struct('<Q')
+
+
+class DefFileError(RuntimeError):
+    pass
+
+
+def _itemHash(item, module):
+    f = cStringIO.StringIO()
+    pickler = pickle.Pickler(f, 2)
+    pickler.persistent_id = lambda obj: 0 if obj is module else None
+    pickler.dump(item)
+    return hashlib.sha1(f.getvalue()).hexdigest()
+
+
+class _StringTable(object):
+    # Items extracted from the XML refer to their module. The first entry of
+    # the table stands for it.
+    def __init__(self, module):
+        self.module = module
+        self.strings = [None]
+        self.indices = {}
+
+    def persistent_id(self, obj):
+        if obj is self.module:
+            return 0
+        if type(obj) is not str:
+            return None
+        try:
+            return self.indices[obj]
+        except KeyError:
+            index = self.indices[obj] = len(self.strings)
+            self.strings.append(obj)
+            return index
+
+    def dumps(self, obj):
+        f = cStringIO.StringIO()
+        pickler = pickle.Pickler(f, 2)
+        pickler.persistent_id = self.persistent_id
+        pickler.dump(obj)
+        return f.getvalue()
+
+
+def writeDefFile(module, path):
+    """
+    Write module to the .def file at path. If the file already holds the same
+    module it is only touched. Returns True if the file was written.
+    """
+    attrs = module.__dict__.copy()
+    items = attrs.pop('items')
+    hashes = [_itemHash(item, module) for item in items]
+    moduleHash = hashlib.sha1(pickle.dumps((type(module), attrs), 2))
+    for h in hashes:
+        moduleHash.update(h)
+    moduleHash = moduleHash.hexdigest()
+
+    try:
+        if DefFile(path).hash == moduleHash:
+            os.utime(path, None)
+            return False
+    except (IOError, DefFileError):
+        pass
+
+    table = _StringTable(module)
+    entries = []
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION))
+        for item, h in zip(items, hashes):
+            data = zlib.compress(table.dumps(item), 1)
+            entries.append((f.tell(), len(data), h))
+            f.write(data)
+
+        data = zlib.compress(pickle.dumps(table.strings, 2), 1)
+        stringsEntry = (f.tell(), len(data))
+        f.write(data)
+
+        index = {
+            'strings': stringsEntry,
+            'class': type(module),
+            'attrs': attrs,
+            'items': entries,
+            'hash': moduleHash,
+        }
+        indexPos = f.tell()
+        pickle.dump(index, f, 2)
+        f.write(FOOTER.pack(indexPos))
+    return True
+
+
+class DefFile(object):
+    """
+    A .def file written by writeDefFile. Only the index is read when the file
+    is opened; the items are read by loadItem, items or loadModule, and the
+    string table when the first of them is.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) != HEADER.size:
+                raise DefFileError('%s is not a .def file' % path)
+            magic, version = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise DefFileError('%s is not a .def file' % path)
+            if version != VERSION:
+                raise DefFileError('%s has version %d of the .def format, '
+                                   'expected version %d. Run the ETG scripts '
+                                   'again.' % (path, version, VERSION))
+
+            f.seek(-FOOTER.size, 2)
+            indexPos, = FOOTER.unpack(f.read(FOOTER.size))
+            f.seek(indexPos)
+            index = pickle.load(f)
+
+        self.stringsEntry = index['strings']
+        self._strings = None
+        self.moduleClass = index['class']
+        self.attrs = index['attrs']
+        self.entries = index['items']
+        self.hash = index['hash']
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def name(self):
+        return self.attrs['name']
+
+    @property
+    def itemHashes(self):
+        return [h for pos, size, h in self.entries]
+
+    @property
+    def strings(self):
+        if self._strings is None:
+            pos, size = self.stringsEntry
+            with open(self.path, 'rb') as f:
+                f.seek(pos)
+                self._strings = pickle.loads(zlib.decompress(f.read(size)))
+        return self._strings
+
+    def _load(self, f, index, persistentLoad):
+        pos, size, h = self.entries[index]
+        f.seek(pos)
+        data = zlib.decompress(f.read(size))
+        unpickler = pickle.Unpickler(cStringIO.StringIO(data))
+        unpickler.persistent_load = persistentLoad
+        return unpickler.load()
+
+    def _persistentLoad(self, module):
+        # The first entry of the table stands for the module
+        strings = self.strings
+        return lambda index: strings[index] if index else module
+
+    def loadItem(self, index, module=None):
+        """
+        Load one item. Its references to its module are set to module.
+        """
+        with open(self.path, 'rb') as f:
+            return self._load(f, index, self._persistentLoad(module))
+
+    def items(self, module=None):
+        """
+        Load the module's items one at a time. Their references to their
+        module are set to module.
+        """
+        persistentLoad = self._persistentLoad(module)
+        with open(self.path, 'rb') as f:
+            for i in range(len(self.entries)):
+                yield self._load(f, i, persistentLoad)
+
+    def newModule(self):
+        """
+        Create the module with a fresh copy of its attributes but no items.
+        """
+        module = self.moduleClass.__new__(self.moduleClass)
+        module.__dict__.update(pickle.loads(pickle.dumps(self.attrs, 2)))
+        module.items = []
+        return module
+
+    def loadModule(self):
+        """
+        Load the whole module, with a fresh copy of its attributes.
+        """
+        module = self.newModule()
+        module.items.extend(self.items(module))
+        return module
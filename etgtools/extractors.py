@@ -18,11 +18,16 @@ import re
 import pprint
 import xml.etree.ElementTree as et
 
+from .xmlcache import parseXML
+
 from .tweaker_tools import FixWxPrefix, magicMethods, \
                            guessTypeInt, guessTypeFloat, guessTypeStr, \
                            textfile_open, getGenerator
 from sphinxtools.utilities import FindDescendants
 
+# The basecompoundref elements of the XML files read by ClassDef.findHierarchy
+_baseCompounds = {}
+
 #---------------------------------------------------------------------------
 # These classes simply hold various bits of information about the classes,
 # methods, functions and other items in the C/C++ API being wrapped.
@@ -694,8 +699,10 @@ class ClassDef(BaseDef):
                 return all_classes, specials
 
             fname = os.path.join(XMLSRC, refid+'.xml')
-            root = et.parse(fname).getroot()
-            compounds = FindDescendants(root, 'basecompoundref')
+            root = parseXML(fname)
+            if fname not in _baseCompounds:
+                _baseCompounds[fname] = FindDescendants(root, 'basecompoundref')
+            compounds = _baseCompounds[fname]
         else:
             compounds = element.findall('basecompoundref')
 
@@ -732,7 +739,7 @@ class ClassDef(BaseDef):
             from etgtools import XMLSRC
             ref = node.get('refid')
             fname = os.path.join(XMLSRC, ref+'.xml')
-            root = et.parse(fname).getroot()
+            root = parseXML(fname)
             innerclass = root[0]
             kind = innerclass.get('kind')
             assert kind in ['class', 'struct']
@@ -1342,6 +1349,12 @@ class MappedTypeDef_cffi(BaseDef):
         # if the cType is `long long`, 0 would be a fine value. The default is
         # `ffi.NULL` since it is assumed many mapped types will use pointers.
         self.placeHolder = 'ffi.NULL'
+
+        # If cType is a number type and py2c does nothing more than convert a
+        # Python number to it, Array parameters of the type can be passed
+        # lists of numbers and buffers (such as NumPy arrays) without
+        # converting each item in Python.
+        self.arrayFromBuffer = False
         self.__dict__.update(kw)
 
 
@@ -0,0 +1,175 @@
+#---------------------------------------------------------------------------
+# Name:        etgtools/xmlcache.py
+#
+# Copyright:   (c) 2013 by Total Control Software
+# License:     wxWindows License
+#---------------------------------------------------------------------------
+
+"""
+Caches for the extraction of items from the Doxygen XML.
+
+Within a process, the XML files that are read again and again while
+extracting classes, such as those of common base classes, are only parsed
+once. Across processes, the items extracted from the XML file of a class are
+kept in an on-disk cache, so that ETG scripts run one after the other or in
+parallel don't extract the same class again. An entry of the on-disk cache is
+used as long as the XML files that were read to extract it, and the
+extractor code, are unchanged. Files are compared by modification time and
+size first, and by the hash of their contents if those differ.
+"""
+
+import os
+import sys
+import hashlib
+import tempfile
+import cPickle as pickle
+import xml.etree.ElementTree as et
+
+CACHE_VERSION = 1
+
+# The source files whose code determines what gets extracted
+_EXTRACTOR_FILES = ('extractors.py', 'tweaker_tools.py', 'xmlcache.py')
+
+_parsed = {}
+_recording = []
+
+
+def parseXML(filename, cache=True):
+    """
+    Parse an XML file and return its root element. Files are only parsed once
+    per process unless cache is False, so the returned elements must not be
+    modified.
+    """
+    for deps in _recording:
+        deps.add(filename)
+    if not cache:
+        return et.parse(filename).getroot()
+    try:
+        return _parsed[filename]
+    except KeyError:
+        root = _parsed[filename] = et.parse(filename).getroot()
+        return root
+
+
+def _fileHash(filename):
+    with open(filename, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _fileInfo(filename):
+    st = os.stat(filename)
+    return st.st_mtime, st.st_size, _fileHash(filename)
+
+
+def _isUnchanged(filename, info):
+    mtime, size, sha = info
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return False
+    if (st.st_mtime, st.st_size) == (mtime, size):
+        return True
+    return st.st_size == size and _fileHash(filename) == sha
+
+
+class ExtractCache(object):
+    """
+    An on-disk cache of the items extracted from XML files. Use it like this:
+
+        items = cache.load(filename, module)
+        if items is None:
+            with cache.recording() as deps:
+                items = extract_items(parseXML(filename, False))
+            cache.store(filename, items, deps, module)
+
+    The items may refer to the module they were extracted for; when loaded
+    they refer to the module passed to load instead.
+    """
+    def __init__(self, cachedir):
+        self.cachedir = cachedir
+        self._extractorHash = None
+
+    @property
+    def extractorHash(self):
+        if self._extractorHash is None:
+            h = hashlib.sha1(str(CACHE_VERSION))
+            srcdir = os.path.dirname(os.path.abspath(__file__))
+            for name in _EXTRACTOR_FILES:
+                h.update(_fileHash(os.path.join(srcdir, name)))
+            self._extractorHash = h.hexdigest()
+        return self._extractorHash
+
+    def _entryPath(self, filename):
+        key = hashlib.sha1(os.path.abspath(filename)).hexdigest()
+        return os.path.join(self.cachedir, key + '.pickle')
+
+    def recording(self):
+        return _Recording()
+
+    def load(self, filename, module):
+        """
+        Return the cached items extracted from filename, or None if there are
+        none or they are out of date.
+        """
+        try:
+            with open(self._entryPath(filename), 'rb') as f:
+                unpickler = pickle.Unpickler(f)
+                unpickler.persistent_load = lambda pid: module
+                entry = unpickler.load()
+        except (IOError, EOFError, pickle.UnpicklingError):
+            return None
+
+        if entry['extractor'] != self.extractorHash:
+            return None
+        for dep, info in entry['deps'].items():
+            if not _isUnchanged(dep, info):
+                return None
+        return entry['items']
+
+    def store(self, filename, items, deps, module):
+        """
+        Store the items extracted from filename, given the names of the files
+        read while extracting them.
+        """
+        deps = set(deps)
+        deps.add(filename)
+        entry = {
+            'extractor': self.extractorHash,
+            'deps': dict((dep, _fileInfo(dep)) for dep in deps),
+            'items': items,
+        }
+        if not os.path.exists(self.cachedir):
+            try:
+                os.makedirs(self.cachedir)
+            except OSError:
+                # Another process made it first
+                pass
+
+        # Write to a temporary file and rename it so that other processes
+        # never see half written entries.
+        fd, tmpname = tempfile.mkstemp(dir=self.cachedir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickler = pickle.Pickler(f, 2)
+                pickler.persistent_id = lambda obj: 0 if obj is module else None
+                pickler.dump(entry)
+            path = self._entryPath(filename)
+            if sys.platform == 'win32' and os.path.exists(path):
+                os.remove(path)
+            os.rename(tmpname, path)
+        except (IOError, OSError):
+            if os.path.exists(tmpname):
+                os.remove(tmpname)
+
+
+class _Recording(object):
+    """
+    Collects the names of the XML files parsed with parseXML in a with block.
+    """
+    def __enter__(self):
+        self.deps = set()
+        _recording.append(self.deps)
+        return self.deps
+
+    def __exit__(self, *exc_info):
+        _recording.remove(self.deps)
@@ -0,0 +1,100 @@
+"""
+Time the layout of a CustomTreeCtrl holding a synthetic tree of about a million
+items: filling and expanding it, expanding and collapsing a branch deep inside
+it, hit-testing, scrolling to items and painting.
+
+Run eg:
+
+    python samples/customtreectrl/bench_customtreectrl.py -n 1000000
+"""
+import sys
+import time
+import random
+import optparse
+
+import wx
+import wx.lib.agw.customtreectrl as CT
+
+def timed(label, func, *args):
+    start = time.time()
+    result = func(*args)
+    elapsed = time.time() - start
+    print('%-20s %.3fs' % (label, elapsed))
+    return result
+
+def fill(tree, count, fanout):
+    # A complete tree with `fanout` children per item, breadth first
+    items = [tree.AddRoot('root')]
+    for parent in items:
+        if len(items) >= count:
+            break
+        for i in range(min(fanout, count - len(items))):
+            items.append(tree.AppendItem(parent, 'item %d' % len(items)))
+    return items
+
+def layout(tree):
+    tree.CalculatePositions()
+    tree.AdjustMyScrollbars()
+
+def toggle(tree, items):
+    for item in items:
+        tree.Collapse(item)
+        layout(tree)
+        tree.Expand(item)
+        layout(tree)
+
+def hittest(tree, points):
+    for point in points:
+        tree.HitTest(point)
+
+def scroll(tree, items):
+    for item in items:
+        tree.ScrollTo(item)
+
+def paint(tree, repeat):
+    for i in range(repeat):
+        tree.Refresh()
+        tree.Update()
+
+def main(args):
+    parser = optparse.OptionParser("usage: %prog [options]")
+    parser.add_option('-n', '--items', type='int', default=1000000,
+                      help='number of items in the tree (default: %default)')
+    parser.add_option('-f', '--fanout', type='int', default=100,
+                      help='number of children per item (default: %default)')
+    parser.add_option('-r', '--repeat', type='int', default=100,
+                      help='number of expand/collapse, hit-test, scroll and '
+                           'paint operations (default: %default)')
+    parser.add_option('-v', '--variable', action='store_true',
+                      help='use the TR_HAS_VARIABLE_ROW_HEIGHT style')
+    options, args = parser.parse_args(args)
+
+    app = wx.App(False)
+    frame = wx.Frame(None, size=(400, 600))
+    style = CT.TR_DEFAULT_STYLE
+    if options.variable:
+        style |= CT.TR_HAS_VARIABLE_ROW_HEIGHT
+    tree = CT.CustomTreeCtrl(frame, agwStyle=style)
+    frame.Show()
+
+    items = timed('fill', fill, tree, options.items, options.fanout)
+    timed('expand all', tree.ExpandAll)
+    timed('layout', layout, tree)
+
+    rand = random.Random(42)
+    branches = [item for item in items[1:] if item.HasChildren()]
+    branches = rand.sample(branches, min(len(branches), options.repeat))
+    w, h = tree.GetClientSize()
+    points = [(rand.randint(0, w - 1), rand.randint(0, h - 1))
+              for i in range(options.repeat)]
+    targets = rand.sample(items, min(len(items), options.repeat))
+
+    timed('collapse/expand', toggle, tree, branches)
+    timed('hit-test', hittest, tree, points)
+    timed('scroll', scroll, tree, targets)
+    timed('paint', paint, tree, options.repeat)
+
+    frame.Destroy()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
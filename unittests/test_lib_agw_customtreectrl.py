@@ -111,7 +111,48 @@ class lib_agw_customtreectrl_Tests(wtc.WidgetTestCase):
             self.assertEqual(len(tree.GetChildren()), 3)
         else:
             self.assertEqual(len(tree.GetChildren()), 0)
-        
+
+    def test_lib_agw_customtreectrlLayout(self):
+        tree = CT.CustomTreeCtrl(self.frame, size=(200, 200))
+        root = tree.AddRoot('root item')
+        children = [tree.AppendItem(root, 'c%d' % i) for i in range(100)]
+        tree.AppendItem(children[0], 'grandchild')
+        tree.ExpandAll()
+        tree.CalculatePositions()
+        h = tree.GetLineHeight(root)
+
+        # root, c0, grandchild, c1
+        tree.CalculateItemPosition(children[1])
+        self.assertEqual(children[1].GetY(), 2 + 3*h)
+
+        tree.Collapse(children[0])
+        tree.CalculateItemPosition(children[1])
+        self.assertEqual(children[1].GetY(), 2 + 2*h)
+
+        x, y = tree.CalcScrolledPosition(children[1].GetX() + 1, children[1].GetY() + h//2)
+        item, flags = tree.HitTest((x, y))
+        self.assertTrue(item is children[1])
+        self.assertTrue(flags & CT.TREE_HITTEST_ONITEMLABEL)
+
+        tree.Delete(children[0])
+        tree.CalculateItemPosition(children[1])
+        self.assertEqual(children[1].GetY(), 2 + h)
+        self.assertEqual(tree.GetBoundingRect(children[99]).height, h)
+
+    def test_lib_agw_customtreectrlVariableLayout(self):
+        tree = CT.CustomTreeCtrl(self.frame, agwStyle=CT.TR_DEFAULT_STYLE|CT.TR_HAS_VARIABLE_ROW_HEIGHT)
+        root = tree.AddRoot('root item')
+        c1 = tree.AppendItem(root, 'two\nlines')
+        c2 = tree.AppendItem(root, 'c2')
+        tree.Expand(root)
+
+        tree.CalculateItemPosition(c2)
+        self.assertEqual(c2.GetY(), 2 + root.GetHeight() + c1.GetHeight())
+
+        tree.SetItemText(c1, 'one line')
+        tree.CalculateItemPosition(c2)
+        self.assertEqual(c2.GetY(), 2 + root.GetHeight() + c1.GetHeight())
+
     def test_lib_agw_customtreectrlConstantsExist(self):
         CT.TR_NO_BUTTONS          
         CT.TR_SINGLE               
@@ -0,0 +1,65 @@
+import imp_unittest, unittest
+import wtc
+import wx
+
+import wx.lib.agw.textcache as TC
+import wx.lib.agw.customtreectrl as CT
+
+#---------------------------------------------------------------------------
+
+class lib_agw_textcache_Tests(wtc.WidgetTestCase):
+
+    def test_lib_agw_textcacheExtent(self):
+        cache = TC.TextExtentCache(maxItems=2)
+        dc = wx.ClientDC(self.frame)
+        font = wx.Font(10, wx.FONTFAMILY_SWISS, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL)
+        dc.SetFont(font)
+
+        self.assertEqual(cache.GetTextExtent(dc, 'hello', font), tuple(dc.GetTextExtent('hello')))
+        self.assertEqual(cache.GetFullMultiLineTextExtent(dc, 'a\nb', font),
+                         tuple(dc.GetFullMultiLineTextExtent('a\nb')))
+        cache.GetTextExtent(dc, 'hello', font)
+        stats = cache.GetStats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['items'], 2)
+
+        # the least recently used extent is evicted
+        cache.GetTextExtent(dc, 'world', font)
+        self.assertEqual(len(cache), 2)
+        cache.GetFullMultiLineTextExtent(dc, 'a\nb', font)
+        self.assertEqual(cache.GetStats()['misses'], 4)
+
+        cache.Clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_lib_agw_textcacheFont(self):
+        cache = TC.TextExtentCache()
+        dc = wx.ClientDC(self.frame)
+        font = wx.Font(10, wx.FONTFAMILY_SWISS, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL)
+        w1, h1 = cache.GetTextExtent(dc, 'some text', font)
+
+        font.SetPointSize(30)
+        cache.ForgetFont(font)
+        w2, h2 = cache.GetTextExtent(dc, 'some text', font)
+        self.assertTrue(h2 > h1)
+
+        # an invalid font isn't cached
+        cache.GetTextExtent(dc, 'some text', wx.NullFont)
+        self.assertEqual(cache.GetStats()['misses'], 2)
+
+    def test_lib_agw_textcacheShared(self):
+        cache = TC.GetTextExtentCache()
+        cache.ResetStats()
+        tree = CT.CustomTreeCtrl(self.frame)
+        root = tree.AddRoot('root item')
+        for i in range(10):
+            tree.AppendItem(root, 'child')
+        tree.ExpandAll()
+        tree.CalculatePositions()
+        self.assertTrue(cache.GetStats()['hits'] > 0)
+
+#---------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
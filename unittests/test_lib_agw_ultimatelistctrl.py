@@ -0,0 +1,99 @@
+import imp_unittest, unittest
+import wtc
+import wx
+
+import wx.lib.agw.ultimatelistctrl as ULC
+
+#---------------------------------------------------------------------------
+
+class _BlockList(ULC.UltimateListCtrl):
+
+    def __init__(self, parent):
+        ULC.UltimateListCtrl.__init__(self, parent, size=(200, 200),
+                                      agwStyle=wx.LC_REPORT|wx.LC_VIRTUAL)
+        self.InsertColumn(0, 'First')
+        self.InsertColumn(1, 'Second')
+        self.blocks = []
+        self.SetItemCount(10000)
+
+    def OnGetItemsBlock(self, start, count):
+        self.blocks.append((start, count))
+        rows = range(start, start + count)
+        return {'text': [['a%d' % row for row in rows], ['b%d' % row for row in rows]]}
+
+
+class lib_agw_ultimatelistctrl_Tests(wtc.WidgetTestCase):
+
+    def test_lib_agw_ultimatelistctrlCtor(self):
+        ulc = ULC.UltimateListCtrl(self.frame, agwStyle=wx.LC_REPORT)
+        ulc.InsertColumn(0, 'First')
+        ulc.InsertStringItem(0, 'item')
+        self.assertEqual(ulc.GetItemCount(), 1)
+        self.assertEqual(ulc.GetItemText(0), 'item')
+
+    def test_lib_agw_ultimatelistctrlSortKeys(self):
+        ulc = ULC.UltimateListCtrl(self.frame, agwStyle=wx.LC_REPORT)
+        ulc.InsertColumn(0, 'Name')
+        ulc.InsertColumn(1, 'Size')
+        rows = [('b', 1), ('a', 2), ('b', 3), ('a', 1)]
+        for i, (name, size) in enumerate(rows):
+            ulc.InsertStringItem(i, name)
+            ulc.SetStringItem(i, 1, str(size))
+            ulc.SetItemData(i, size)
+        ulc.Select(2)
+        ulc.Focus(2)
+
+        ulc.SortItems(keys=[([name for name, size in rows], False), (lambda size: size, True)])
+        self.assertEqual([ulc.GetItem(i, 1).GetText() for i in range(4)], ['2', '1', '3', '1'])
+        self.assertEqual(ulc.GetFirstSelected(), 2)
+        self.assertEqual(ulc.GetFocusedItem(), 2)
+
+        ulc.SortItems(key=[ulc.GetItemData(i) for i in range(4)])
+        self.assertEqual([ulc.GetItemData(i) for i in range(4)], [1, 1, 2, 3])
+        self.assertEqual(ulc.GetItemText(0), 'a')
+        self.assertEqual(ulc.GetFirstSelected(), 3)
+
+    def test_lib_agw_ultimatelistctrlSelectionStore(self):
+        store = ULC.SelectionStore()
+        store.SetItemCount(1000000)
+        self.assertEqual(store.SelectRange(0, 999999), [])
+        self.assertEqual(store.SelectRange(10, 12, False), [10, 11, 12])
+        self.assertEqual(store.GetSelectedCount(), 999997)
+        self.assertTrue(store.IsSelected(9))
+        self.assertFalse(store.IsSelected(11))
+        self.assertFalse(store.SelectItem(11, False))
+        self.assertTrue(store.SelectItem(11))
+
+        store.OnItemDelete(11)
+        self.assertEqual(store.GetSelectedRanges(), [(0, 9), (12, 999998)])
+        store.OnItemsInserted(5, 2)
+        self.assertEqual(store.GetSelectedRanges(), [(0, 4), (7, 11), (14, 1000000)])
+        self.assertFalse(store.IsSelected(5))
+        store.OnItemsDeleted(5, 6)
+        store.SetItemCount(100)
+        self.assertEqual(store.GetSelectedRanges(), [(0, 9), (12, 99)])
+        self.assertEqual(store.GetSelectedCount(), 98)
+
+    def test_lib_agw_ultimatelistctrlVirtualBlocks(self):
+        ulc = _BlockList(self.frame)
+        self.assertEqual(ulc.GetItem(5000, 1).GetText(), 'b5000')
+        start, count = ulc.blocks[-1]
+        self.assertEqual(start, 5000)
+        blocks = len(ulc.blocks)
+
+        # the rest of the block is served from the cache
+        self.assertEqual(ulc.GetItemText(start + count - 1), 'a%d' % (start + count - 1))
+        self.assertEqual(len(ulc.blocks), blocks)
+        self.assertTrue(ulc.GetVirtualCacheStats()['hits'] > 0)
+
+        ulc.RefreshItem(6)
+        ulc.GetItemText(6)
+        self.assertEqual(ulc.blocks[-1][0], 6)
+
+        ulc.SetItemCount(100)
+        self.assertEqual(ulc.GetVirtualCacheStats()['rows'], 0)
+
+#---------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
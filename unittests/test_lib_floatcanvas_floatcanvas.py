@@ -147,6 +147,97 @@ class lib_floatcanvas_floatcanvas_Tests(wtc.WidgetTestCase):
         
         fccanvas.AddObject(obj)
 
+    def test_lib_floatcanvas_fc_circleset(self):
+        fccanvas = fc.FloatCanvas(self.frame)
+
+        obj = fc.CircleSet(((0, 0), (10, 0), (20, 0)), (2, 4, 6),
+                           FillColor=["Red", "Red", "Blue"])
+
+        fccanvas.AddObject(obj)
+        fccanvas.Draw(Force=True)
+        self.assertEqual(list(obj.FindHits((10.5, 0))), [1])
+        self.assertEqual(list(obj.FindHits((5, 0), 4)), [1, 0])
+        self.assertEqual(obj.BoundingBox[0, 0], -1)
+        self.assertEqual(obj.BoundingBox[1, 0], 23)
+
+    def test_lib_floatcanvas_fc_rectangleset(self):
+        fccanvas = fc.FloatCanvas(self.frame)
+
+        obj = fc.RectangleSet(((0, 0), (10, 0)), (5, 5), LineWidth=[1, 2])
+
+        fccanvas.AddObject(obj)
+        fccanvas.Draw(Force=True)
+        self.assertEqual(list(obj.FindHits((2, 2))), [0])
+        obj.Move((10, 0))
+        self.assertEqual(list(obj.FindHits((2, 2))), [])
+        self.assertEqual(list(obj.FindHits((22, 2))), [1])
+
+    def test_lib_floatcanvas_fc_lineset(self):
+        fccanvas = fc.FloatCanvas(self.frame)
+
+        obj = fc.LineSet((((0, 0), (10, 0)), ((0, 0), (0, 10))))
+
+        fccanvas.AddObject(obj)
+        fccanvas.Draw(Force=True)
+        self.assertEqual(list(obj.FindHits((5, 0.5), 1)), [0])
+        self.assertEqual(list(obj.FindHits((0, 0))), [1, 0])
+
+    def test_lib_floatcanvas_fc_textset(self):
+        fccanvas = fc.FloatCanvas(self.frame)
+
+        obj = fc.TextSet(["one", "two"], ((0, 0), (10, 10)),
+                         Color=["Black", "Red"])
+
+        fccanvas.AddObject(obj)
+        fccanvas.Draw(Force=True)
+
+    def test_lib_floatcanvas_spatialindex(self):
+        fccanvas = fc.FloatCanvas(self.frame)
+        fccanvas.SpatialIndexThreshold = 2
+
+        r1 = fccanvas.AddObject(fc.Rectangle((0, 0), (2, 2)))
+        r2 = fccanvas.AddObject(fc.Rectangle((10, 10), (2, 2)))
+        r3 = fccanvas.AddObject(fc.Point((1, 1)))
+        self.assertEqual(fccanvas.ObjectsInBB(((0, 0), (5, 5))), [r1, r3])
+        self.assertTrue(fccanvas._DrawIndex is not None)
+
+        r2.Move((-10, -10))
+        self.assertEqual(fccanvas.ObjectsInBB(((0, 0), (5, 5))), [r1, r2, r3])
+        self.assertEqual(fccanvas.ObjectsAtPoint((11, 11), CoordType='World'), [])
+
+        r1.PutInForeground()
+        self.assertEqual(fccanvas.ObjectsInBB(((0, 0), (5, 5))), [r2, r3, r1])
+        self.assertEqual(fccanvas.ObjectsAtPoint((1, 1), CoordType='World'),
+                         [r1, r3, r2])
+
+        fccanvas.RemoveObject(r3)
+        self.assertEqual(fccanvas.ObjectsInBB(((0, 0), (5, 5))), [r2, r1])
+
+    def test_lib_floatcanvas_tilecache(self):
+        fccanvas = fc.FloatCanvas(self.frame, size=(200, 200))
+        fccanvas.EnableTileCache(TileSize=64, Prefetch=0)
+
+        fccanvas.AddObject(fc.Rectangle((0, 0), (20, 20), FillColor="Red"))
+        text = fccanvas.AddObject(fc.Text("some text", (2, 2)))
+        fccanvas.ZoomToBB()
+        stats = fccanvas.GetTileCacheStats()
+        self.assertTrue(stats['items'] > 0)
+        self.assertEqual(stats['hits'], 0)
+        # the text is looked for far enough from the tiles to be drawn whole
+        self.assertEqual(fccanvas._TileExtent, max(text.TextWidth, text.TextHeight))
+
+        fccanvas.MoveImage((10, 0), 'Pixel')
+        stats = fccanvas.GetTileCacheStats()
+        self.assertTrue(stats['hits'] > 0)
+
+        fccanvas.AddObject(fc.Circle((10, 10), 5))
+        self.assertEqual(fccanvas.GetTileCacheStats()['items'], 0)
+        self.assertEqual(fccanvas._TileExtent, None)
+
+        fccanvas.DisableTileCache()
+        self.assertEqual(fccanvas.GetTileCacheStats(), None)
+        fccanvas.Draw()
+
     def test_lib_floatcanvas_floatcanvasEvents(self):
 
         fc.EVT_ENTER_WINDOW
@@ -0,0 +1,124 @@
+import imp_unittest, unittest
+import wtc
+import wx
+
+try:
+    import numpy as np
+    import wx.lib.plot as plot
+    haveNumpy = True
+except ImportError:
+    haveNumpy = False  # wx.lib.plot needs NumPy
+
+#---------------------------------------------------------------------------
+
+class lib_plot_Tests(wtc.WidgetTestCase):
+
+    def makeLine(self, n=100000):
+        x = np.linspace(0.0, 1.0, n)
+        return plot.PolyLine(np.column_stack((x, np.sin(50 * x))))
+
+    @unittest.skipIf(not haveNumpy, "NumPy required")
+    def test_lib_plot_pointsCached(self):
+        line = plot.PolyLine([(1, 1), (10, 100), (100, 10)])
+        self.assertTrue(line.points is line.points)
+        self.assertFalse(line.points.flags.writeable)
+        line.setLogScale((True, True))
+        self.assertEqual(list(line.points[1]), [1.0, 2.0])
+        line.setLogScale((False, False))
+        self.assertEqual(list(line.points[1]), [10.0, 100.0])
+
+    @unittest.skipIf(not haveNumpy, "NumPy required")
+    def test_lib_plot_decimateLine(self):
+        line = self.makeLine()
+        line.scaleAndShift(np.array((1000.0, -100.0)), np.array((0.0, 200.0)))
+        coords = line.getDrawPoints()
+        self.assertTrue(len(coords) <= 4 * 1001)
+        self.assertEqual(coords[:,1].min(), line.scaled[:,1].min())
+        self.assertEqual(coords[:,1].max(), line.scaled[:,1].max())
+        self.assertEqual(list(coords[0]), list(line.scaled[0]))
+        self.assertEqual(list(coords[-1]), list(line.scaled[-1]))
+        self.assertTrue(line.getDrawPoints() is coords)
+
+    @unittest.skipIf(not haveNumpy, "NumPy required")
+    def test_lib_plot_decimateVisibleRange(self):
+        x = np.arange(1001.0)
+        line = plot.PolyLine(np.column_stack((x, np.sin(x))))
+        line.scaleAndShift(np.array((1.0, -100.0)), np.array((0.0, 200.0)))
+        line._xRange = (500.0, 600.0)
+        coords = line.getDrawPoints()
+        self.assertEqual(len(coords), 103)
+        self.assertEqual(coords[0][0], 499.0)
+        self.assertEqual(coords[-1][0], 601.0)
+
+    @unittest.skipIf(not haveNumpy, "NumPy required")
+    def test_lib_plot_decimateMarkers(self):
+        marker = plot.PolyMarker([(0, 0), (0.1, 0.1), (5, 5), (0, 0)])
+        marker.scaleAndShift(np.array((1.0, 1.0)), np.array((0.0, 0.0)))
+        self.assertEqual(len(marker.getDrawPoints()), 3)
+
+    @unittest.skipIf(not haveNumpy, "NumPy required")
+    def test_lib_plot_appendPoints(self):
+        line = plot.PolyLine([(0, 0), (1, 1)])
+        self.assertEqual(line.getMaxPoints(), None)
+        line.appendPoints([(i, i) for i in range(2, 5000)])
+        self.assertEqual(len(line.points), 5000)
+        self.assertEqual(list(line.boundingBox()[1]), [4999.0, 4999.0])
+        self.assertTrue(line._isSortedX())
+
+    @unittest.skipIf(not haveNumpy, "NumPy required")
+    def test_lib_plot_appendPointsRing(self):
+        line = plot.PolyLine([(0, 0), (1, 1)])
+        line.setMaxPoints(3)
+        self.assertEqual(line.getMaxPoints(), 3)
+        line.appendPoints([(2, 2), (3, 3)])
+        self.assertEqual(line.points.tolist(), [[1, 1], [2, 2], [3, 3]])
+        self.assertEqual(list(line.boundingBox()[0]), [1.0, 1.0])
+        line.appendPoints([(i, -i) for i in range(4, 9)])
+        self.assertEqual(line.points.tolist(), [[6, -6], [7, -7], [8, -8]])
+        self.assertEqual(list(line.boundingBox()[0]), [6.0, -8.0])
+        line.scaleAndShift(np.array((1.0, 1.0)), np.array((0.0, 0.0)))
+        self.assertEqual(len(line.getAppendedPoints()), 3)
+
+    @unittest.skipIf(not haveNumpy, "NumPy required")
+    def test_lib_plot_drawAppended(self):
+        pc = plot.PlotCanvas(self.frame)
+        line = plot.PolyLine([(0, 0), (1, 1)])
+        line.setMaxPoints(100)
+        pc.Draw(plot.PlotGraphics([line]), xAxis=(0, 10), yAxis=(-1, 2))
+        line.appendPoints([(2, 0), (3, 1)])
+        pc.DrawAppended(xAxis=(0, 10), yAxis=(-1, 2))
+        self.assertEqual(line._appended, 0)
+        line.appendPoints([(4, 0), (5, 1)])
+        pc.DrawAppended(xAxis=(0.5, 10.5), yAxis=(-1, 2))
+        self.assertEqual(line._appended, 0)
+        self.assertEqual(tuple(pc.GetXCurrentRange()), (0.5, 10.5))
+        pc.DrawAppended()
+
+    @unittest.skipIf(not haveNumpy, "NumPy required")
+    def test_lib_plot_closestPoint(self):
+        rand = np.random.RandomState(42)
+        for points in [rand.uniform(-10, 10, (5000, 2)),
+                       np.column_stack((np.arange(5000.0), rand.normal(size=5000)))]:
+            line = plot.PolyLine(points)
+            scale, shift = np.array((3.0, -0.5)), np.array((10.0, 400.0))
+            line.scaleAndShift(scale, shift)
+            for pnt in rand.uniform(-20, 5020, (20, 2)):
+                d = np.sqrt((((points - pnt) * scale)**2).sum(1))
+                index, pointXY, scaledXY, dist = line.getClosestPoint(pnt)
+                self.assertAlmostEqual(dist, d.min())
+                self.assertEqual(list(pointXY), list(points[index]))
+                d = np.sqrt(((points - pnt)**2).sum(1))
+                index, pointXY, scaledXY, dist = line.getClosestPoint(pnt, False)
+                self.assertAlmostEqual(dist, d.min())
+
+    @unittest.skipIf(not haveNumpy, "NumPy required")
+    def test_lib_plot_draw(self):
+        pc = plot.PlotCanvas(self.frame)
+        pc.Draw(plot.PlotGraphics([self.makeLine(),
+                                   plot.PolyMarker([(0.5, 0.5)])]))
+        pc.Zoom((0.5, 0), (0.1, 1))
+
+#---------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
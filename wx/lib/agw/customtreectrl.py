@@ -314,6 +314,8 @@ from wx.lib.expando import ExpandoTextCtrl
 # Python 2/3 compatibility helper
 import wx.lib.six as six
 
+from wx.lib.agw.textcache import GetTextExtentCache
+
 # ----------------------------------------------------------------------------
 # Constants
 # ----------------------------------------------------------------------------
@@ -1324,6 +1326,7 @@ class TreeTextCtrl(ExpandoTextCtrl):
             w = w - self._itemEdited.GetWindowSize()[0]
             h = 0
 
+        self._owner.CalculateItemPosition(item)
         x, y = self._owner.CalcScrolledPosition(item.GetX(), item.GetY())
 
         image_h = 0
@@ -1542,6 +1545,123 @@ class TreeFindTimer(wx.Timer):
         self._owner._findPrefix = ""
 
 
+# -----------------------------------------------------------------------------
+# _RowIndex Implementation.
+# An order statistic tree over the children of an item, used to find the rows
+# of CustomTreeCtrl without walking the tree.
+# -----------------------------------------------------------------------------
+
+class _RowIndex(object):
+    """
+    A segment tree over the children of a :class:`GenericTreeItem`. For every
+    child it holds the span of its visible subtree (in rows or pixels) and the
+    right edge of that subtree, and it keeps their prefix sums and maximum.
+
+    Updating a child, finding the offset of a child and finding the child at an
+    offset all take O(log n) for n children.
+    """
+
+    def __init__(self, spans, rights):
+        """
+        Default class constructor.
+        For internal use: do not call it in your code!
+
+        :param `spans`: a list with the span of each child subtree;
+        :param `rights`: a list with the right edge of each child subtree.
+        """
+
+        count = len(spans)
+        size = 1
+        while size < count:
+            size *= 2
+
+        sums = [0]*size + spans + [0]*(size - count)
+        maxs = [0]*size + rights + [0]*(size - count)
+
+        for i in range(size-1, 0, -1):
+            sums[i] = sums[2*i] + sums[2*i+1]
+            maxs[i] = max(maxs[2*i], maxs[2*i+1])
+
+        self._size = size
+        self._sums = sums
+        self._maxs = maxs
+
+
+    def Update(self, pos, span, right):
+        """
+        Changes the span and right edge of a child subtree.
+
+        :param integer `pos`: the child position;
+        :param integer `span`: the new span of the child subtree;
+        :param integer `right`: the new right edge of the child subtree.
+        """
+
+        sums, maxs = self._sums, self._maxs
+        i = pos + self._size
+        sums[i] = span
+        maxs[i] = right
+        i >>= 1
+
+        while i:
+            sums[i] = sums[2*i] + sums[2*i+1]
+            maxs[i] = max(maxs[2*i], maxs[2*i+1])
+            i >>= 1
+
+
+    def GetTotal(self):
+        """ Returns the span of all the child subtrees. """
+
+        return self._sums[1]
+
+
+    def GetRight(self):
+        """ Returns the right edge of all the child subtrees. """
+
+        return self._maxs[1]
+
+
+    def GetOffset(self, pos):
+        """
+        Returns the span of the child subtrees before a child.
+
+        :param integer `pos`: the child position.
+        """
+
+        sums = self._sums
+        i = pos + self._size
+        offset = 0
+
+        while i > 1:
+            if i & 1:
+                offset += sums[i-1]
+            i >>= 1
+
+        return offset
+
+
+    def Find(self, offset):
+        """
+        Returns the child subtree which covers an offset.
+
+        :param integer `offset`: an offset, not less than 0 and less than the
+         value returned by :meth:`~_RowIndex.GetTotal`.
+
+        :return: A tuple with the child position and the offset inside its subtree.
+        """
+
+        sums = self._sums
+        size = self._size
+        i = 1
+
+        while i < size:
+            i *= 2
+            if offset >= sums[i]:
+                offset -= sums[i]
+                i += 1
+
+        return i - size, offset
+
+
 # -----------------------------------------------------------------------------
 # GenericTreeItem Implementation.
 # This Class Holds All The Information And Methods For Every Single Item In
@@ -1635,6 +1755,15 @@ class GenericTreeItem(object):
         self._width = 0         # width of this item
         self._height = 0        # height of this item
 
+        # row layout, kept by CustomTreeCtrl.CalculatePositions
+        self._layoutDirty = True    # must be measured and laid out again
+        self._layoutGen = -1        # layout generation it was laid out for
+        self._span = 0              # rows (or pixels) of the visible subtree
+        self._right = 0             # right edge of the visible subtree
+        self._rowIndex = None       # _RowIndex over the children, or None
+        self._rowPos = 0            # position in the parent's _RowIndex
+        self._dirtyChildren = None  # children to lay out again, or None
+
         self._isCollapsed = True
         self._hasHilight = False    # same as focused
         self._hasPlus = False       # used for item which doesn't have
@@ -2697,6 +2826,9 @@ class CustomTreeCtrl(wx.ScrolledWindow):
 
         # Default line height: it will soon be changed
         self._lineHeight = 10
+        # Bumped when all the items must be measured again
+        self._layoutGeneration = 0
+        self._textExtentCache = GetTextExtentCache()
         # Item indent wrt parent
         self._indent = 15
         # item horizontal spacing between the start and the text
@@ -3053,6 +3185,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
             # We have to refresh the item line
             dc = wx.ClientDC(self)
             self.CalculateSize(item, dc)
+            self._InvalidateItem(item)
             self.RefreshLine(item)
 
 
@@ -3185,6 +3318,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         if torefresh:
             dc = wx.ClientDC(self)
             self.CalculateSize(item, dc)
+            self._InvalidateItem(item)
             self.RefreshLine(item)
 
 
@@ -3424,6 +3558,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         """
 
         self._indent = indent
+        self.InvalidateLayout()
         self._dirty = True
 
 
@@ -3435,6 +3570,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         """
 
         self._spacing = spacing
+        self.InvalidateLayout()
         self._dirty = True
 
 
@@ -3499,6 +3635,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
                 self.SelectItem(select, False)
 
         self._agwStyle = agwStyle
+        self.InvalidateLayout()
         self._dirty = True
 
 
@@ -3547,6 +3684,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         """
 
         w, h = self.GetClientSize()
+        self.CalculateItemPosition(item)
         xa, ya = self.CalcScrolledPosition((0, item.GetY()))
 
         wcheck = image_w = 0
@@ -3687,6 +3825,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         dc = wx.ClientDC(self)
         item.SetText(text)
         self.CalculateSize(item, dc)
+        self._InvalidateItem(item)
         self.RefreshLine(item)
 
 
@@ -3706,6 +3845,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
 
         dc = wx.ClientDC(self)
         self.CalculateSize(item, dc)
+        self._InvalidateItem(item)
         self.RefreshLine(item)
 
 
@@ -3723,6 +3863,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
 
         dc = wx.ClientDC(self)
         self.CalculateSize(item, dc)
+        self._InvalidateItem(item)
         self.RefreshLine(item)
 
 
@@ -3763,6 +3904,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         # avoid redrawing the tree if no real change
         if item.IsBold() != bold:
             item.SetBold(bold)
+            self._InvalidateItem(item)
             self._dirty = True
 
 
@@ -3776,6 +3918,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
 
         if item.IsItalic() != italic:
             item.SetItalic(italic)
+            self._InvalidateItem(item)
             self._dirty = True
 
 
@@ -3841,7 +3984,9 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         :param `font`: a valid :class:`Font` instance.
         """
 
+        self._textExtentCache.ForgetFont(font)
         item.Attr().SetFont(font)
+        self._InvalidateItem(item)
         self._dirty = True
 
 
@@ -3856,6 +4001,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
 
         wx.ScrolledWindow.SetFont(self, font)
 
+        self._textExtentCache.ForgetFont(font)
         self._normalFont = font
         family = self._normalFont.GetFamily()
 
@@ -3870,6 +4016,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
                                    wx.FONTSTYLE_ITALIC, wx.FONTWEIGHT_NORMAL, self._normalFont.GetUnderlined(),
                                    self._normalFont.GetFaceName(), self._normalFont.GetEncoding())
 
+        self.InvalidateLayout()
         self.CalculatePositions()
         self.Refresh()
         self.AdjustMyScrollbars()
@@ -4293,6 +4440,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
             self.DeleteItemWindow(item)
 
         item.SetWindow(wnd)
+        self._InvalidateItem(item)
         self.CalculatePositions()
         self.Refresh()
         self.AdjustMyScrollbars()
@@ -4309,6 +4457,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
             return
 
         item.DeleteWindow()
+        self._InvalidateItem(item)
         if item in self._itemWithWindow:
             self._itemWithWindow.remove(item)
 
@@ -4380,6 +4529,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         """
 
         item.SetType(ct_type)
+        self._InvalidateItem(item)
         self.CalculatePositions()
         self.Refresh()
 
@@ -4915,6 +5065,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
             self._itemWithWindow.append(item)
 
         parent.Insert(item, previous)
+        self._InvalidateChildren(parent)
 
         return item
 
@@ -5260,6 +5411,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
 
         self.ChildrenClosing(item)
         item.DeleteChildren(self)
+        self._InvalidateChildren(item)
 
 
     def Delete(self, item):
@@ -5308,6 +5460,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         if parent:
 
             parent.GetChildren().remove(item)  # remove by value
+            self._InvalidateChildren(parent)
 
         else: # deleting the root
 
@@ -5369,6 +5522,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
                 return
 
         item.Expand()
+        self._InvalidateItem(item)
 
         if not self._sendEvent:
             # We are in ExpandAll/ExpandAllChildren
@@ -5455,6 +5609,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
 
         self.ChildrenClosing(item)
         item.Collapse()
+        self._InvalidateItem(item)
 
         self.CalculatePositions()
         self.Refresh()
@@ -5651,6 +5806,8 @@ class CustomTreeCtrl(wx.ScrolledWindow):
 
         # item2 is not necessary after item1
         # choice first' and 'last' between item1 and item2
+        self.CalculateItemPosition(item1)
+        self.CalculateItemPosition(item2)
         first = (item1.GetY() < item2.GetY() and [item1] or [item2])[0]
         last = (item1.GetY() < item2.GetY() and [item2] or [item1])[0]
 
@@ -5870,6 +6027,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
             wx.SafeYield()
 
         # now scroll to the item
+        self.CalculateItemPosition(item)
         item_y = item.GetY()
         start_x, start_y = self.GetViewStart()
         start_y *= _PIXELS_PER_UNIT
@@ -5881,7 +6039,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         if item_y < start_y+3:
 
             # going down
-            x, y = self._anchor.GetSize(x, y, self)
+            x, y = self._GetLayoutSize()
             y += _PIXELS_PER_UNIT + 2 # one more scrollbar unit + 2 pixels
             x += _PIXELS_PER_UNIT + 2 # one more scrollbar unit + 2 pixels
             x_pos = self.GetScrollPos(wx.HORIZONTAL)
@@ -5891,7 +6049,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         elif item_y+self.GetLineHeight(item) > start_y+client_h:
 
             # going up
-            x, y = self._anchor.GetSize(x, y, self)
+            x, y = self._GetLayoutSize()
             y += _PIXELS_PER_UNIT + 2 # one more scrollbar unit + 2 pixels
             x += _PIXELS_PER_UNIT + 2 # one more scrollbar unit + 2 pixels
             item_y += _PIXELS_PER_UNIT+2
@@ -5937,6 +6095,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
             self._dirty = True
             children = six.sort(children, self.OnCompareItems)
             item._children = children
+            self._InvalidateChildren(item)
 
 
     def GetImageList(self):
@@ -6060,6 +6219,8 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         else:
             self._lineHeight += self._lineHeight//10   # otherwise 10% extra spacing
 
+        self.InvalidateLayout()
+
 
     def SetImageList(self, imageList):
         """
@@ -6285,7 +6446,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
 
         if self._anchor:
 
-            x, y = self._anchor.GetSize(0, 0, self)
+            x, y = self._GetLayoutSize()
             y += _PIXELS_PER_UNIT + 2 # one more scrollbar unit + 2 pixels
             x += _PIXELS_PER_UNIT + 2 # one more scrollbar unit + 2 pixels
             x_pos = self.GetScrollPos(wx.HORIZONTAL)
@@ -6801,17 +6962,24 @@ class CustomTreeCtrl(wx.ScrolledWindow):
             count = len(children)
 
             if count > 0:
-                n = 0
-                while n < count:
-                    oldY = y
+                # only paint the children which are in the visible part
+                # of the window, the row index knows where the others are
+                n, y = self._FirstVisibleChild(item, dc, origY)
+                bottom = dc.DeviceToLogicalY(self.GetClientSize()[1])
+
+                while n < count and y < bottom:
                     y = self.PaintLevel(children[n], dc, 1, y, align)
                     n = n + 1
 
+                unit = self._GetRowUnit()
+                oldY = origY + item._rowIndex.GetOffset(count-1)*unit
+                y = origY + item._rowIndex.GetTotal()*unit
+
                 if not self.HasAGWFlag(TR_NO_LINES) and self.HasAGWFlag(TR_LINES_AT_ROOT) and count > 0:
 
                     # draw line down to last child
                     origY += self.GetLineHeight(children[0])>>1
-                    oldY += self.GetLineHeight(children[n-1])>>1
+                    oldY += self.GetLineHeight(children[count-1])>>1
                     oldPen = dc.GetPen()
                     dc.SetPen(self._dottedPen)
                     dc.DrawLine(3, origY, 3, oldY)
@@ -6960,18 +7128,26 @@ class CustomTreeCtrl(wx.ScrolledWindow):
 
             if count > 0:
 
-                n = 0
                 level = level + 1
 
-                while n < count:
-                    oldY = y
+                # only paint the children which are in the visible part
+                # of the window, the row index knows where the others are
+                childY = y
+                n, y = self._FirstVisibleChild(item, dc, childY)
+                bottom = dc.DeviceToLogicalY(self.GetClientSize()[1])
+
+                while n < count and y < bottom:
                     y = self.PaintLevel(children[n], dc, level, y, align)
                     n = n + 1
 
+                unit = self._GetRowUnit()
+                oldY = childY + item._rowIndex.GetOffset(count-1)*unit
+                y = childY + item._rowIndex.GetTotal()*unit
+
                 if not self.HasAGWFlag(TR_NO_LINES) and count > 0:
 
                     # draw line down to last child
-                    oldY += self.GetLineHeight(children[n-1])>>1
+                    oldY += self.GetLineHeight(children[count-1])>>1
                     if self.HasButtons():
                         y_mid += 5
 
@@ -7012,6 +7188,8 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         if not self._anchor:
             return
 
+        self.CalculatePositions()
+
         dc.SetFont(self._normalFont)
         dc.SetPen(self._dottedPen)
 
@@ -7474,7 +7652,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
             return None, flags
 
         point = self.CalcUnscrolledPosition(*point)
-        hit, flags = self._anchor.HitTest(point, self, flags, 0)
+        hit, flags = self._HitTestRow(point, flags)
 
         if hit == None:
             flags = TREE_HITTEST_NOWHERE
@@ -7502,6 +7680,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         """
 
         i = item
+        self.CalculateItemPosition(i)
 
         startX, startY = self.GetViewStart()
         rect = wx.Rect()
@@ -7618,7 +7797,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
 
         # Is the mouse over a tree item button?
         flags = 0
-        thisItem, flags = self._anchor.HitTest(pt, self, flags, 0)
+        thisItem, flags = self._HitTestRow(pt, flags)
         underMouse = thisItem
         underMouseChanged = underMouse != self._underMouse
 
@@ -7689,7 +7868,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
             return
 
         flags = 0
-        item, flags = self._anchor.HitTest(pt, self, flags, 0)
+        item, flags = self._HitTestRow(pt, flags)
 
         if event.Dragging() and not self._isDragging and ((flags & TREE_HITTEST_ONITEMICON) or (flags & TREE_HITTEST_ONITEMLABEL)):
 
@@ -8041,21 +8220,17 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         attr = item.GetAttributes()
 
         if attr and attr.HasFont():
-            dc.SetFont(attr.GetFont())
+            font = attr.GetFont()
+        elif item.IsBold():
+            font = self._boldFont
+        elif item.IsItalic():
+            font = self._italicFont
         else:
-            if item.IsBold():
-                dc.SetFont(self._boldFont)
-            elif item.IsItalic():
-                dc.SetFont(self._italicFont)
-            else:
-                dc.SetFont(self._normalFont)
+            font = self._normalFont
 
-        text_w, text_h, dummy = dc.GetFullMultiLineTextExtent(item.GetText())
+        text_w, text_h, dummy = self._textExtentCache.GetFullMultiLineTextExtent(dc, item.GetText(), font)
         text_h+=2
 
-        # restore normal font
-        dc.SetFont(self._normalFont)
-
         image_w, image_h = 0, 0
         image = item.GetCurrentImage()
 
@@ -8168,25 +8343,326 @@ class CustomTreeCtrl(wx.ScrolledWindow):
 
 
     def CalculatePositions(self):
-        """ Calculates all the positions of the visible items. """
+        """
+        Calculates all the positions of the visible items.
+
+        The items are measured and laid out again only if they changed since the
+        last call: every expanded item keeps the rows of its children in a
+        :class:`_RowIndex`, so this takes O(log n) per changed item and finding
+        the position of an item, or the item at a position, is O(log n) too.
+        """
 
         if not self._anchor:
             return
 
-        self.absoluteWindows = {}
+        root = self._anchor
+        if not root._layoutDirty and root._layoutGen == self._layoutGeneration:
+            return
 
         dc = wx.ClientDC(self)
-        self.PrepareDC(dc)
-
         dc.SetFont(self._normalFont)
-        dc.SetPen(self._dottedPen)
-        y = 2
-        y = self.CalculateLevel(self._anchor, dc, 0, y) # start recursion
+        self._LayoutItem(root, dc, 0)
+
+        # the windows are aligned per level with the widest one
+        self.absoluteWindows = {}
+
+        for item in self._itemWithWindow:
+            level = 0
+            parent = item.GetParent()
+            while parent and parent.IsExpanded():
+                level += 1
+                parent = parent.GetParent()
+
+            if parent or (level == 0 and self.HasAGWFlag(TR_HIDE_ROOT)):
+                continue
+
+            width = item.GetWidth() - item.GetWindowSize()[0]
+            self.absoluteWindows[level] = max(self.absoluteWindows.get(level, 0), width)
+
+
+    def _LayoutItem(self, item, dc, level):
+        """
+        Measures an item if it changed and brings the row index of its visible
+        subtree up to date.
+
+        :param `item`: an instance of :class:`GenericTreeItem`;
+        :param `dc`: an instance of :class:`DC`;
+        :param integer `level`: the item level in the tree hierarchy.
+        """
+
+        if item._layoutGen != self._layoutGeneration:
+            item._layoutGen = self._layoutGeneration
+            item._rowIndex = item._dirtyChildren = None
+
+        item._layoutDirty = False
+
+        if level == 0 and self.HasAGWFlag(TR_HIDE_ROOT):
+            # a hidden root is not evaluated, but its
+            # children are always laid out
+            span = right = 0
+            expanded = True
+        else:
+            self.CalculateSize(item, dc)
+            span = self._GetRowSpan(item)
+            right = self._GetItemX(level) + item.GetWidth()
+            expanded = item.IsExpanded()
+
+        children = item.GetChildren()
+
+        if expanded and children:
+            index = item._rowIndex
+
+            if index is None:
+                spans, rights = [], []
+                for pos, child in enumerate(children):
+                    child._rowPos = pos
+                    if child._layoutDirty or child._layoutGen != self._layoutGeneration:
+                        self._LayoutItem(child, dc, level+1)
+                    spans.append(child._span)
+                    rights.append(child._right)
+
+                index = item._rowIndex = _RowIndex(spans, rights)
+
+            elif item._dirtyChildren:
+                for child in item._dirtyChildren:
+                    if child._layoutDirty and child.GetParent() is item:
+                        self._LayoutItem(child, dc, level+1)
+                        index.Update(child._rowPos, child._span, child._right)
+
+            item._dirtyChildren = None
+            span += index.GetTotal()
+            right = max(right, index.GetRight())
+
+        item._span = span
+        item._right = right
+
+
+    def InvalidateLayout(self):
+        """
+        Makes the next call to :meth:`~CustomTreeCtrl.CalculatePositions` measure
+        all the items again.
+
+        :note: This is done by :class:`CustomTreeCtrl` whenever its fonts, image
+         lists, indent, spacing or style change, and the items are measured again
+         when they change through the :class:`CustomTreeCtrl` methods. Call this
+         method if you change the items in any other way.
+        """
+
+        self._layoutGeneration += 1
+
+
+    def _InvalidateItem(self, item):
+        """
+        Makes the next call to :meth:`~CustomTreeCtrl.CalculatePositions` measure
+        an item and lay out its subtree again.
+
+        :param `item`: an instance of :class:`GenericTreeItem`.
+        """
+
+        while item is not None and not item._layoutDirty:
+            item._layoutDirty = True
+            parent = item.GetParent()
+
+            if parent is not None and parent._rowIndex is not None:
+                if parent._dirtyChildren is None:
+                    parent._dirtyChildren = set()
+                parent._dirtyChildren.add(item)
+
+            item = parent
+
+
+    def _InvalidateChildren(self, item):
+        """
+        Makes the next call to :meth:`~CustomTreeCtrl.CalculatePositions` build
+        the row index of an item again, after its children were added, deleted
+        or sorted.
+
+        :param `item`: an instance of :class:`GenericTreeItem`.
+        """
+
+        item._rowIndex = item._dirtyChildren = None
+        self._InvalidateItem(item)
+
+
+    def _GetRowSpan(self, item):
+        """
+        Returns the span of the row of an item in the row index: its height with
+        the ``TR_HAS_VARIABLE_ROW_HEIGHT`` style, one row otherwise.
+
+        :param `item`: an instance of :class:`GenericTreeItem`.
+        """
+
+        if self.HasAGWFlag(TR_HAS_VARIABLE_ROW_HEIGHT):
+            return int(item.GetHeight())
+
+        return 1
+
+
+    def _GetRowUnit(self):
+        """ Returns the height, in pixels, of a unit of span in the row index. """
+
+        if self.HasAGWFlag(TR_HAS_VARIABLE_ROW_HEIGHT):
+            return 1
+
+        return int(self._lineHeight)
+
+
+    def _GetItemX(self, level):
+        """
+        Returns the `x` position of the items at a level of the tree hierarchy.
+
+        :param integer `level`: the item level in the tree hierarchy.
+        """
+
+        x = level*self._indent
+
+        if self._imageListLeft:
+            x += self._imageListLeft.GetBitmap(0).GetWidth()
+
+        if not self.HasAGWFlag(TR_HIDE_ROOT):
+            x += self._indent
+
+        return x + self._spacing
+
+
+    def _GetLayoutSize(self):
+        """
+        Returns the size of the visible items, as a tuple of (`width`, `height`)
+        in pixels.
+        """
+
+        self.CalculatePositions()
+        root = self._anchor
+
+        return root._right, 2 + root._span*self._GetRowUnit()
+
+
+    def CalculateItemPosition(self, item):
+        """
+        Calculates the position of an item from the row index, so that its
+        :meth:`~GenericTreeItem.GetX` and :meth:`~GenericTreeItem.GetY` values are
+        up to date. Items in a collapsed branch are left alone.
+
+        :param `item`: an instance of :class:`GenericTreeItem`.
+        """
+
+        self.CalculatePositions()
+
+        hideRoot = self.HasAGWFlag(TR_HIDE_ROOT)
+        offset = level = 0
+        child, parent = item, item.GetParent()
+
+        while parent:
+            if parent.GetParent() or not hideRoot:
+                if not parent.IsExpanded():
+                    return
+                offset += self._GetRowSpan(parent)
+
+            if parent._rowIndex is None:
+                return
+
+            offset += parent._rowIndex.GetOffset(child._rowPos)
+            level += 1
+            child, parent = parent, parent.GetParent()
+
+        item.SetX(self._GetItemX(level))
+        item.SetY(2 + offset*self._GetRowUnit())
+
+
+    def _FindRow(self, y):
+        """
+        Finds the visible item whose row covers a vertical position.
+
+        :param integer `y`: the vertical position inside the :class:`ScrolledWindow`.
+
+        :return: A tuple with the item (an instance of :class:`GenericTreeItem`), its
+         level in the tree hierarchy and the top of its row, or ``None`` if no row
+         covers `y`.
+        """
+
+        self.CalculatePositions()
+
+        item = self._anchor
+        if not item or y < 2:
+            return None
+
+        unit = self._GetRowUnit()
+        offset = (y - 2)//unit
+        if offset >= item._span:
+            return None
+
+        hideRoot = self.HasAGWFlag(TR_HIDE_ROOT)
+        level = top = 0
+
+        while 1:
+            if level == 0 and hideRoot:
+                span = 0
+            else:
+                span = self._GetRowSpan(item)
+
+            if offset < span:
+                return item, level, 2 + top*unit
+
+            offset -= span
+            top += span
+            pos, rest = item._rowIndex.Find(offset)
+            top += offset - rest
+            offset = rest
+            item = item.GetChildren()[pos]
+            level += 1
+
+
+    def _FirstVisibleChild(self, item, dc, y):
+        """
+        Finds the first child of an expanded item whose subtree ends below the
+        top of the visible part of the window.
+
+        :param `item`: an instance of :class:`GenericTreeItem`;
+        :param `dc`: an instance of :class:`DC`, prepared for painting;
+        :param integer `y`: the top of the first child row.
+
+        :return: A tuple with the child position and the top of its row.
+        """
+
+        index = item._rowIndex
+        unit = self._GetRowUnit()
+        offset = (dc.DeviceToLogicalY(0) - y)//unit
+
+        if offset <= 0:
+            return 0, y
+
+        if offset >= index.GetTotal():
+            return len(item.GetChildren()), y + index.GetTotal()*unit
+
+        pos, rest = index.Find(offset)
+        return pos, y + (offset - rest)*unit
+
+
+    def _HitTestRow(self, point, flags=0):
+        """
+        Finds the item under a point, looking only at the row which covers it.
+
+        :param `point`: an instance of :class:`Point`, in unscrolled coordinates;
+        :param integer `flags`: a bitlist of hit locations.
+
+        :see: :meth:`~CustomTreeCtrl.HitTest` method for the flags explanation.
+        """
+
+        row = self._FindRow(point[1])
+
+        if row is None:
+            return None, 0
+
+        item, level, y = row
+
+        # the items are only hit strictly inside their rows
+        if point[1] == y:
+            return None, 0
+
+        item.SetX(self._GetItemX(level))
+        item.SetY(y)
 
-        if self.HasAGWFlag(TR_ALIGN_WINDOWS) or self.HasAGWFlag(TR_ALIGN_WINDOWS_RIGHT):
-            align = (self.HasAGWFlag(TR_ALIGN_WINDOWS) and [1] or [2])[0]
-            y = 2
-            y = self.CalculateLevel(self._anchor, dc, 0, y, align) # start recursion
+        return item.HitTest(point, self, flags, level)
 
 
     def RefreshSubtree(self, item):
@@ -8203,6 +8679,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
 
         client = self.GetClientSize()
 
+        self.CalculateItemPosition(item)
         rect = wx.Rect()
         x, rect.y = self.CalcScrolledPosition(0, item.GetY())
         rect.width = client.x
@@ -8224,6 +8701,7 @@ class CustomTreeCtrl(wx.ScrolledWindow):
         if self._freezeCount:
             return
 
+        self.CalculateItemPosition(item)
         rect = wx.Rect()
         x, rect.y = self.CalcScrolledPosition(0, item.GetY())
         rect.width = self.GetClientSize().x
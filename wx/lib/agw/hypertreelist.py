@@ -3772,15 +3772,16 @@ class TreeListMainWindow(CustomTreeCtrl):
         attr = item.GetAttributes()
 
         if attr and attr.HasFont():
-            dc.SetFont(attr.GetFont())
+            font = attr.GetFont()
         elif item.IsBold():
-            dc.SetFont(self._boldFont)
+            font = self._boldFont
         else:
-            dc.SetFont(self._normalFont)
+            font = self._normalFont
 
+        extents = self._textExtentCache
         text_w = text_h = wnd_w = wnd_h = 0
         for column in range(self.GetColumnCount()):
-            w, h, dummy = dc.GetFullMultiLineTextExtent(item.GetText(column))
+            w, h, dummy = extents.GetFullMultiLineTextExtent(dc, item.GetText(column), font)
             text_w, text_h = max(w, text_w), max(h, text_h)
 
             wnd = item.GetWindow(column)
@@ -3789,12 +3790,9 @@ class TreeListMainWindow(CustomTreeCtrl):
                 if column == self._main_column:
                     wnd_w = item.GetWindowSize(column)[0]
 
-        text_w, dummy, dummy = dc.GetFullMultiLineTextExtent(item.GetText(self._main_column))
+        text_w, dummy, dummy = extents.GetFullMultiLineTextExtent(dc, item.GetText(self._main_column), font)
         text_h+=2
 
-        # restore normal font
-        dc.SetFont(self._normalFont)
-
         image_w, image_h = 0, 0
         image = item.GetCurrentImage()
 
@@ -3904,6 +3902,17 @@ class TreeListMainWindow(CustomTreeCtrl):
         self.CalculateLevel(self._anchor, dc, 0, y, x_colstart) # start recursion
 
 
+    def CalculateItemPosition(self, item):
+        """
+        Does nothing: :meth:`~TreeListMainWindow.CalculatePositions` keeps the
+        positions of all the visible items up to date.
+
+        :param `item`: an instance of :class:`TreeListItem`.
+        """
+
+        pass
+
+
     def SetItemText(self, item, text, column=None):
         """
         Sets the item text label.
@@ -3959,8 +3968,7 @@ class TreeListMainWindow(CustomTreeCtrl):
                 font = self._normalFont
 
         dc = wx.ClientDC(self)
-        dc.SetFont(font)
-        w, h, dummy = dc.GetFullMultiLineTextExtent(item.GetText(column))
+        w, h, dummy = self._textExtentCache.GetFullMultiLineTextExtent(dc, item.GetText(column), font)
         w += 2*_MARGIN
 
         # calculate width
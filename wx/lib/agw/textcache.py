@@ -0,0 +1,259 @@
+# --------------------------------------------------------------------------- #
+# TEXTCACHE wxPython IMPLEMENTATION
+# A text extent cache shared by the AGW tree and list controls.
+#
+# Tags:        phoenix-port, unittest, documented
+#
+# End Of Comments
+# --------------------------------------------------------------------------- #
+
+"""
+:class:`TextExtentCache` remembers the extents of the strings measured with a
+given font, so that the owner-drawn AGW controls don't have to ask the device
+context again every time they lay out their items.
+
+
+Description
+===========
+
+:class:`~lib.agw.customtreectrl.CustomTreeCtrl`, :class:`~lib.agw.hypertreelist.HyperTreeList`
+and :class:`~lib.agw.ultimatelistctrl.UltimateListCtrl` measure the text of
+every item whenever their layout is recalculated, and each of those measures
+is a round trip to the native toolkit. They all share the cache returned by
+:func:`GetTextExtentCache`, which holds the extents keyed by font and text and
+evicts the least recently used ones once it holds `maxItems` of them.
+
+A font is identified by its native font description, which is looked up once
+per font object and then remembered. If a font is changed in place, call
+:meth:`TextExtentCache.ForgetFont` so that its description is looked up again;
+the controls do this themselves when they are given a font. If the extents of
+every font change, for example because the display resolution changed, call
+:meth:`TextExtentCache.Clear`.
+
+Usage example::
+
+    import wx.lib.agw.textcache as TC
+
+    cache = TC.GetTextExtentCache()
+    dc = wx.ClientDC(window)
+    width, height, lineHeight = cache.GetFullMultiLineTextExtent(dc, "Hello\\nWorld", font)
+
+    print(cache.GetStats())
+
+
+License And Version
+===================
+
+:class:`TextExtentCache` is distributed under the wxPython license.
+
+Version 0.1
+
+"""
+
+from collections import OrderedDict
+
+# The number of extents kept by default
+MAX_ITEMS = 20000
+# Longer strings are measured but not cached
+MAX_LENGTH = 256
+# The number of font objects whose description is remembered
+MAX_FONTS = 256
+
+
+class TextExtentCache(object):
+    """
+    A least recently used cache of text extents, keyed by font and text.
+    """
+
+    def __init__(self, maxItems=MAX_ITEMS, maxLength=MAX_LENGTH):
+        """
+        Default class constructor.
+
+        :param integer `maxItems`: the number of extents the cache may hold;
+        :param integer `maxLength`: the length of the longest string that is
+         cached, longer ones are always measured.
+        """
+
+        self._maxItems = maxItems
+        self._maxLength = maxLength
+        self._items = OrderedDict()
+        self._fonts = {}
+        self._hits = 0
+        self._misses = 0
+
+
+    def __len__(self):
+
+        return len(self._items)
+
+
+    def _GetFontKey(self, font):
+        """
+        Returns the key identifying `font` in the cache, or ``None`` if the
+        font can't be cached.
+
+        :param `font`: an instance of :class:`Font`.
+        """
+
+        if font is None:
+            return None
+
+        try:
+            return self._fonts[id(font)][1]
+        except KeyError:
+            pass
+
+        if not font.IsOk():
+            return None
+
+        if len(self._fonts) >= MAX_FONTS:
+            self._fonts.clear()
+
+        # Keep a reference to the font, so its id can't be reused
+        key = font.GetNativeFontInfoDesc()
+        self._fonts[id(font)] = (font, key)
+        return key
+
+
+    def _Get(self, dc, text, font, multiLine):
+        """
+        Returns the cached extent of `text`, measuring it on a miss.
+
+        :param `dc`: an instance of :class:`DC`;
+        :param string `text`: the string to measure;
+        :param `font`: an instance of :class:`Font`;
+        :param bool `multiLine`: whether to return the multi-line extent.
+        """
+
+        fontKey = self._GetFontKey(font)
+        if fontKey is None or len(text) > self._maxLength:
+            if font is not None and font.IsOk():
+                dc.SetFont(font)
+            if multiLine:
+                return dc.GetFullMultiLineTextExtent(text)
+            return dc.GetTextExtent(text)
+
+        key = (fontKey, multiLine, text)
+        items = self._items
+
+        try:
+            extent = items.pop(key)
+        except KeyError:
+            self._misses += 1
+            dc.SetFont(font)
+            if multiLine:
+                extent = tuple(dc.GetFullMultiLineTextExtent(text))
+            else:
+                extent = tuple(dc.GetTextExtent(text))
+            if len(items) >= self._maxItems:
+                items.popitem(last=False)
+        else:
+            self._hits += 1
+
+        items[key] = extent
+        return extent
+
+
+    def GetTextExtent(self, dc, text, font):
+        """
+        Returns the width and height of a single line of text drawn with `font`.
+
+        :param `dc`: an instance of :class:`DC`, used to measure the text when
+         it is not in the cache;
+        :param string `text`: the string to measure;
+        :param `font`: an instance of :class:`Font`. If it is ``None`` or not
+         valid, the current font of `dc` is used and the result is not cached.
+
+        :return: A tuple of 2 integers, `width` and `height`.
+
+        :note: The font of `dc` is changed to `font` only when the text has to
+         be measured, so callers mustn't rely on it afterwards.
+        """
+
+        return self._Get(dc, text, font, False)
+
+
+    def GetFullMultiLineTextExtent(self, dc, text, font):
+        """
+        Returns the width and height of a possibly multi-line text drawn with
+        `font`, and the height of one of its lines.
+
+        :param `dc`: an instance of :class:`DC`, used to measure the text when
+         it is not in the cache;
+        :param string `text`: the string to measure;
+        :param `font`: an instance of :class:`Font`. If it is ``None`` or not
+         valid, the current font of `dc` is used and the result is not cached.
+
+        :return: A tuple of 3 integers, `width`, `height` and `lineHeight`.
+
+        :note: The font of `dc` is changed to `font` only when the text has to
+         be measured, so callers mustn't rely on it afterwards.
+        """
+
+        return self._Get(dc, text, font, True)
+
+
+    def ForgetFont(self, font):
+        """
+        Forgets the description of `font`, so that it is looked up again the
+        next time the font is used. Call this after changing a font in place.
+
+        :param `font`: an instance of :class:`Font`.
+        """
+
+        self._fonts.pop(id(font), None)
+
+
+    def Clear(self):
+        """ Removes all the extents and fonts from the cache. """
+
+        self._items.clear()
+        self._fonts.clear()
+
+
+    def SetMaxItems(self, maxItems):
+        """
+        Sets the number of extents the cache may hold, evicting the least
+        recently used ones if it holds more.
+
+        :param integer `maxItems`: the new maximum number of extents.
+        """
+
+        self._maxItems = maxItems
+        while len(self._items) > maxItems:
+            self._items.popitem(last=False)
+
+
+    def GetMaxItems(self):
+        """ Returns the number of extents the cache may hold. """
+
+        return self._maxItems
+
+
+    def GetStats(self):
+        """
+        Returns a dictionary with the number of ``hits`` and ``misses`` since
+        the statistics were last reset, their ``hitRate`` between 0 and 1 and
+        the number of ``items`` in the cache.
+        """
+
+        total = self._hits + self._misses
+        hitRate = (total and [float(self._hits)/total] or [0.0])[0]
+
+        return {'hits': self._hits, 'misses': self._misses,
+                'hitRate': hitRate, 'items': len(self._items)}
+
+
+    def ResetStats(self):
+        """ Resets the hit and miss counters. """
+
+        self._hits = 0
+        self._misses = 0
+
+
+_textExtentCache = TextExtentCache()
+
+def GetTextExtentCache():
+    """ Returns the :class:`TextExtentCache` shared by the AGW controls. """
+
+    return _textExtentCache
@@ -236,9 +236,13 @@ import math
 import bisect
 import zlib
 
+from collections import OrderedDict
+from functools import cmp_to_key
+
 import wx.lib.six as six
 
 from wx.lib.expando import ExpandoTextCtrl
+from wx.lib.agw.textcache import GetTextExtentCache
 
 # Version Info
 __version__ = "0.8"
@@ -523,6 +527,11 @@ HEADER_IMAGE_MARGIN_IN_REPORT_MODE = 2
 # and the width of the icon, if any
 MARGIN_BETWEEN_TEXT_AND_ICON = 2
 
+# the number of pages of rows a virtual control keeps in its row cache, and
+# the number of pages it fetches ahead of the scrolling direction
+VIRTUAL_CACHE_PAGES = 4
+VIRTUAL_PREFETCH_PAGES = 1
+
 # Background Image Style
 _StyleTile = 0
 _StyleStretch = 1
@@ -927,22 +936,21 @@ class SelectionStore(object):
     controls, i.e. it is well suited for storing even when the control contains
     a huge (practically infinite) number of items.
 
-    Of course, internally it still has to store the selected items somehow (as
-    an array currently) but the advantage is that it can handle the selection
-    of all items (common operation) efficiently and that it could be made even
-    smarter in the future (e.g. store the selections as an array of ranges +
-    individual items) without changing its API.
+    The selected items are stored as a sorted list of disjoint ranges, so that
+    selecting or deselecting a range of items (including all of them) takes the
+    same memory whatever its size, and checking whether an item is selected is
+    a binary search.
     """
 
     def __init__(self):
         """ Default class constructor. """
 
-        # the array of items whose selection state is different from default
-        self._itemsSel = []
-        # the default state: normally, False (i.e. off) but maybe set to true if
-        # there are more selected items than non selected ones - this allows to
-        # handle selection of all items efficiently
-        self._defaultState = False
+        # the first and last (inclusive) items of the ranges of selected items,
+        # sorted and neither overlapping nor adjacent
+        self._starts = []
+        self._ends = []
+        # the number of selected items
+        self._selCount = 0
         # the total number of items we handle
         self._count  = 0
 
@@ -950,15 +958,25 @@ class SelectionStore(object):
     def Clear(self):
         """ Clears the number of selected items. """
 
-        self._itemsSel = []
+        self._starts = []
+        self._ends = []
+        self._selCount = 0
         self._count = 0
-        self._defaultState = False
 
     # return the total number of selected items
     def GetSelectedCount(self):
         """ Return the total number of selected items. """
 
-        return (self._defaultState and [self._count - len(self._itemsSel)] or [len(self._itemsSel)])[0]
+        return self._selCount
+
+
+    def GetSelectedRanges(self):
+        """
+        Returns a list of `(itemFrom, itemTo)` tuples, the first and last index
+        of each range of selected items, in increasing order.
+        """
+
+        return list(zip(self._starts, self._ends))
 
 
     def IsSelected(self, item):
@@ -968,11 +986,8 @@ class SelectionStore(object):
         :param `item`: the item to check for selection state.
         """
 
-        isSel = item in self._itemsSel
-
-        # if the default state is to be selected, being in m_itemsSel means that
-        # the item is not selected, so we have to inverse the logic
-        return (self._defaultState and [not isSel] or [isSel])[0]
+        i = bisect.bisect_right(self._starts, item) - 1
+        return i >= 0 and item <= self._ends[i]
 
 
     def SelectItem(self, item, select=True):
@@ -985,25 +1000,11 @@ class SelectionStore(object):
         :return: ``True`` if the items selection really changed.
         """
 
-        # search for the item ourselves as like this we get the index where to
-        # insert it later if needed, so we do only one search in the array instead
-        # of two (adding item to a sorted array requires a search)
-        index = bisect.bisect_right(self._itemsSel, item)
-        isSel = index < len(self._itemsSel) and self._itemsSel[index] == item
-
-        if select != self._defaultState:
-
-            if item not in self._itemsSel:
-                bisect.insort_right(self._itemsSel, item)
-                return True
-
-        else: # reset to default state
-
-            if item in self._itemsSel:
-                self._itemsSel.remove(item)
-                return True
+        if self.IsSelected(item) == select:
+            return False
 
-        return False
+        self.SetRange(item, item, select)
+        return True
 
 
     def SelectRange(self, itemFrom, itemTo, select=True):
@@ -1014,9 +1015,9 @@ class SelectionStore(object):
         :param `itemTo`: the last index of the selection range;
         :param `select`: ``True`` to select the items, ``False`` otherwise.
 
-        :return: ``True`` and fill the `itemsChanged` array with the indices of items
-         which have changed state if "few" of them did, otherwise return ``False``
-         (meaning that too many items changed state to bother counting them individually).
+        :return: A list with the indices of the items which have changed state if
+         "few" of them did, otherwise an empty list (meaning that too many items
+         changed state to bother counting them individually).
         """
 
         # 100 is hardcoded but it shouldn't matter much: the important thing is
@@ -1024,81 +1025,76 @@ class SelectionStore(object):
         # change state
         MANY_ITEMS = 100
 
-        # many items (> half) changed state
-        itemsChanged = []
+        changed = self.SetRange(itemFrom, itemTo, select)
 
-        # are we going to have more [un]selected items than the other ones?
-        if itemTo - itemFrom > self._count/2:
+        if sum([end - start + 1 for start, end in changed]) > MANY_ITEMS:
+            return []
 
-            if select != self._defaultState:
-
-                # the default state now becomes the same as 'select'
-                self._defaultState = select
+        itemsChanged = []
+        for start, end in changed:
+            itemsChanged.extend(range(start, end + 1))
 
-                # so all the old selections (which had state select) shouldn't be
-                # selected any more, but all the other ones should
-                selOld = self._itemsSel[:]
-                self._itemsSel = []
+        return itemsChanged
 
-                # TODO: it should be possible to optimize the searches a bit
-                #       knowing the possible range
 
-                for item in range(itemFrom):
-                    if item not in selOld:
-                        self._itemsSel.append(item)
+    def SetRange(self, itemFrom, itemTo, select=True):
+        """
+        Selects or deselects a range of items.
 
-                for item in range(itemTo + 1, self._count):
-                    if item not in selOld:
-                        self._itemsSel.append(item)
+        :param `itemFrom`: the first index of the range;
+        :param `itemTo`: the last index of the range;
+        :param `select`: ``True`` to select the items, ``False`` otherwise.
 
-            else: # select == self._defaultState
+        :return: A list of `(start, end)` tuples, the ranges of items which have
+         changed state.
+        """
 
-                # get the inclusive range of items between itemFrom and itemTo
-                count = len(self._itemsSel)
-                start = bisect.bisect_right(self._itemsSel, itemFrom)
-                end = bisect.bisect_right(self._itemsSel, itemTo)
+        starts, ends = self._starts, self._ends
 
-                if itemFrom < start:
-                    start = itemFrom
+        # the ranges [first, last) overlap the input range or, when selecting,
+        # are adjacent to it and will be merged with it
+        slack = (select and [1] or [0])[0]
+        first = bisect.bisect_left(ends, itemFrom - slack)
+        last = bisect.bisect_right(starts, itemTo + slack)
 
-                if start == count or self._itemsSel[start] < itemFrom:
-                    start += 1
+        changed = []
+        if select:
 
-                if end == count or self._itemsSel[end] > itemTo:
-                    end -= 1
+            # the gaps between the ranges become selected
+            pos = itemFrom
+            for i in range(first, last):
+                if starts[i] > pos:
+                    changed.append((pos, starts[i] - 1))
+                pos = max(pos, ends[i] + 1)
+            if pos <= itemTo:
+                changed.append((pos, itemTo))
 
-                if start <= end:
+            if first < last:
+                merged = [min(itemFrom, starts[first])], [max(itemTo, ends[last - 1])]
+            else:
+                merged = [itemFrom], [itemTo]
 
-                    # delete all of them (from end to avoid changing indices)
-                    for i in range(end, start-1, -1):
-                        if itemsChanged:
-                            if len(itemsChanged) > MANY_ITEMS:
-                                # stop counting (see comment below)
-                                itemsChanged = []
-                            else:
-                                itemsChanged.append(self._itemsSel[i])
+        else:
 
-                        self._itemsSel.pop(i)
-                else:
-                    self._itemsSel = []
+            # the parts of the ranges inside the input range become deselected
+            for i in range(first, last):
+                changed.append((max(starts[i], itemFrom), min(ends[i], itemTo)))
 
-        else: # "few" items change state
+            merged = [], []
+            if first < last:
+                if starts[first] < itemFrom:
+                    merged[0].append(starts[first])
+                    merged[1].append(itemFrom - 1)
+                if ends[last - 1] > itemTo:
+                    merged[0].append(itemTo + 1)
+                    merged[1].append(ends[last - 1])
 
-            if itemsChanged:
-                itemsChanged = []
+        starts[first:last], ends[first:last] = merged
 
-            # just add the items to the selection
-            for item in range(itemFrom, itemTo+1):
-                if self.SelectItem(item, select) and itemsChanged:
-                    itemsChanged.append(item)
-                    if len(itemsChanged) > MANY_ITEMS:
-                        # stop counting them, we'll just eat gobs of memory
-                        # for nothing at all - faster to refresh everything in
-                        # this case
-                        itemsChanged = []
+        count = sum([end - start + 1 for start, end in changed])
+        self._selCount += (select and [count] or [-count])[0]
 
-        # we set it to None if there are many items changing state
-        return itemsChanged
+        return changed
 
 
     def OnItemDelete(self, item):
@@ -1108,20 +1104,58 @@ class SelectionStore(object):
         :param `item`: the item that is being deleted.
         """
 
-        count = len(self._itemsSel)
-        i = bisect.bisect_right(self._itemsSel, item)
+        self.OnItemsDeleted(item, item)
+
+
+    def OnItemsDeleted(self, itemFrom, itemTo):
+        """
+        Must be called when a range of items is deleted.
+
+        :param `itemFrom`: the first index of the deleted items;
+        :param `itemTo`: the last index of the deleted items.
+        """
+
+        self.SetRange(itemFrom, itemTo, False)
+
+        # and adjust the index of all the ranges which follow them
+        starts, ends = self._starts, self._ends
+        count = itemTo - itemFrom + 1
+        first = bisect.bisect_right(starts, itemTo)
+
+        for i in range(first, len(starts)):
+            starts[i] -= count
+            ends[i] -= count
 
-        if i < count and self._itemsSel[i] == item:
-            # this item itself was in m_itemsSel, remove it from there
-            self._itemsSel.pop(i)
+        # the ranges on both sides of the deleted items may now be adjacent
+        if 0 < first < len(starts) and ends[first - 1] + 1 == starts[first]:
+            ends[first - 1] = ends.pop(first)
+            starts.pop(first)
 
-            count -= 1
+        self._count = max(0, self._count - count)
 
-        # and adjust the index of all which follow it
-        while i < count:
 
-            i += 1
-            self._itemsSel[i] -= 1
+    def OnItemsInserted(self, item, count=1):
+        """
+        Must be called when new, unselected, items are inserted.
+
+        :param `item`: the index of the first inserted item;
+        :param `count`: the number of inserted items.
+        """
+
+        starts, ends = self._starts, self._ends
+        first = bisect.bisect_left(starts, item)
+
+        # a range containing the insertion point is split in two
+        if first > 0 and ends[first - 1] >= item:
+            starts.insert(first, item)
+            ends.insert(first, ends[first - 1])
+            ends[first - 1] = item - 1
+
+        for i in range(first, len(starts)):
+            starts[i] += count
+            ends[i] += count
+
+        self._count += count
 
 
     def SetItemCount(self, count):
@@ -1133,15 +1167,147 @@ class SelectionStore(object):
 
         # forget about all items whose indices are now invalid if the size
         # decreased
-        if count < self._count:
-            for i in range(len(self._itemsSel), 0, -1):
-                if self._itemsSel[i - 1] >= count:
-                    self._itemsSel.pop(i - 1)
+        if count < self._count and self._starts:
+            self.SetRange(count, max(self._count, self._ends[-1]), False)
 
         # remember the new number of items
         self._count = count
 
 
+# ----------------------------------------------------------------------------
+# VirtualRowCache
+# ----------------------------------------------------------------------------
+
+class VirtualRowCache(object):
+    """
+    VirtualRowCache keeps the data of the most recently used rows of a virtual
+    :class:`UltimateListCtrl`, as returned in blocks by
+    :meth:`UltimateListCtrl.OnGetItemsBlock() <UltimateListCtrl.OnGetItemsBlock>`,
+    so that painting or measuring a row doesn't ask the application for it again.
+
+    Each row is stored as the block it came from and its offset in the block;
+    the least recently used rows are evicted once the cache holds more than
+    its maximum number of rows.
+    """
+
+    def __init__(self):
+        """ Default class constructor. """
+
+        self._rows = OrderedDict()
+        self._maxRows = 0
+        self._columnCount = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._blocks = 0
+
+
+    def Get(self, row):
+        """
+        Returns a tuple `(block, offset)` for the input row and makes it the most
+        recently used one, or ``None`` if the row is not in the cache.
+
+        :param `row`: the row index.
+        """
+
+        try:
+            entry = self._rows.pop(row)
+        except KeyError:
+            self._misses += 1
+            return None
+
+        self._rows[row] = entry
+        self._hits += 1
+        return entry
+
+
+    def Put(self, start, count, block):
+        """
+        Stores the rows of a block, evicting the least recently used rows if
+        the cache holds too many.
+
+        :param `start`: the index of the first row in the block;
+        :param `count`: the number of rows in the block;
+        :param `block`: the block returned by :meth:`UltimateListCtrl.OnGetItemsBlock() <UltimateListCtrl.OnGetItemsBlock>`.
+        """
+
+        rows = self._rows
+        for offset in range(count):
+            rows.pop(start + offset, None)
+            rows[start + offset] = (block, offset)
+
+        while len(rows) > self._maxRows:
+            rows.popitem(last=False)
+
+        self._blocks += 1
+
+
+    def Contains(self, row):
+        """
+        Returns whether the input row is in the cache.
+
+        :param `row`: the row index.
+        """
+
+        return row in self._rows
+
+
+    def Remove(self, rowFrom, rowTo):
+        """
+        Removes the rows between `rowFrom` and `rowTo` (inclusive) from the cache.
+
+        :param `rowFrom`: the first row to remove;
+        :param `rowTo`: the last row to remove.
+        """
+
+        rows = self._rows
+        if rowTo - rowFrom < len(rows):
+            for row in range(rowFrom, rowTo + 1):
+                rows.pop(row, None)
+        else:
+            for row in [row for row in rows if rowFrom <= row <= rowTo]:
+                del rows[row]
+
+
+    def Clear(self):
+        """ Removes all the rows from the cache. """
+
+        self._rows.clear()
+
+
+    def SetMaxRows(self, maxRows):
+        """
+        Sets the number of rows the cache may hold.
+
+        :param `maxRows`: the maximum number of rows.
+        """
+
+        self._maxRows = maxRows
+
+
+    def SetColumnCount(self, count):
+        """
+        Sets the number of columns of the control, removing all the rows if it
+        changed as the blocks don't have the right number of columns any more.
+
+        :param `count`: the number of columns.
+        """
+
+        if count != self._columnCount:
+            self._rows.clear()
+            self._columnCount = count
+
+
+    def GetStats(self):
+        """
+        Returns a dictionary with the number of row ``hits`` and ``misses``, the
+        number of ``blocks`` fetched and the number of ``rows`` in the cache.
+        """
+
+        return {'hits': self._hits, 'misses': self._misses,
+                'blocks': self._blocks, 'rows': len(self._rows)}
+
+
 # ----------------------------------------------------------------------------
 # UltimateListItemAttr: a structure containing the visual attributes of an item
 # ----------------------------------------------------------------------------
@@ -3922,7 +4088,7 @@ class UltimateListLineData(object):
 
             else:
 
-                lw, lh = dc.GetTextExtent(s)
+                lw, lh = self._owner._textExtentCache.GetTextExtent(dc, s, self._owner._GetTextFont())
                 lw += EXTRA_WIDTH
                 lh += EXTRA_HEIGHT
 
@@ -3959,7 +4125,7 @@ class UltimateListLineData(object):
 
             s = item.GetTextForMeasuring()
 
-            lw, lh = dc.GetTextExtent(s)
+            lw, lh = self._owner._textExtentCache.GetTextExtent(dc, s, self._owner._GetTextFont())
             lw += EXTRA_WIDTH
             lh += EXTRA_HEIGHT
 
@@ -6070,6 +6236,12 @@ class UltimateListMainWindow(wx.ScrolledWindow):
         self._headerWidth = 0
         self._lineHeight = 0
         self._userLineHeight = None
+        self._textExtentCache = GetTextExtentCache()
+        self._textFont = None
+
+        self._virtualCache = VirtualRowCache()
+        self._virtualBlocks = True
+        self._lastVirtualRow = 0
 
         self._small_image_list = None
         self._normal_image_list = None
@@ -6380,12 +6552,27 @@ class UltimateListMainWindow(wx.ScrolledWindow):
         if not wx.ScrolledWindow.SetFont(self, font):
             return False
 
+        self._textFont = None
+        self._textExtentCache.ForgetFont(font)
         self._lineHeight = 0
         self.ResetLineDimensions()
 
         return True
 
 
+    def _GetTextFont(self):
+        """
+        Returns the font used to measure the items text, keeping the same
+        :class:`Font` object until :meth:`~UltimateListMainWindow.SetFont` is
+        called so that its text extents can be cached.
+        """
+
+        if self._textFont is None:
+            self._textFont = self.GetFont()
+
+        return self._textFont
+
+
     def ResetLineDimensions(self, force=False):
         """
         Resets the line dimensions, so that client rectangles and positions are
@@ -6528,6 +6715,14 @@ class UltimateListMainWindow(wx.ScrolledWindow):
         ld = self.GetDummyLine()
 
         countCol = self.GetColumnCount()
+
+        if self._virtualBlocks:
+            entry = self.GetVirtualRow(line)
+            if entry is not None:
+                block, offset = entry
+                self.SetLineFromBlock(ld, block, offset, countCol)
+                return
+
         for col in range(countCol):
             ld.SetText(col, listctrl.OnGetItemText(line, col))
             ld.SetToolTip(col, listctrl.OnGetItemToolTip(line, col))
@@ -6541,6 +6736,121 @@ class UltimateListMainWindow(wx.ScrolledWindow):
         ld.SetAttr(listctrl.OnGetItemAttr(line))
 
 
+    def GetVirtualRow(self, line):
+        """
+        Returns a tuple `(block, offset)` holding the data of the input line,
+        fetching a block of lines with :meth:`UltimateListCtrl.OnGetItemsBlock() <UltimateListCtrl.OnGetItemsBlock>`
+        if it is not in the row cache, or ``None`` if the control doesn't provide
+        blocks of lines.
+
+        The block starts at the input line and extends ahead of the direction
+        the control is being scrolled in, so that the next lines to be shown
+        are already cached: upwards if the line is just above the previous one
+        asked for, downwards otherwise.
+
+        :param `line`: the line index.
+
+        :note: This method is used only if the :class:`UltimateListCtrl` has the ``ULC_VIRTUAL``
+         style set.
+        """
+
+        cache = self._virtualCache
+        cache.SetColumnCount(self.GetColumnCount())
+
+        previous, self._lastVirtualRow = self._lastVirtualRow, line
+
+        entry = cache.Get(line)
+        if entry is not None:
+            return entry
+
+        # size the cache and the blocks on the number of lines in a page; this
+        # mustn't use the visible lines range, which may get the lines itself
+        page = max(1, self.GetClientSize().y//self.GetLineHeight())
+        cache.SetMaxRows(page*VIRTUAL_CACHE_PAGES)
+        size = page*(1 + VIRTUAL_PREFETCH_PAGES)
+
+        if not line < previous <= line + size:
+            start = end = line
+            last = min(self.GetItemCount(), line + size)
+            while end < last and not cache.Contains(end):
+                end += 1
+        else:
+            start = end = line + 1
+            first = max(0, line + 1 - size)
+            while start > first and not cache.Contains(start - 1):
+                start -= 1
+
+        block = self.GetListCtrl().OnGetItemsBlock(start, end - start)
+        if block is None:
+            self._virtualBlocks = False
+            return None
+
+        cache.Put(start, end - start, block)
+        return block, line - start
+
+
+    def SetLineFromBlock(self, ld, block, offset, countCol):
+        """
+        Sets the line attributes from a block of lines returned by
+        :meth:`UltimateListCtrl.OnGetItemsBlock() <UltimateListCtrl.OnGetItemsBlock>`.
+
+        :param `ld`: an instance of :class:`UltimateListLineData`;
+        :param `block`: the block holding the line data;
+        :param `offset`: the offset of the line in the block;
+        :param `countCol`: the number of columns.
+
+        :note: This method is used only if the :class:`UltimateListCtrl` has the ``ULC_VIRTUAL``
+         style set.
+        """
+
+        texts = block["text"]
+        toolTips = block.get("toolTip")
+        colours = block.get("colour")
+        images = block.get("image")
+        kinds = block.get("kind")
+        checks = block.get("check")
+        attrs = block.get("attr")
+
+        for col in range(countCol):
+            ld.SetText(col, texts[col][offset])
+            ld.SetToolTip(col, (toolTips is not None and [toolTips[col][offset]] or [""])[0])
+            ld.SetColour(col, (colours is not None and [colours[col][offset]] or [None])[0])
+            ld.SetImage(col, (images is not None and [images[col][offset]] or [[]])[0])
+            kind = (kinds is not None and [kinds[col][offset]] or [0])[0]
+            ld.SetKind(col, kind)
+            if kind > 0:
+                ld.Check(col, checks is not None and bool(checks[col][offset]))
+
+        ld.SetAttr((attrs is not None and [attrs[offset]] or [None])[0])
+
+
+    def RefreshVirtualRows(self, lineFrom, lineTo):
+        """
+        Removes the input lines from the row cache, so that their data is asked
+        to the application again.
+
+        :param `lineFrom`: the first line to remove;
+        :param `lineTo`: the last line to remove.
+
+        :note: This method is used only if the :class:`UltimateListCtrl` has the ``ULC_VIRTUAL``
+         style set.
+        """
+
+        self._virtualCache.Remove(lineFrom, lineTo)
+
+
+    def GetVirtualCacheStats(self):
+        """
+        Returns a dictionary with the number of row ``hits`` and ``misses``, the
+        number of ``blocks`` fetched and the number of ``rows`` in the row cache.
+
+        :note: This method is used only if the :class:`UltimateListCtrl` has the ``ULC_VIRTUAL``
+         style set.
+        """
+
+        return self._virtualCache.GetStats()
+
+
     def GetDummyLine(self):
         """
         Returns a dummy line.
@@ -6589,9 +6899,7 @@ class UltimateListMainWindow(wx.ScrolledWindow):
 
             if not self._lineHeight:
                 dc = wx.ClientDC(self)
-                dc.SetFont(self.GetFont())
-
-                dummy, y = dc.GetTextExtent("H")
+                dummy, y = self._textExtentCache.GetTextExtent(dc, "H", self._GetTextFont())
                 if self._small_image_list and self._small_image_list.GetImageCount():
                     iw, ih = self._small_image_list.GetSize(0)
                     y = max(y, ih)
@@ -6619,11 +6927,11 @@ class UltimateListMainWindow(wx.ScrolledWindow):
                     continue
 
                 if items.HasFont():
-                    dc.SetFont(items.GetFont())
+                    font = items.GetFont()
                 else:
-                    dc.SetFont(self.GetFont())
+                    font = self._GetTextFont()
 
-                text_x, text_y, dummy = dc.GetFullMultiLineTextExtent(items.GetText())
+                text_x, text_y, dummy = self._textExtentCache.GetFullMultiLineTextExtent(dc, items.GetText(), font)
                 allTextY = max(text_y, allTextY)
 
                 if items.GetWindow():
@@ -8388,9 +8696,7 @@ class UltimateListMainWindow(wx.ScrolledWindow):
         """
 
         dc = wx.ClientDC(self)
-        dc.SetFont(self.GetFont())
-
-        lw, lh, dummy = dc.GetFullMultiLineTextExtent(s)
+        lw, lh, dummy = self._textExtentCache.GetFullMultiLineTextExtent(dc, s, self._GetTextFont())
 
         return lw + AUTOSIZE_COL_MARGIN
 
@@ -8791,6 +9097,7 @@ class UltimateListMainWindow(wx.ScrolledWindow):
 
         if not self.IsVirtual():
 
+            self._textExtentCache.ForgetFont(item.GetFont())
             line = self.GetLine(id)
             line.SetItem(item._col, item)
 
@@ -9473,6 +9780,9 @@ class UltimateListMainWindow(wx.ScrolledWindow):
         self._selStore.SetItemCount(count)
         self._countVirt = count
 
+        self._virtualCache.Clear()
+        self._virtualBlocks = True
+
         self.ResetVisibleLinesRange()
 
         # scrollbars must be reset
@@ -9975,6 +10285,7 @@ class UltimateListMainWindow(wx.ScrolledWindow):
         if self.IsVirtual():
             self._countVirt -= 1
             self._selStore.OnItemDelete(lindex)
+            self._virtualCache.Clear()
 
         else:
             self._lines.pop(lindex)
@@ -10031,6 +10342,7 @@ class UltimateListMainWindow(wx.ScrolledWindow):
         if self.IsVirtual():
             self._countVirt = 0
             self._selStore.Clear()
+            self._virtualCache.Clear()
 
         if self.InReportView():
             self.ResetVisibleLinesRange(True)
@@ -10330,9 +10642,7 @@ class UltimateListMainWindow(wx.ScrolledWindow):
         if item.GetFont().IsOk():
             font = item.GetFont()
         else:
-            font = self.GetFont()
-
-        dc.SetFont(font)
+            font = self._GetTextFont()
 
         if item.GetKind() in [1, 2]:
             ix, iy = self.GetCheckboxImageSize()
@@ -10343,7 +10653,7 @@ class UltimateListMainWindow(wx.ScrolledWindow):
             width += ix + IMAGE_MARGIN_IN_REPORT_MODE
 
         if item.GetText():
-            w, h, dummy = dc.GetFullMultiLineTextExtent(item.GetText())
+            w, h, dummy = self._textExtentCache.GetFullMultiLineTextExtent(dc, item.GetText(), font)
             width += w
 
         if item.GetWindow():
@@ -10365,9 +10675,7 @@ class UltimateListMainWindow(wx.ScrolledWindow):
         if item.HasFont():
             font = item.GetFont()
         else:
-            font = self.GetFont()
-
-        dc.SetFont(font)
+            font = self._GetTextFont()
 
         if item.GetKind() in [1, 2]:
             ix, iy = self.GetCheckboxImageSize()
@@ -10378,7 +10686,7 @@ class UltimateListMainWindow(wx.ScrolledWindow):
             start += ix + IMAGE_MARGIN_IN_REPORT_MODE
 
         if item.GetText():
-            w, h, dummy = dc.GetFullMultiLineTextExtent(item.GetText())
+            w, h, dummy = self._textExtentCache.GetFullMultiLineTextExtent(dc, item.GetText(), font)
             end = w
 
         return start, end
@@ -10416,7 +10724,7 @@ class UltimateListMainWindow(wx.ScrolledWindow):
             return cmp(data1, data2)
 
 
-    def SortItems(self, func):
+    def SortItems(self, func=None, key=None, reverse=False, keys=None):
         """
         Call this function to sort the items in the :class:`UltimateListCtrl`. Sorting is done
         using the specified function `func`. This function must have the
@@ -10432,12 +10740,30 @@ class UltimateListMainWindow(wx.ScrolledWindow):
         if the items are equal, negative value if the first item is less than the second
         one and positive value if the first one is greater than the second one.
 
+        Comparing items pairwise is slow for large lists: a `key` computes the sort key
+        of each item only once. It may be either a function taking the item data and
+        returning its sort key, or a sequence (a Python list, tuple or `NumPy` array)
+        holding the sort key of every item, in the current order of the items. To sort
+        on several columns, pass `keys` as a list of `(key, reverse)` tuples, the most
+        significant first.
+
+        The sort is stable, so items with equal keys keep their relative order. The
+        selected items and the current item stay the same, at their new positions.
+
         :param `func`: the method to use to sort the items. The default is to use the
-         :meth:`~UltimateListMainWindow.OnCompareItems` method.
+         :meth:`~UltimateListMainWindow.OnCompareItems` method;
+        :param `key`: a function or a sequence giving the sort key of every item. If
+         not ``None``, `func` is ignored;
+        :param `reverse`: ``True`` to sort the items in descending order;
+        :param `keys`: a list of `(key, reverse)` tuples, each `key` being like the
+         `key` parameter, to sort the items on several keys. If not ``None``, `func`,
+         `key` and `reverse` are ignored.
+
+        :note: Virtual controls are not sorted, as their items come from the application.
         """
 
-        self.HighlightAll(False)
-        self.ResetCurrent()
+        if self.IsVirtual():
+            return
 
         if self._hasWindows:
             self.HideWindows()
@@ -10447,7 +10773,37 @@ class UltimateListMainWindow(wx.ScrolledWindow):
         else:
             self.__func = func
 
-        self._lines.sort(self.OnCompareItems)
+        if keys is None:
+            keys = [(key, reverse)]
+
+        lines = self._lines
+        order = list(range(len(lines)))
+
+        # sort on the least significant key first: as each sort is stable, the
+        # items with equal keys stay sorted on the following ones
+        for sortKey, sortReverse in reversed(keys):
+            if sortKey is None:
+                compare = self.OnCompareItems
+                order.sort(key=cmp_to_key(lambda i, j: compare(lines[i], lines[j])), reverse=sortReverse)
+            else:
+                order.sort(key=self.GetSortKeys(sortKey).__getitem__, reverse=sortReverse)
+
+        self._lines = [lines[i] for i in order]
+
+        # the selection is stored in the lines, which moved with the sort; the
+        # indices of the current and last clicked items have to follow them
+        newIndex = [0]*len(order)
+        for i, old in enumerate(order):
+            newIndex[old] = i
+
+        def Remap(index):
+            return (index >= 0 and [newIndex[index]] or [index])[0]
+
+        self._current = Remap(self._current)
+        self._lineLastClicked = Remap(self._lineLastClicked)
+        self._lineBeforeLastClicked = Remap(self._lineBeforeLastClicked)
+        self._hoverItem = Remap(self._hoverItem)
+        self._lineSelectSingleOnUp = -1
 
         if self.IsShownOnScreen():
             self._dirty = True
@@ -10457,6 +10813,26 @@ class UltimateListMainWindow(wx.ScrolledWindow):
         self.RecalculatePositions(True)
 
 
+    def GetSortKeys(self, key):
+        """
+        Returns a list with the sort key of every item, in the current order of the items.
+
+        :param `key`: a function taking the item data and returning its sort key, or a
+         sequence holding the sort key of every item.
+
+        :see: :meth:`~UltimateListMainWindow.SortItems` for more details.
+        """
+
+        if callable(key):
+            return [key(line._items[0]._data) for line in self._lines]
+
+        keys = list(key)
+        if len(keys) != len(self._lines):
+            raise Exception("The number of sort keys doesn't match the number of items")
+
+        return keys
+
+
 # ----------------------------------------------------------------------------
 # scrolling
 # ----------------------------------------------------------------------------
@@ -12221,7 +12597,7 @@ class UltimateListCtrl(wx.Control):
 # item, a positive number of the second item should precede the first,
 # or zero if the two items are equivalent.
 
-    def SortItems(self, func=None):
+    def SortItems(self, func=None, key=None, reverse=False, keys=None):
         """
         Call this function to sort the items in the :class:`UltimateListCtrl`. Sorting is done
         using the specified function `func`. This function must have the
@@ -12237,11 +12613,28 @@ class UltimateListCtrl(wx.Control):
         if the items are equal, negative value if the first item is less than the second
         one and positive value if the first one is greater than the second one.
 
+        For large lists, pass a `key` instead: a function taking the item data and
+        returning its sort key, or a sequence holding the sort key of every item. The
+        keys are computed only once per item. Sorting on several columns is done by
+        passing `keys` as a list of `(key, reverse)` tuples, the most significant first,
+        for example::
+
+            names = [ulc.GetItem(i, 0).GetText() for i in range(ulc.GetItemCount())]
+            sizes = [ulc.GetItemData(i) for i in range(ulc.GetItemCount())]
+            ulc.SortItems(keys=[(names, False), (sizes, True)])
+
+        The sort is stable and keeps the selected items and the current item.
+
         :param `func`: the method to use to sort the items. The default is to use the
-         :meth:`UltimateListMainWindow.OnCompareItems() <UltimateListMainWindow.OnCompareItems>` method.
+         :meth:`UltimateListMainWindow.OnCompareItems() <UltimateListMainWindow.OnCompareItems>` method;
+        :param `key`: a function or a sequence giving the sort key of every item. If
+         not ``None``, `func` is ignored;
+        :param `reverse`: ``True`` to sort the items in descending order;
+        :param `keys`: a list of `(key, reverse)` tuples to sort the items on several
+         keys. If not ``None``, `func`, `key` and `reverse` are ignored.
         """
 
-        self._mainWin.SortItems(func)
+        self._mainWin.SortItems(func, key, reverse, keys)
         wx.CallAfter(self.Refresh)
 
         return True
@@ -12761,6 +13154,57 @@ class UltimateListCtrl(wx.Control):
         return 0
 
 
+    def OnGetItemsBlock(self, start, count):
+        """
+        This function may be overloaded in the derived class for a control with
+        ``ULC_VIRTUAL`` style to provide the data of several items at once, which
+        is much faster than the per-item callbacks when the data comes from a
+        database or another source with a high cost per query. It should return a
+        dictionary of columnar arrays (Python lists, tuples or `NumPy` arrays) with
+        the following keys:
+
+         =============== ================================================================
+         Key             Description
+         =============== ================================================================
+         ``text``        A sequence with one array of item texts for each column. Required.
+         ``toolTip``     A sequence with one array of tooltip strings for each column.
+         ``colour``      A sequence with one array of :class:`Colour` or ``None`` for each column.
+         ``image``       A sequence with one array of image index lists for each column.
+         ``kind``        A sequence with one array of item kinds for each column.
+         ``check``       A sequence with one array of check states for each column.
+         ``attr``        An array of :class:`UltimateListItemAttr` or ``None``, one per item.
+         =============== ================================================================
+
+        Each array holds the values of the items from `start` to `start+count-1`.
+        Missing keys get the same defaults as the base class versions of the
+        per-item callbacks.
+
+        The control keeps the most recently used items in a cache sized on the
+        number of items in a page, and fetches them ahead of the scrolling
+        direction. Call :meth:`~UltimateListCtrl.RefreshItem` or
+        :meth:`~UltimateListCtrl.RefreshItems` when the underlying data changes.
+
+        :param `start`: an integer specifying the index of the first item;
+        :param `count`: the number of items.
+
+        :note: The base class version returns ``None``, in which case the per-item
+         callbacks (:meth:`~UltimateListCtrl.OnGetItemText` and friends) are used
+         until the next call to :meth:`~UltimateListCtrl.SetItemCount`.
+        """
+
+        return None
+
+
+    def GetVirtualCacheStats(self):
+        """
+        Returns a dictionary with the number of row ``hits`` and ``misses``, the
+        number of ``blocks`` fetched with :meth:`~UltimateListCtrl.OnGetItemsBlock`
+        and the number of ``rows`` in the row cache of a virtual control.
+        """
+
+        return self._mainWin.GetVirtualCacheStats()
+
+
     def SetItemCount(self, count):
         """
         Sets the total number of items we handle.
@@ -12785,6 +13229,7 @@ class UltimateListCtrl(wx.Control):
          underlying data does change.
         """
 
+        self._mainWin.RefreshVirtualRows(item, item)
         self._mainWin.RefreshLine(item)
 
 
@@ -12799,6 +13244,7 @@ class UltimateListCtrl(wx.Control):
         :param `itemTo`: the last index of the refresh range.
         """
 
+        self._mainWin.RefreshVirtualRows(itemFrom, itemTo)
         self._mainWin.RefreshLines(itemFrom, itemTo)
 
 
@@ -53,6 +53,8 @@ from time import clock
 import wx
 
 from .Utilities import BBox
+from .Utilities.SpatialIndex import SpatialIndex
+from .Utilities.TileCache import TileCache
 
 
 ## A global variable to hold the Pixels per inch that wxWindows thinks is in use
@@ -327,6 +329,8 @@ class DrawObject:
         if not self._Canvas.HitDict:
             self._Canvas.MakeHitDict()
         self._Canvas.HitDict[Event][self.HitColor] = (self) # put the object in the hit dict, indexed by its color
+        if not self.InForeground:
+            self._Canvas._InvalidateTiles()
 
     def UnBindAll(self):
         """
@@ -509,7 +513,10 @@ class DrawObject:
             self._Canvas._ForeDrawList.remove(self)
             self._Canvas._DrawList.append(self)
             self._Canvas._BackgroundDirty = True
+            self._Canvas._InvalidateTiles()
+            self._Canvas._UnIndexObject(self)
             self.InForeground = False
+            self._Canvas._IndexObject(self)
 
     def PutInForeground(self):
         """Put the object in the foreground."""
@@ -517,7 +524,10 @@ class DrawObject:
             self._Canvas._ForeDrawList.append(self)
             self._Canvas._DrawList.remove(self)
             self._Canvas._BackgroundDirty = True
+            self._Canvas._InvalidateTiles()
+            self._Canvas._UnIndexObject(self)
             self.InForeground = True
+            self._Canvas._IndexObject(self)
 
     def Hide(self):
         """Hide the object."""
@@ -527,6 +537,14 @@ class DrawObject:
         """Show the object."""
         self.Visible = True
 
+    def _PixelExtent(self, dc):
+        """
+        How far, in pixels, the object can be drawn outside of its bounding
+        box. Only the objects whose size is fixed in pixels go further than
+        their line width.
+        """
+        return 0
+
 class Group(DrawObject): 
     """
     A group of other FloatCanvas Objects
@@ -559,6 +577,8 @@ class Group(DrawObject):
         """
         self.ObjectList.append(obj)
         self.BoundingBox.Merge(obj.BoundingBox)
+        if self._Canvas:
+            self._Canvas._BBoxChanged(self)
 
     def AddObjects(self, Objects):
         """
@@ -579,6 +599,8 @@ class Group(DrawObject):
         else:
             BB = BBox.NullBBox()
         self.BoundingBox = BB
+        if self._Canvas:
+            self._Canvas._BBoxChanged(self)
 
     def SetColor(self, Color):
         """
@@ -656,6 +678,8 @@ class Group(DrawObject):
         for obj in self.ObjectList:
             obj.Move(Delta)
         self.BoundingBox += Delta
+        if self._Canvas:
+            self._Canvas._BBoxChanged(self)
 
     def Bind(self, Event, CallBackFun):
         """
@@ -700,6 +724,8 @@ class Group(DrawObject):
         if not self._Canvas.HitDict:
             self._Canvas.MakeHitDict()
         self._Canvas.HitDict[Event][self.HitColor] = (self)
+        if not self.InForeground:
+            self._Canvas._InvalidateTiles()
 
     def _ChangeChildrenHitColor(self, objlist):
         for obj in objlist:
@@ -710,6 +736,9 @@ class Group(DrawObject):
             if isinstance(obj, Group):
                 self._ChangeChildrenHitColor(obj.ObjectList)
 
+    def _PixelExtent(self, dc):
+        return max([obj._PixelExtent(dc) for obj in self.ObjectList] or [0])
+
     def _Draw(self, dc , WorldToPixel, ScaleWorldToPixel = None, HTdc=None):
         for obj in self.ObjectList:
             obj._Draw(dc, WorldToPixel, ScaleWorldToPixel, HTdc)
@@ -843,7 +872,7 @@ class XYObjectMixin:
         self.BoundingBox += Delta
 
         if self._Canvas:
-            self._Canvas.BoundingBoxDirty = True
+            self._Canvas._BBoxChanged(self)
 
     def CalcBoundingBox(self):
         """Calculate the bounding box."""
@@ -858,7 +887,7 @@ class XYObjectMixin:
         self.CalcBoundingBox()
 
         if self._Canvas:
-            self._Canvas.BoundingBoxDirty = True
+            self._Canvas._BBoxChanged(self)
 
 class PointsObjectMixin:
     """
@@ -880,13 +909,13 @@ class PointsObjectMixin:
         self.Points += Delta
         self.BoundingBox += Delta
         if self._Canvas:
-            self._Canvas.BoundingBoxDirty = True
+            self._Canvas._BBoxChanged(self)
 
     def CalcBoundingBox(self):
         """Calculate the bounding box."""
         self.BoundingBox = BBox.fromPoints(self.Points)
         if self._Canvas:
-            self._Canvas.BoundingBoxDirty = True
+            self._Canvas._BBoxChanged(self)
 
     def SetPoints(self, Points, copy=True):
         """
@@ -1152,6 +1181,9 @@ class Arrow(XYObjectMixin, LineOnlyMixin, DrawObject):
         AP[1:,:] += shift
         self.ArrowPoints = AP
 
+    def _PixelExtent(self, dc):
+        return self.Length + self.ArrowHeadSize
+
     def _Draw(self, dc , WorldToPixel, ScaleWorldToPixel, HTdc=None):
         dc.SetPen(self.Pen)
         xy = WorldToPixel(self.XY)
@@ -1290,6 +1322,9 @@ class PointSet(PointsObjectMixin, ColorOnlyMixin, DrawObject):
         """
         self.Diameter = Diameter
 
+    def _PixelExtent(self, dc):
+        return self.Diameter
+
     def FindClosestPoint(self, XY):
         """
 
@@ -1389,6 +1424,9 @@ class Point(XYObjectMixin, ColorOnlyMixin, DrawObject):
         """
         self.Diameter = Diameter
 
+    def _PixelExtent(self, dc):
+        return self.Diameter
+
     def _Draw(self, dc, WorldToPixel, ScaleWorldToPixel, HTdc=None):
         dc.SetPen(self.Pen)
         xy = WorldToPixel(self.XY)
@@ -1443,6 +1481,9 @@ class SquarePoint(XYObjectMixin, ColorOnlyMixin, DrawObject):
         """
         self.Size = Size
 
+    def _PixelExtent(self, dc):
+        return self.Size
+
     def _Draw(self, dc , WorldToPixel, ScaleWorldToPixel, HTdc=None):
         Size = self.Size
         dc.SetPen(self.Pen)
@@ -1524,7 +1565,7 @@ class RectEllipse(XYObjectMixin, LineAndFillMixin, DrawObject):
         corners = N.array((self.XY, (self.XY + self.WH) ), N.float)
         self.BoundingBox = BBox.fromPoints(corners)
         if self._Canvas:
-            self._Canvas.BoundingBoxDirty = True
+            self._Canvas._BBoxChanged(self)
 
 
 class Rectangle(RectEllipse):
@@ -1610,7 +1651,7 @@ class Circle(XYObjectMixin, LineAndFillMixin, DrawObject):
         # you need this in case Width or Height are negative
         self.BoundingBox = BBox.fromPoints( (self.XY+self.WH, self.XY-self.WH) )
         if self._Canvas:
-            self._Canvas.BoundingBoxDirty = True
+            self._Canvas._BBoxChanged(self)
 
     def _Draw(self, dc , WorldToPixel, ScaleWorldToPixel, HTdc=None):
         ( XY, WH ) = self.SetUpDraw(dc,
@@ -1786,6 +1827,12 @@ class Text(TextObjectMixin, DrawObject):
         (self.TextWidth, self.TextHeight) = (None, None)
         self.ShiftFun = self.ShiftFunDict[Position]
 
+    def _PixelExtent(self, dc):
+        if self.TextWidth is None or self.TextHeight is None:
+            dc.SetFont(self.Font)
+            (self.TextWidth, self.TextHeight) = dc.GetTextExtent(self.String)
+        return max(self.TextWidth, self.TextHeight)
+
     def _Draw(self, dc , WorldToPixel, ScaleWorldToPixel, HTdc=None):
         XY = WorldToPixel(self.XY)
         dc.SetFont(self.Font)
@@ -1934,6 +1981,8 @@ class ScaledText(TextObjectMixin, DrawObject):
         h = h * ScaleFactor
         x, y = self.ShiftFun(self.XY[0], self.XY[1], w, h, world = 1)
         self.BoundingBox = BBox.asBBox(((x, y-h ),(x + w, y)))
+        if self._Canvas:
+            self._Canvas._BBoxChanged(self)
 
     def _Draw(self, dc , WorldToPixel, ScaleWorldToPixel, HTdc=None):
         (X,Y) = WorldToPixel( (self.XY) )
@@ -2229,6 +2278,8 @@ class ScaledTextBox(TextObjectMixin, DrawObject):
         w, h = self.BoxWidth, self.BoxHeight
         x, y = self.ShiftFun(self.XY[0], self.XY[1], w, h, world=1)
         self.BoundingBox = BBox.asBBox(((x, y-h ),(x + w, y)))
+        if self._Canvas:
+            self._Canvas._BBoxChanged(self)
 
     def GetBoxRect(self):
         wh = (self.BoxWidth, self.BoxHeight)
@@ -2326,6 +2377,9 @@ class Bitmap(TextObjectMixin, DrawObject):
         (self.Width, self.Height) = self.Bitmap.GetWidth(), self.Bitmap.GetHeight()
         self.ShiftFun = self.ShiftFunDict[Position]
 
+    def _PixelExtent(self, dc):
+        return max(self.Width, self.Height)
+
     def _Draw(self, dc , WorldToPixel, ScaleWorldToPixel, HTdc=None):
         XY = WorldToPixel(self.XY)
         XY = self.ShiftFun(XY[0], XY[1], self.Width, self.Height)
@@ -2399,6 +2453,8 @@ class ScaledBitmap(TextObjectMixin, DrawObject):
         w, h = self.Width, self.Height
         x, y = self.ShiftFun(self.XY[0], self.XY[1], w, h, world = 1)
         self.BoundingBox = BBox.asBBox( ( (x, y-h ), (x + w, y) ) )
+        if self._Canvas:
+            self._Canvas._BBoxChanged(self)
 
 
     def _Draw(self, dc , WorldToPixel, ScaleWorldToPixel, HTdc=None):
@@ -2494,6 +2550,8 @@ class ScaledBitmap2(TextObjectMixin, DrawObject, ):
         w,h = self.Width, self.Height
         x, y = self.ShiftFun(self.XY[0], self.XY[1], w, h, world = 1)
         self.BoundingBox = BBox.asBBox( ((x, y-h ), (x + w, y)) )
+        if self._Canvas:
+            self._Canvas._BBoxChanged(self)
 
     def WorldToBitmap(self, Pw):
         """Computes the bitmap coords from World coords."""
@@ -2781,7 +2839,7 @@ class Arc(XYObjectMixin, LineAndFillMixin, DrawObject):
         self.BoundingBox += Delta
 
         if self._Canvas:
-            self._Canvas.BoundingBoxDirty = True
+            self._Canvas._BBoxChanged(self)
            
     def _Draw(self, dc , WorldToPixel, ScaleWorldToPixel, HTdc=None):
         self.SetUpDraw(dc , WorldToPixel, ScaleWorldToPixel, HTdc)
@@ -2798,7 +2856,620 @@ class Arc(XYObjectMixin, LineAndFillMixin, DrawObject):
         self.BoundingBox = BBox.asBBox( N.array((self.XY, (self.XY + self.WH) ),
                                                 N.float) )
         if self._Canvas:
-            self._Canvas.BoundingBoxDirty = True
+            self._Canvas._BBoxChanged(self)
+
+
+class ItemSetMixin:
+    """
+    Mixin class for objects that draw a whole set of items, such as
+    circles or rectangles, with a few calls to the DC's ``Draw*List``
+    methods instead of one DrawObject per item.
+
+    The coordinates of the items are kept in NumPy arrays, and are
+    transformed to pixel coordinates, and culled to the visible area, in
+    one pass. The style attributes (``LineColor``, ``FillColor``, etc.)
+    can be a single value for all items, or a list or array with one
+    value per item. Consecutive items with the same style are drawn with
+    one call, so it is fastest to keep the items of the same style
+    together; the items are always drawn in order.
+
+    The hit-test code does not distinguish between the items, use
+    :meth:`FindHits` with the object's ``HitCoords`` in a callback to find
+    out which ones were hit.
+
+    """
+    StyleAttributes = ("LineColor", "LineStyle", "LineWidth",
+                       "FillColor", "FillStyle")
+
+    def _ItemValues(self, Value):
+        # The values of a per-item style attribute, or None for one value
+        if isinstance(Value, N.ndarray):
+            Value = [tuple(v) if isinstance(v, list) else v
+                     for v in Value.tolist()]
+        elif not isinstance(Value, list):
+            return None
+        if len(Value) != self.NumItems:
+            raise FloatCanvasError("There must be one style value per item")
+        return Value
+
+    def _UpdateStyles(self):
+        Values = [getattr(self, name) for name in self.StyleAttributes]
+        Columns = [self._ItemValues(v) for v in Values]
+        if Columns.count(None) == len(Columns):
+            self._StyleIndex = None
+            self._Styles = [self._MakeStyle(*Values)]
+        else:
+            Columns = [c if c is not None else [v] * self.NumItems
+                       for c, v in zip(Columns, Values)]
+            Keys = {}
+            self._StyleIndex = N.array([Keys.setdefault(k, len(Keys))
+                                        for k in zip(*Columns)], N.int)
+            self._Styles = [self._MakeStyle(*k)
+                            for k in sorted(Keys, key=Keys.get)]
+        if "LineWidth" in self.StyleAttributes:
+            self.HitLineWidth = max(N.max(self.LineWidth), self.MinHitLineWidth)
+
+    def _MakeStyle(self, LineColor, LineStyle, LineWidth,
+                   FillColor=None, FillStyle=None):
+        if (LineColor is None) or (LineStyle is None):
+            Pen = wx.TRANSPARENT_PEN
+        else:
+            Pen = self.PenList.setdefault(
+                (LineColor, LineStyle, LineWidth),
+                wx.Pen(LineColor, LineWidth, self.LineStyleList[LineStyle]))
+        if FillColor is None or FillStyle is None:
+            Brush = wx.TRANSPARENT_BRUSH
+        else:
+            Brush = self.BrushList.setdefault(
+                (FillColor, FillStyle),
+                wx.Brush(FillColor, self.FillStyleList[FillStyle]))
+        return Pen, Brush
+
+    def _SetStyle(self, dc, Style):
+        Pen, Brush = Style
+        dc.SetPen(Pen)
+        dc.SetBrush(Brush)
+
+    def SetLineColor(self, LineColor):
+        """
+        Set the LineColor
+
+        :param `LineColor`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetColor`
+         for valid values, or a list of them, one per item
+
+        """
+        self.LineColor = LineColor
+        self._UpdateStyles()
+    SetColor = SetLineColor
+
+    def SetLineStyle(self, LineStyle):
+        """
+        Set the LineStyle
+
+        :param `LineStyle`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetLineStyle`
+         for valid values, or a list of them, one per item
+
+        """
+        self.LineStyle = LineStyle
+        self._UpdateStyles()
+
+    def SetLineWidth(self, LineWidth):
+        """
+        Set the LineWidth
+
+        :param `LineWidth`: line width in pixels, or a list or array of them,
+         one per item
+
+        """
+        self.LineWidth = LineWidth
+        self._UpdateStyles()
+
+    def SetFillColor(self, FillColor):
+        """
+        Set the FillColor
+
+        :param `FillColor`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetColor`
+         for valid values, or a list of them, one per item
+
+        """
+        self.FillColor = FillColor
+        self._UpdateStyles()
+
+    def SetFillStyle(self, FillStyle):
+        """
+        Set the FillStyle
+
+        :param `FillStyle`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetFillStyle`
+         for valid values, or a list of them, one per item
+
+        """
+        self.FillStyle = FillStyle
+        self._UpdateStyles()
+
+    def _GetNumItems(self):
+        return len(self.Points)
+    NumItems = property(_GetNumItems)
+
+    def CalcBoundingBox(self):
+        """Calculate the bounding box of all the items."""
+        Boxes = self._ItemBoxes()
+        if len(Boxes):
+            self.BoundingBox = BBox.asBBox((Boxes[:,:2].min(0),
+                                            Boxes[:,2:].max(0)))
+        else:
+            self.BoundingBox = BBox.NullBBox()
+        if self._Canvas:
+            self._Canvas._BBoxChanged(self)
+
+    def FindHits(self, XY, Tolerance=0):
+        """
+        Returns the indices of the items at the point XY, given in World
+        coordinates, the topmost one first.
+
+        This can be used to figure out which items got hit in a mouse
+        binding callback, with the object's ``HitCoords``.
+
+        :param `XY`: the (x,y) coordinates of the point to look for, it takes a
+         2-tuple or (2,) numpy array in World coordinates
+        :param `Tolerance`: how far from an item the point can be, in World
+         coordinates
+
+        """
+        XY = N.asarray(XY, N.float)
+        return N.flatnonzero(self._HitMask(XY, Tolerance))[::-1]
+
+    def _SetUpDC(self, dc):
+        pass
+
+    def _DrawHitItems(self, dc, Items, Coords):
+        self._DrawItems(dc, Items, Coords)
+
+    def _Draw(self, dc , WorldToPixel, ScaleWorldToPixel, HTdc=None):
+        Coords, Rects, Keep = self._PixelCoords(dc, WorldToPixel, ScaleWorldToPixel)
+        W, H = dc.GetSize().Get()
+        Visible = ((Rects[:,2] >= 0) & (Rects[:,0] <= W) &
+                   (Rects[:,3] >= 0) & (Rects[:,1] <= H))
+        if Keep is not None:
+            Visible &= Keep
+        Items = N.flatnonzero(Visible)
+        if not len(Items):
+            return
+        Coords = Coords[Items]
+
+        self._SetUpDC(dc)
+        if self._StyleIndex is None:
+            self._SetStyle(dc, self._Styles[0])
+            self._DrawItems(dc, Items, Coords)
+        else:
+            # one call for each run of items with the same style
+            Styles = self._StyleIndex[Items]
+            Starts = N.concatenate(([0], N.flatnonzero(N.diff(Styles)) + 1,
+                                    [len(Items)]))
+            for start, end in zip(Starts[:-1], Starts[1:]):
+                self._SetStyle(dc, self._Styles[Styles[start]])
+                self._DrawItems(dc, Items[start:end], Coords[start:end])
+
+        if HTdc and self.HitAble:
+            HTdc.SetPen(self.HitPen)
+            HTdc.SetBrush(self.HitBrush)
+            self._DrawHitItems(HTdc, Items, Coords)
+
+
+class CircleSet(ItemSetMixin, PointsObjectMixin, DrawObject):
+    """Draws a set of circles
+
+    The centers are given by an NX2 array of coordinates, and the
+    diameters, in World coordinates, by one value or one per circle.
+
+    See :class:`~lib.floatcanvas.FloatCanvas.ItemSetMixin` for the styles
+    and hit-testing.
+
+    """
+    def __init__(self, XYs, Diameters,
+                 LineColor = "Black",
+                 LineStyle = "Solid",
+                 LineWidth    = 1,
+                 FillColor    = None,
+                 FillStyle    = "Solid",
+                 InForeground = False):
+        """Default class constructor.
+
+        :param `XYs`: the (x, y) coordinates of the centers, a sequence of
+         2-tuples, or a NX2 `NumPy <http://www.numpy.org/>`_ array
+        :param `Diameters`: the diameter of all circles, or an array of N
+         diameters
+        :param `LineColor`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetColor`
+        :param `LineStyle`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetLineStyle`
+        :param `LineWidth`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetLineWidth`
+        :param `FillColor`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetColor`
+        :param `FillStyle`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetFillStyle`
+        :param boolean `InForeground`: should object be in foreground
+
+        The style parameters can be lists with one value per circle.
+
+        """
+        DrawObject.__init__(self, InForeground)
+
+        self.Points = N.array(XYs, N.float)
+        self.Points.shape = (-1, 2)
+        self.SetDiameters(Diameters)
+
+        self.LineColor = LineColor
+        self.LineStyle = LineStyle
+        self.LineWidth = LineWidth
+        self.FillColor = FillColor
+        self.FillStyle = FillStyle
+
+        # these define the behaviour when zooming makes the circles really small.
+        self.MinSize = 1
+        self.DisappearWhenSmall = True
+
+        self._UpdateStyles()
+
+    def SetDiameters(self, Diameters):
+        """Set the diameters of the circles
+
+        :param `Diameters`: one diameter for all circles, or an array of N
+         diameters
+
+        """
+        self.Diameters = N.empty(len(self.Points), N.float)
+        self.Diameters[:] = Diameters
+        self.CalcBoundingBox()
+
+    def _ItemBoxes(self):
+        R = (self.Diameters / 2)[:,None]
+        return N.hstack((self.Points - R, self.Points + R))
+
+    def _HitMask(self, XY, Tolerance):
+        d = self.Points - XY
+        return N.hypot(d[:,0], d[:,1]) <= self.Diameters / 2 + Tolerance
+
+    def _PixelCoords(self, dc, WorldToPixel, ScaleWorldToPixel):
+        XY = WorldToPixel(self.Points)
+        R = N.abs(ScaleWorldToPixel(N.column_stack((self.Diameters / 2,
+                                                    self.Diameters / 2))))[:,0]
+        Keep = None
+        R[R < self.MinSize] = self.MinSize
+        if self.DisappearWhenSmall:
+            Keep = R > self.MinSize
+        Rects = N.column_stack((XY - R[:,None], XY + R[:,None]))
+        Coords = N.column_stack((XY - R[:,None], 2 * R, 2 * R))
+        return Coords, Rects, Keep
+
+    def _DrawItems(self, dc, Items, Coords):
+        dc.DrawEllipseList(Coords)
+
+
+class RectangleSet(ItemSetMixin, PointsObjectMixin, DrawObject):
+    """Draws a set of rectangles
+
+    The corners are given by an NX2 array of coordinates, and the widths
+    and heights, in World coordinates, by one (w, h) pair or an NX2 array.
+
+    See :class:`~lib.floatcanvas.FloatCanvas.ItemSetMixin` for the styles
+    and hit-testing.
+
+    """
+    def __init__(self, XYs, WHs,
+                 LineColor = "Black",
+                 LineStyle = "Solid",
+                 LineWidth    = 1,
+                 FillColor    = None,
+                 FillStyle    = "Solid",
+                 InForeground = False):
+        """Default class constructor.
+
+        :param `XYs`: the (x, y) coordinates of the corners, a sequence of
+         2-tuples, or a NX2 `NumPy <http://www.numpy.org/>`_ array
+        :param `WHs`: the width and height of all rectangles, or an NX2
+         array of them
+        :param `LineColor`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetColor`
+        :param `LineStyle`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetLineStyle`
+        :param `LineWidth`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetLineWidth`
+        :param `FillColor`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetColor`
+        :param `FillStyle`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetFillStyle`
+        :param boolean `InForeground`: should object be in foreground
+
+        The style parameters can be lists with one value per rectangle.
+
+        """
+        DrawObject.__init__(self, InForeground)
+
+        self.Points = N.array(XYs, N.float)
+        self.Points.shape = (-1, 2)
+        self.SetSizes(WHs)
+
+        self.LineColor = LineColor
+        self.LineStyle = LineStyle
+        self.LineWidth = LineWidth
+        self.FillColor = FillColor
+        self.FillStyle = FillStyle
+
+        # these define the behaviour when zooming makes the rectangles really small.
+        self.MinSize = 1
+        self.DisappearWhenSmall = True
+
+        self._UpdateStyles()
+
+    def SetSizes(self, WHs):
+        """Set the sizes of the rectangles
+
+        :param `WHs`: the width and height of all rectangles, or an NX2
+         array of them
+
+        """
+        self.WHs = N.empty(self.Points.shape, N.float)
+        self.WHs[:] = WHs
+        self.CalcBoundingBox()
+
+    def _ItemBoxes(self):
+        Corners = self.Points + self.WHs
+        return N.hstack((N.minimum(self.Points, Corners),
+                         N.maximum(self.Points, Corners)))
+
+    def _HitMask(self, XY, Tolerance):
+        Boxes = self._ItemBoxes()
+        return ((Boxes[:,0] - Tolerance <= XY[0]) & (XY[0] <= Boxes[:,2] + Tolerance) &
+                (Boxes[:,1] - Tolerance <= XY[1]) & (XY[1] <= Boxes[:,3] + Tolerance))
+
+    def _PixelCoords(self, dc, WorldToPixel, ScaleWorldToPixel):
+        XY = WorldToPixel(self.Points)
+        WH = ScaleWorldToPixel(self.WHs)
+        # you need this in case Width or Height are negative (the y axis
+        # always flips)
+        XY = N.minimum(XY, XY + WH)
+        WH = N.abs(WH)
+        Keep = None
+        WH[WH < self.MinSize] = self.MinSize
+        if self.DisappearWhenSmall:
+            Keep = WH.min(1) > self.MinSize
+        Rects = N.column_stack((XY, XY + WH))
+        Coords = N.column_stack((XY, WH))
+        return Coords, Rects, Keep
+
+    def _DrawItems(self, dc, Items, Coords):
+        dc.DrawRectangleList(Coords)
+
+
+class LineSet(ItemSetMixin, PointsObjectMixin, DrawObject):
+    """Draws a set of separate line segments
+
+    The segments are given by an NX2X2 array: Segments[N] holds the
+    start and end points of segment N. ``Points`` holds them as a 2NX2
+    array.
+
+    See :class:`~lib.floatcanvas.FloatCanvas.ItemSetMixin` for the styles
+    and hit-testing.
+
+    """
+    StyleAttributes = ("LineColor", "LineStyle", "LineWidth")
+
+    def __init__(self, Segments,
+                 LineColor = "Black",
+                 LineStyle = "Solid",
+                 LineWidth    = 1,
+                 InForeground = False):
+        """Default class constructor.
+
+        :param `Segments`: a sequence of ((x1, y1), (x2, y2)) pairs, or an
+         NX2X2 or NX4 `NumPy <http://www.numpy.org/>`_ array
+        :param `LineColor`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetColor`
+        :param `LineStyle`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetLineStyle`
+        :param `LineWidth`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetLineWidth`
+        :param boolean `InForeground`: should object be in foreground
+
+        The style parameters can be lists with one value per segment.
+
+        """
+        DrawObject.__init__(self, InForeground)
+
+        self.Points = N.array(Segments, N.float)
+        self.Points.shape = (-1, 2)
+        self.CalcBoundingBox()
+
+        self.LineColor = LineColor
+        self.LineStyle = LineStyle
+        self.LineWidth = LineWidth
+
+        self._UpdateStyles()
+
+    def _GetNumItems(self):
+        return len(self.Points) // 2
+    NumItems = property(_GetNumItems)
+
+    def _ItemBoxes(self):
+        Ends = self.Points.reshape((-1, 4))
+        return N.hstack((N.minimum(Ends[:,:2], Ends[:,2:]),
+                         N.maximum(Ends[:,:2], Ends[:,2:])))
+
+    def _HitMask(self, XY, Tolerance):
+        Ends = self.Points.reshape((-1, 4))
+        Start = Ends[:,:2]
+        Dir = Ends[:,2:] - Start
+        Length2 = (Dir**2).sum(1)
+        Length2[Length2 == 0] = 1 # zero length segments are points
+        # the closest point of each segment to XY
+        t = N.clip(((XY - Start) * Dir).sum(1) / Length2, 0, 1)
+        d = Start + Dir * t[:,None] - XY
+        return N.hypot(d[:,0], d[:,1]) <= Tolerance
+
+    def _PixelCoords(self, dc, WorldToPixel, ScaleWorldToPixel):
+        Coords = WorldToPixel(self.Points).reshape((-1, 4))
+        Rects = N.hstack((N.minimum(Coords[:,:2], Coords[:,2:]),
+                          N.maximum(Coords[:,:2], Coords[:,2:])))
+        return Coords, Rects, None
+
+    def _MakeStyle(self, LineColor, LineStyle, LineWidth):
+        Pen, Brush = ItemSetMixin._MakeStyle(self, LineColor, LineStyle, LineWidth)
+        return Pen
+
+    def _SetStyle(self, dc, Pen):
+        dc.SetPen(Pen)
+
+    def _DrawItems(self, dc, Items, Coords):
+        dc.DrawLineList(Coords)
+
+
+class TextSet(ItemSetMixin, PointsObjectMixin, TextObjectMixin, DrawObject):
+    """Draws a set of text strings
+
+    All the strings use the same font, and their size is fixed, like
+    :class:`~lib.floatcanvas.FloatCanvas.Text`. The Color can be one
+    value or one per string.
+
+    The hit-test is done on the entire text extent of each string. See
+    :class:`~lib.floatcanvas.FloatCanvas.ItemSetMixin` for the styles and
+    hit-testing.
+
+    """
+    StyleAttributes = ("Color",)
+
+    def __init__(self, Strings, XYs,
+                 Size =  14,
+                 Color = "Black",
+                 BackgroundColor = None,
+                 Family = wx.MODERN,
+                 Style = wx.NORMAL,
+                 Weight = wx.NORMAL,
+                 Underlined = False,
+                 Position = 'tl',
+                 InForeground = False,
+                 Font = None):
+        """Default class constructor.
+
+        :param `Strings`: a sequence of N strings to draw
+        :param `XYs`: the (x, y) coordinates of the strings, a sequence of
+         2-tuples, or a NX2 `NumPy <http://www.numpy.org/>`_ array
+        :param `Size`: the font size
+        :param `Color`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetColor`,
+         or a list of them, one per string
+        :param `BackgroundColor`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetColor`
+        :param FontFamily `Family`: a valid :ref:`FontFamily`
+        :param FontStyle `Style`: a valid :ref:`FontStyle`
+        :param FontWeight `Weight`: a valid :ref:`FontWeight`
+        :param boolean `Underlined`: underline the text
+        :param string `Position`: where the strings are in relation to their
+         coordinates, see :class:`~lib.floatcanvas.FloatCanvas.Text`
+        :param boolean `InForeground`: should object be in foreground
+        :param Font `Font`: alternatively you can define :ref:`Font` and the
+         above will be ignored.
+
+        """
+        DrawObject.__init__(self, InForeground)
+
+        self.Strings = list(Strings)
+        self.Points = N.array(XYs, N.float)
+        self.Points.shape = (-1, 2)
+        if len(self.Strings) != len(self.Points):
+            raise FloatCanvasError("There must be one coordinate per string")
+        self.CalcBoundingBox()
+
+        self.Size = Size * FontScale
+        self.Color = Color
+        self.BackgroundColor = BackgroundColor
+
+        if not Font:
+            FaceName = ''
+        else:
+            FaceName           =  Font.GetFaceName()
+            Family             =  Font.GetFamily()
+            Size               =  Font.GetPointSize()
+            Style              =  Font.GetStyle()
+            Underlined         =  Font.GetUnderlined()
+            Weight             =  Font.GetWeight()
+        self.SetFont(Size, Family, Style, Weight, Underlined, FaceName)
+
+        # the pixel sizes of the strings, computed when first drawn
+        self.TextSizes = None
+        self.ShiftFun = self.ShiftFunDict[Position]
+
+        self._UpdateStyles()
+
+    def SetColor(self, Color):
+        """
+        Set the Color
+
+        :param `Color`: see :meth:`~lib.floatcanvas.FloatCanvas.DrawObject.SetColor`
+         for valid values, or a list of them, one per string
+
+        """
+        self.Color = Color
+        self._UpdateStyles()
+
+    def SetText(self, Strings):
+        """
+        Re-sets the strings displayed by the object
+
+        :param `Strings`: a sequence of N strings
+
+        """
+        self.Strings = list(Strings)
+        self.TextSizes = None
+
+    def _ItemBoxes(self):
+        # Note the BB is just the points, as the size in World coordinates is not fixed
+        return N.hstack((self.Points, self.Points))
+
+    def _MakeStyle(self, Color):
+        return Color
+
+    def _SetStyle(self, dc, Color):
+        dc.SetTextForeground(Color)
+
+    def _SetUpDC(self, dc):
+        dc.SetFont(self.Font)
+        if self.BackgroundColor:
+            dc.SetBackgroundMode(wx.SOLID)
+            dc.SetTextBackground(self.BackgroundColor)
+        else:
+            dc.SetBackgroundMode(wx.TRANSPARENT)
+
+    def _TopLefts(self, XY):
+        # the corners of the strings, given their anchor points
+        W, H = self.TextSizes[:,0], self.TextSizes[:,1]
+        X, Y = self.ShiftFun(XY[:,0], XY[:,1], W, H)
+        return N.column_stack((X, Y))
+
+    def _CalcTextSizes(self, dc):
+        if self.TextSizes is None:
+            dc.SetFont(self.Font)
+            Sizes = {}
+            for s in self.Strings:
+                if s not in Sizes:
+                    Sizes[s] = tuple(dc.GetTextExtent(s))
+            self.TextSizes = N.array([Sizes[s] for s in self.Strings],
+                                     N.int).reshape((-1, 2))
+
+    def _PixelExtent(self, dc):
+        self._CalcTextSizes(dc)
+        if not len(self.TextSizes):
+            return 0
+        return int(self.TextSizes.max())
+
+    def _PixelCoords(self, dc, WorldToPixel, ScaleWorldToPixel):
+        self._CalcTextSizes(dc)
+        Coords = self._TopLefts(WorldToPixel(self.Points)).astype(N.int)
+        Rects = N.column_stack((Coords, Coords + self.TextSizes))
+        return Coords, Rects, None
+
+    def _HitMask(self, XY, Tolerance):
+        if self.TextSizes is None or self._Canvas is None:
+            d = self.Points - XY
+            return N.hypot(d[:,0], d[:,1]) <= Tolerance
+        # the same layout as when drawn, in pixels relative to XY
+        Corners = self._TopLefts(self._Canvas.ScaleWorldToPixel(self.Points - XY))
+        Tol = N.abs(self._Canvas.ScaleWorldToPixel((Tolerance, Tolerance)))
+        return ((Corners[:,0] - Tol[0] <= 0) &
+                (Corners[:,0] + self.TextSizes[:,0] + Tol[0] >= 0) &
+                (Corners[:,1] - Tol[1] <= 0) &
+                (Corners[:,1] + self.TextSizes[:,1] + Tol[1] >= 0))
+
+    def _DrawItems(self, dc, Items, Coords):
+        dc.DrawTextList([self.Strings[i] for i in Items], Coords)
+
+    def _DrawHitItems(self, dc, Items, Coords):
+        dc.DrawRectangleList(N.column_stack((Coords, self.TextSizes[Items])))
 
 
 #---------------------------------------------------------------------------
@@ -2906,6 +3577,16 @@ class FloatCanvas(wx.Panel):
 
         self.NumBetweenBlits = 500
 
+        ## Draw lists with at least this many objects get a spatial index
+        ## for culling, None to never index them.
+        self.SpatialIndexThreshold = 2000
+        self._DrawIndex = None
+        self._ForeDrawIndex = None
+
+        self._TileCache = None
+        self._TileRange = None
+        self._TileExtent = None
+
         ## create the Hit Test Dicts:
         self.HitDict = None
         self._HTdc = None
@@ -3322,6 +4003,8 @@ class FloatCanvas(wx.Panel):
 
         dc = wx.MemoryDC()
         dc.SelectObject(self._Buffer)
+        if Force:
+            self._InvalidateTiles()
         if self._BackgroundDirty or Force:
             dc.SetBackground(self.BackgroundBrush)
             dc.Clear()
@@ -3333,7 +4016,10 @@ class FloatCanvas(wx.Panel):
                 HTdc = None
             if self.GridUnder is not None:
                 self.GridUnder._Draw(dc, self)
-            self._DrawObjects(dc, self._DrawList, ScreenDC, self.ViewPortBB, HTdc)
+            if self._TileCache is not None and self.GridUnder is None:
+                self._DrawTiles(dc, HTdc)
+            else:
+                self._DrawObjects(dc, self._DrawList, ScreenDC, self.ViewPortBB, HTdc)
             self._BackgroundDirty = False
             del HTdc
 
@@ -3391,6 +4077,98 @@ class FloatCanvas(wx.Panel):
         return redrawlist
     _ShouldRedraw = staticmethod(_ShouldRedraw)
 
+    def _GetIndex(self, DrawList):
+        """
+        Return the spatial index of one of the draw lists, building it if the
+        list has become big enough, or None if it isn't indexed.
+        """
+        if DrawList is self._DrawList:
+            name = '_DrawIndex'
+        elif DrawList is self._ForeDrawList:
+            name = '_ForeDrawIndex'
+        else:
+            return None
+        index = getattr(self, name)
+        # The index is rebuilt if the list was changed behind its back
+        if index is None or len(index) != len(DrawList):
+            if (self.SpatialIndexThreshold is None or
+                len(DrawList) < self.SpatialIndexThreshold):
+                index = None
+            else:
+                index = SpatialIndex()
+                index.Build(DrawList)
+            setattr(self, name, index)
+        return index
+
+    def _IndexObject(self, obj):
+        index = self._ForeDrawIndex if obj.InForeground else self._DrawIndex
+        if index is not None:
+            index.Insert(obj)
+
+    def _UnIndexObject(self, obj):
+        index = self._ForeDrawIndex if obj.InForeground else self._DrawIndex
+        if index is not None:
+            index.Remove(obj)
+
+    def _BBoxChanged(self, obj):
+        """
+        Called by the DrawObjects on the canvas when their bounding box
+        changes.
+        """
+        self.BoundingBoxDirty = True
+        if obj.InForeground:
+            index = self._ForeDrawIndex
+        else:
+            index = self._DrawIndex
+            self._InvalidateTiles()
+        if index is not None:
+            index.Update(obj)
+
+    def _ObjectsInBB(self, DrawList, BB):
+        index = self._GetIndex(DrawList)
+        if index is None:
+            return self._ShouldRedraw(DrawList, BB)
+        return index.Query(BB)
+
+    def ObjectsInBB(self, BB):
+        """
+        Return the objects on the canvas whose bounding box overlaps BB, in
+        the order they are drawn: the background objects first, then the
+        foreground ones.
+
+        :param `BB`: a :class:`~lib.floatcanvas.Utilities.BBox.BBox`, or a 2x2
+         array of world coordinates
+        
+        """
+        BB = BBox.asBBox(BB)
+        return (self._ObjectsInBB(self._DrawList, BB) +
+                self._ObjectsInBB(self._ForeDrawList, BB))
+
+    def ObjectsAtPoint(self, xy, Tolerance=3, CoordType='Pixel'):
+        """
+        Return the visible objects whose bounding box is within Tolerance
+        pixels of a point, the topmost one first.
+
+        Unlike the hit tests done with events bound to the objects, this only
+        looks at bounding boxes, and works for any object, without drawing
+        the hit test bitmaps. With a spatial index on the draw lists it is
+        cheap for any number of objects.
+
+        :param `xy`: a (x, y) point
+        :param integer `Tolerance`: the distance in pixels
+        :param string `CoordType`: the coordinates of xy, "Pixel" or "World"
+
+        """
+        if CoordType == 'Pixel':
+            xy = self.PixelToWorld(xy)
+        elif CoordType != 'World':
+            raise FloatCanvasError('CoordType must be either "Pixel" or "World"')
+        xy = N.asarray(xy, N.float)
+        Delta = N.abs(self.ScalePixelToWorld((Tolerance, Tolerance)))
+        Objects = self.ObjectsInBB((xy - Delta, xy + Delta))
+        Objects.reverse()
+        return [Object for Object in Objects if Object.Visible]
+
     def MoveImage(self, shift, CoordType, ReDraw=True):
         """
         Move the image in the window.
@@ -3536,6 +4314,8 @@ class FloatCanvas(wx.Panel):
         else:
             self._DrawList.remove(Object)
             self._BackgroundDirty = True
+            self._InvalidateTiles()
+        self._UnIndexObject(Object)
         if ResetBB:
             self.BoundingBoxDirty = True
 
@@ -3550,7 +4330,10 @@ class FloatCanvas(wx.Panel):
         """
         self._DrawList = []
         self._ForeDrawList = []
+        self._DrawIndex = None
+        self._ForeDrawIndex = None
         self._BackgroundDirty = True
+        self._InvalidateTiles()
         self.HitColorGenerator = None
         self.UseHitTest = False
         if ResetBB:
@@ -3642,6 +4425,8 @@ class FloatCanvas(wx.Panel):
         else:
             self._DrawList.append(obj)
             self._BackgroundDirty = True
+            self._InvalidateTiles()
+        self._IndexObject(obj)
         self.BoundingBoxDirty = True
         return obj
 
@@ -3669,12 +4454,186 @@ class FloatCanvas(wx.Panel):
         ScaleWorldToPixel = self.ScaleWorldToPixel # for speed
         Blit = ScreenDC.Blit # for speed
         NumBetweenBlits = self.NumBetweenBlits # for speed
-        for i, Object in enumerate(self._ShouldRedraw(DrawList, ViewPortBB)):
+        for i, Object in enumerate(self._ObjectsInBB(DrawList, ViewPortBB)):
             if Object.Visible:
                 Object._Draw(dc, WorldToPixel, ScaleWorldToPixel, HTdc)
                 if (i+1) % NumBetweenBlits == 0:
                     Blit(0, 0, PanelSize0, PanelSize1, dc, 0, 0)
 
+    def EnableTileCache(self, TileSize=256, MaxBytes=64*1024*1024,
+                        Margin=32, Prefetch=1):
+        """
+        Draw the background in tiles, and keep the tiles for re-use.
+
+        The tiles are kept for each zoom level, so that panning only
+        renders the tiles that come into view, and zooming back to a
+        previous level re-uses the tiles rendered then. When the
+        application is idle, the tiles just around the viewport are
+        rendered ahead of time.
+
+        Any change to the background objects through the canvas, or to
+        their bounding boxes, throws the tiles away. If you change a
+        DrawObject's appearance directly, call ``Draw(Force=True)``.
+
+        Objects whose size is fixed in pixels (text, points, bitmaps and so
+        on) only have a point as a bounding box, so the objects drawn in a
+        tile are looked for in a box made bigger by the largest pixel size
+        of the background objects, plus `Margin` pixels for the width of
+        the lines. The tiles are not used when there is a GridUnder.
+
+        :param integer `TileSize`: the width and height of the tiles in pixels
+        :param integer `MaxBytes`: the memory the tiles can take
+        :param integer `Margin`: how far from a tile, in pixels, objects are
+         drawn in it, on top of the pixel size of the objects
+        :param integer `Prefetch`: how many rings of tiles around the viewport
+         get rendered when idle, 0 for none
+
+        """
+        if self._TileCache is None:
+            self.Bind(wx.EVT_IDLE, self.OnIdle)
+        self._TileCache = TileCache(MaxBytes)
+        self._TileRange = None
+        self.TileSize = TileSize
+        self.TileMargin = Margin
+        self.TilePrefetch = Prefetch
+        self._BackgroundDirty = True
+
+    def DisableTileCache(self):
+        """Stop drawing the background in tiles, and free them."""
+        if self._TileCache is not None:
+            self.Unbind(wx.EVT_IDLE, handler=self.OnIdle)
+        self._TileCache = None
+        self._TileRange = None
+        self._BackgroundDirty = True
+
+    def GetTileCacheStats(self):
+        """
+        Return the statistics of the tile cache, see
+        :meth:`~lib.floatcanvas.Utilities.TileCache.TileCache.Stats`, or None
+        if it isn't enabled.
+        """
+        if self._TileCache is None:
+            return None
+        return self._TileCache.Stats()
+
+    def _InvalidateTiles(self):
+        if self._TileCache is not None:
+            self._TileCache.Clear()
+        self._TileExtent = None
+
+    def _TileBytes(self, WithHT):
+        Bytes = self.TileSize * self.TileSize * 4
+        if WithHT:
+            Bytes *= 2
+        return Bytes
+
+    def _DrawTiles(self, dc, HTdc):
+        TS = self.TileSize
+        Level = tuple(self.TransformVector)
+        # The tiles are laid out in "global" pixel coordinates,
+        # World * TransformVector, which are shifted by Offset on screen.
+        Offset = N.floor(self.HalfPanelSize -
+                         self.ViewPortCenter * self.TransformVector + 0.5)
+        OffsetX, OffsetY = int(Offset[0]), int(Offset[1])
+        x0, y0 = -OffsetX // TS, -OffsetY // TS
+        x1 = (int(self.PanelSize[0]) - 1 - OffsetX) // TS
+        y1 = (int(self.PanelSize[1]) - 1 - OffsetY) // TS
+        WithHT = HTdc is not None
+        self._TileRange = (Level, x0, y0, x1, y1, WithHT)
+
+        TileDC = wx.MemoryDC()
+        for j in range(y0, y1 + 1):
+            for i in range(x0, x1 + 1):
+                Tile, HTTile = self._GetTile(Level, i, j, WithHT)
+                x, y = i * TS + OffsetX, j * TS + OffsetY
+                TileDC.SelectObject(Tile)
+                dc.Blit(x, y, TS, TS, TileDC, 0, 0)
+                if WithHT:
+                    TileDC.SelectObject(HTTile)
+                    HTdc.Blit(x, y, TS, TS, TileDC, 0, 0)
+        TileDC.SelectObject(wx.NullBitmap)
+
+    def _GetTile(self, Level, i, j, WithHT):
+        Tile = self._TileCache.Get((Level, i, j))
+        if Tile is None or (WithHT and Tile[1] is None):
+            Tile = self._RenderTile(i, j, WithHT)
+            self._TileCache.Put((Level, i, j), Tile, self._TileBytes(WithHT))
+        return Tile
+
+    def _RenderTile(self, i, j, WithHT):
+        """
+        Draws the background objects in one tile at the current zoom level.
+        Returns the bitmap and the hit test bitmap, or None.
+        """
+        TS = self.TileSize
+        TransformVector = self.TransformVector
+        Origin = N.array((i * TS, j * TS), N.float)
+        Corners = N.array((Origin, Origin + TS)) / TransformVector
+        TileBB = N.array((N.minimum.reduce(Corners), N.maximum.reduce(Corners)))
+
+        def WorldToPixel(Coordinates):
+            return ((N.asarray(Coordinates, N.float) * TransformVector) -
+                    Origin).astype('i')
+
+        Tile = wx.Bitmap(TS, TS)
+        dc = wx.MemoryDC()
+        dc.SelectObject(Tile)
+        dc.SetBackground(self.BackgroundBrush)
+        dc.Clear()
+        if WithHT:
+            HTTile = wx.Bitmap(TS, TS, depth=self.HitTestBitmapDepth)
+            HTdc = wx.MemoryDC()
+            HTdc.SelectObject(HTTile)
+            HTdc.Clear()
+        else:
+            HTTile = HTdc = None
+
+        # The objects drawn in the tile are the ones whose bounding box is
+        # close enough that their pixel sized parts can reach into it
+        if self._TileExtent is None:
+            self._TileExtent = max([Object._PixelExtent(dc)
+                                    for Object in self._DrawList] or [0])
+        Margin = (self.TileMargin + self._TileExtent) / N.abs(TransformVector)
+        DrawBB = N.array((TileBB[0] - Margin, TileBB[1] + Margin))
+
+        # Some objects look at the viewport to figure out what to draw
+        ViewPortBB = self.ViewPortBB
+        self.ViewPortBB = TileBB
+        try:
+            for Object in self._ObjectsInBB(self._DrawList, DrawBB):
+                if Object.Visible:
+                    Object._Draw(dc, WorldToPixel, self.ScaleWorldToPixel, HTdc)
+        finally:
+            self.ViewPortBB = ViewPortBB
+        dc.SelectObject(wx.NullBitmap)
+        if HTdc is not None:
+            HTdc.SelectObject(wx.NullBitmap)
+        return Tile, HTTile
+
+    def OnIdle(self, event):
+        """
+        Idle handler, renders one of the tiles around the viewport that
+        isn't in the tile cache yet.
+        """
+        event.Skip()
+        if self._TileCache is None or self._TileRange is None:
+            return
+        Level, x0, y0, x1, y1, WithHT = self._TileRange
+        if Level != tuple(self.TransformVector) or not self.TilePrefetch:
+            return
+        Bytes = self._TileBytes(WithHT)
+        P = self.TilePrefetch
+        for j in range(y0 - P, y1 + P + 1):
+            for i in range(x0 - P, x1 + P + 1):
+                if (Level, i, j) not in self._TileCache:
+                    # Never evict tiles to make room for these
+                    if not self._TileCache.Fits(Bytes):
+                        return
+                    self._TileCache.Put((Level, i, j),
+                                        self._RenderTile(i, j, WithHT), Bytes)
+                    event.RequestMore()
+                    return
+
     def SaveAsImage(self, filename, ImageType=wx.BITMAP_TYPE_PNG):
         """
         Saves the current image as an image file.
@@ -3691,7 +4650,8 @@ class FloatCanvas(wx.Panel):
 def _makeFloatCanvasAddMethods(): ## lrk's code for doing this in module __init__
     classnames = ["Circle", "Ellipse", "Arc", "Rectangle", "ScaledText", "Polygon",
                   "Line", "Text", "PointSet","Point", "Arrow", "ArrowLine", "ScaledTextBox",
-                  "SquarePoint","Bitmap", "ScaledBitmap", "Spline", "Group"]
+                  "SquarePoint","Bitmap", "ScaledBitmap", "Spline", "Group",
+                  "CircleSet", "RectangleSet", "LineSet", "TextSet"]
     for classname in classnames:
         klass = globals()[classname]
         def getaddshapemethod(klass=klass):
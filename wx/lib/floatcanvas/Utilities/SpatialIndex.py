@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+#----------------------------------------------------------------------------
+# Name:         SpatialIndex.py
+# Purpose:      A uniform grid index of the Bounding Boxes of DrawObjects
+#
+# Author:
+#
+# Created:
+# Version:
+# Date:
+# Licence:
+# Tags:         phoenix-port
+#----------------------------------------------------------------------------
+"""
+A uniform grid spatial index of objects with a Bounding Box
+
+The FloatCanvas uses it to find the objects in the viewport, or under the
+mouse, without looking at every object on the canvas.
+
+"""
+
+from math import floor, sqrt
+
+
+class SpatialIndex(object):
+    """
+    A uniform grid index of objects with a ``BoundingBox`` attribute.
+
+    Each object is stored in every grid cell its Bounding Box touches, so a
+    query only looks at the objects in the cells the query box touches.
+    Objects that would span more than `MaxCells` cells (including those with
+    an infinite Bounding Box) are kept in a separate list that is checked on
+    every query. Objects with a Null Bounding Box are kept, but never found.
+
+    The index remembers the order the objects were inserted in, and queries
+    return the objects in that order, which is the order they get drawn in.
+
+    The Bounding Box of an object is read when it is inserted or updated: call
+    :meth:`Update` whenever an indexed object's Bounding Box changes.
+
+    """
+    def __init__(self, CellSize=None, MaxCells=64):
+        """
+        Default class constructor.
+
+        :param float `CellSize`: the width and height of a grid cell in world
+         coordinates. If ``None``, it is chosen by :meth:`Build`, or from the
+         first object inserted.
+        :param integer `MaxCells`: the number of cells an object can span
+         before it is put in the list of large objects
+
+        """
+        self.CellSize = CellSize
+        self.MaxCells = MaxCells
+        self.Clear()
+
+    def Clear(self):
+        """Remove all the objects from the index."""
+        self._cells = {}
+        self._entries = {} # obj -> (x0, y0, x1, y1, cell range or None)
+        self._order = {}
+        self._large = set()
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, obj):
+        return obj in self._order
+
+    def Build(self, Objects):
+        """
+        Clear the index and insert Objects. The cell size is chosen from the
+        sizes of the Bounding Boxes and the area they cover, unless it was
+        given to the constructor.
+
+        :param `Objects`: a sequence of objects, in drawing order
+
+        """
+        self.Clear()
+        if self.CellSize is None:
+            self.CellSize = self._ChooseCellSize(Objects)
+        for obj in Objects:
+            self.Insert(obj)
+
+    def _ChooseCellSize(self, Objects, SampleSize=1000):
+        # Only a sample of the objects is looked at
+        Objects = list(Objects)
+        Objects = Objects[::max(1, len(Objects) // SampleSize)]
+        sizes = []
+        MinX = MinY = float('inf')
+        MaxX = MaxY = float('-inf')
+        for obj in Objects:
+            box = _Box(obj.BoundingBox)
+            if box is None or not _IsFinite(box):
+                continue
+            x0, y0, x1, y1 = box
+            sizes.append(max(x1 - x0, y1 - y0))
+            MinX, MinY = min(MinX, x0), min(MinY, y0)
+            MaxX, MaxY = max(MaxX, x1), max(MaxY, y1)
+        if not sizes:
+            return 1.0
+        sizes.sort()
+        # Cells about the size of a typical object, but no smaller than it
+        # takes to have about one object per cell.
+        Size = max(sizes[len(sizes) // 2],
+                   sqrt((MaxX - MinX) * (MaxY - MinY) / len(sizes)),
+                   (MaxX - MinX) / 4096.0, (MaxY - MinY) / 4096.0)
+        return Size or 1.0
+
+    def _CellRange(self, box):
+        Size = self.CellSize
+        x0, y0, x1, y1 = box
+        return (int(floor(x0 / Size)), int(floor(y0 / Size)),
+                int(floor(x1 / Size)), int(floor(y1 / Size)))
+
+    def Insert(self, obj):
+        """
+        Add an object to the index, after all the objects already in it.
+
+        :param `obj`: the object, which must have a ``BoundingBox``
+
+        """
+        if obj in self._order:
+            self.Remove(obj)
+        self._order[obj] = self._seq
+        self._seq += 1
+        self._Add(obj)
+
+    def _Add(self, obj):
+        box = _Box(obj.BoundingBox)
+        if box is None:
+            self._entries[obj] = None
+            return
+        x0, y0, x1, y1 = box
+        if self.CellSize is None:
+            self.CellSize = max(x1 - x0, y1 - y0) if _IsFinite(box) else 0
+            self.CellSize = self.CellSize or 1.0
+
+        Range = None
+        if _IsFinite(box):
+            Size = self.CellSize
+            ix0, iy0 = int(floor(x0 / Size)), int(floor(y0 / Size))
+            ix1, iy1 = int(floor(x1 / Size)), int(floor(y1 / Size))
+            if (ix1 - ix0 + 1) * (iy1 - iy0 + 1) <= self.MaxCells:
+                Range = (ix0, iy0, ix1, iy1)
+        self._entries[obj] = (x0, y0, x1, y1, Range)
+
+        if Range is None:
+            self._large.add(obj)
+            return
+        cells = self._cells
+        for ix in xrange(ix0, ix1 + 1):
+            for iy in xrange(iy0, iy1 + 1):
+                cell = cells.get((ix, iy))
+                if cell is None:
+                    cells[ix, iy] = set((obj,))
+                else:
+                    cell.add(obj)
+
+    def Remove(self, obj):
+        """
+        Remove an object from the index. Objects not in the index are ignored.
+
+        :param `obj`: the object to remove
+
+        """
+        if obj not in self._order:
+            return
+        self._Discard(obj)
+        del self._order[obj]
+
+    def _Discard(self, obj):
+        entry = self._entries.pop(obj)
+        if entry is None:
+            return
+        Range = entry[4]
+        if Range is None:
+            self._large.discard(obj)
+            return
+        cells = self._cells
+        ix0, iy0, ix1, iy1 = Range
+        for ix in xrange(ix0, ix1 + 1):
+            for iy in xrange(iy0, iy1 + 1):
+                cell = cells[ix, iy]
+                cell.discard(obj)
+                if not cell:
+                    del cells[ix, iy]
+
+    def Update(self, obj):
+        """
+        Re-index an object after its Bounding Box changed. It keeps its place
+        in the drawing order. Objects not in the index are ignored.
+
+        :param `obj`: the object that changed
+
+        """
+        if obj not in self._order:
+            return
+        self._Discard(obj)
+        self._Add(obj)
+
+    def Query(self, BB):
+        """
+        Return the objects whose Bounding Box overlaps BB, in the order they
+        were inserted. Boxes that just touch overlap.
+
+        :param `BB`: a Bounding Box, or anything indexed like one
+
+        """
+        box = _Box(BB)
+        if box is None:
+            return []
+        qx0, qy0, qx1, qy1 = box
+        entries = self._entries
+
+        found = set()
+        if _IsFinite(box) and self.CellSize is not None:
+            ix0, iy0, ix1, iy1 = self._CellRange(box)
+            NumCells = (ix1 - ix0 + 1) * (iy1 - iy0 + 1)
+        else:
+            NumCells = None
+        if NumCells is None or NumCells > len(entries):
+            # Looking at every cell in the query box would take longer than
+            # looking at every object.
+            candidates = entries.iterkeys()
+        else:
+            cells = self._cells
+            for ix in xrange(ix0, ix1 + 1):
+                for iy in xrange(iy0, iy1 + 1):
+                    cell = cells.get((ix, iy))
+                    if cell:
+                        found.update(cell)
+            found.update(self._large)
+            candidates = found
+            found = set()
+
+        for obj in candidates:
+            entry = entries[obj]
+            if (entry is not None and
+                entry[2] >= qx0 and entry[0] <= qx1 and
+                entry[3] >= qy0 and entry[1] <= qy1):
+                found.add(obj)
+        return sorted(found, key=self._order.__getitem__)
+
+    def QueryPoint(self, XY, Tolerance=0.0):
+        """
+        Return the objects whose Bounding Box is within Tolerance of the point
+        XY, in the order they were inserted.
+
+        :param `XY`: a (x, y) pair
+        :param float `Tolerance`: the distance in world coordinates
+
+        """
+        x, y = float(XY[0]), float(XY[1])
+        return self.Query(((x - Tolerance, y - Tolerance),
+                           (x + Tolerance, y + Tolerance)))
+
+
+def _Box(BB):
+    # A Bounding Box as a tuple of floats, or None if it is Null
+    x0, y0 = float(BB[0][0]), float(BB[0][1])
+    x1, y1 = float(BB[1][0]), float(BB[1][1])
+    if x0 != x0 or y0 != y0 or x1 != x1 or y1 != y1: # NaN
+        return None
+    return (x0, y0, x1, y1)
+
+def _IsFinite(box):
+    # The box isn't Null, so this is only NaN if there is an infinity
+    Sum = box[0] + box[1] + box[2] + box[3]
+    return Sum - Sum == 0
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+#----------------------------------------------------------------------------
+# Name:         SpatialIndexTest.py
+# Purpose:      Test code for the SpatialIndex Object
+#
+# Author:
+#
+# Created:
+# Version:
+# Date:
+# Licence:
+# Tags:         phoenix-port
+#----------------------------------------------------------------------------
+
+"""
+Test code for the SpatialIndex Object
+
+"""
+
+import random
+import unittest
+
+from SpatialIndex import SpatialIndex
+
+inf = float('inf')
+nan = float('nan')
+
+class Obj(object):
+    def __init__(self, BB):
+        self.BoundingBox = BB
+
+def Overlaps(BB1, BB2):
+    return (BB1[1][0] >= BB2[0][0] and BB1[0][0] <= BB2[1][0] and
+            BB1[1][1] >= BB2[0][1] and BB1[0][1] <= BB2[1][1])
+
+class testQuery(unittest.TestCase):
+    def setUp(self):
+        self.A = Obj(((0, 0), (1, 1)))
+        self.B = Obj(((5, 5), (6, 6)))
+        self.C = Obj(((2, 2), (2, 2)))
+        self.Index = SpatialIndex()
+        self.Index.Build([self.A, self.B, self.C])
+
+    def testLen(self):
+        self.failUnless(len(self.Index) == 3)
+
+    def testQuery(self):
+        self.failUnless(self.Index.Query(((0.5, 0.5), (2, 3))) == [self.A, self.C])
+
+    def testTouching(self):
+        self.failUnless(self.Index.Query(((1, 1), (1.5, 1.5))) == [self.A])
+
+    def testEmpty(self):
+        self.failUnless(self.Index.Query(((10, 10), (11, 11))) == [])
+
+    def testAll(self):
+        self.failUnless(self.Index.Query(((-inf, -inf), (inf, inf))) == [self.A, self.B, self.C])
+
+    def testPoint(self):
+        self.failUnless(self.Index.QueryPoint((5.5, 5.5)) == [self.B])
+        self.failUnless(self.Index.QueryPoint((2.5, 2.5)) == [])
+        self.failUnless(self.Index.QueryPoint((2.5, 2.5), 0.5) == [self.C])
+
+class testChanges(unittest.TestCase):
+    def setUp(self):
+        self.A = Obj(((0, 0), (1, 1)))
+        self.B = Obj(((5, 5), (6, 6)))
+        self.Index = SpatialIndex(CellSize=1.0)
+        self.Index.Build([self.A, self.B])
+
+    def testRemove(self):
+        self.Index.Remove(self.A)
+        self.failIf(self.A in self.Index)
+        self.failUnless(self.Index.Query(((0, 0), (10, 10))) == [self.B])
+        self.Index.Remove(self.A)
+
+    def testUpdateKeepsOrder(self):
+        self.A.BoundingBox = ((5.5, 5.5), (7, 7))
+        self.Index.Update(self.A)
+        self.failUnless(self.Index.Query(((0, 0), (1, 1))) == [])
+        self.failUnless(self.Index.Query(((5, 5), (6, 6))) == [self.A, self.B])
+
+    def testInsertGoesLast(self):
+        self.Index.Insert(self.A)
+        self.failUnless(self.Index.Query(((0, 0), (10, 10))) == [self.B, self.A])
+
+    def testLarge(self):
+        Big = Obj(((-100, -100), (100, 100)))
+        self.Index.Insert(Big)
+        self.failUnless(self.Index.Query(((50, 50), (51, 51))) == [Big])
+        Inf = Obj(((-inf, -inf), (inf, inf)))
+        self.Index.Insert(Inf)
+        self.failUnless(self.Index.Query(((50, 50), (51, 51))) == [Big, Inf])
+        self.Index.Remove(Big)
+        self.failUnless(self.Index.Query(((50, 50), (51, 51))) == [Inf])
+
+    def testNull(self):
+        Null = Obj(((nan, nan), (nan, nan)))
+        self.Index.Insert(Null)
+        self.failUnless(Null in self.Index)
+        self.failUnless(self.Index.Query(((-inf, -inf), (inf, inf))) == [self.A, self.B])
+        self.Index.Remove(Null)
+        self.failUnless(len(self.Index) == 2)
+
+class testRandom(unittest.TestCase):
+    def testMatchesScan(self):
+        rand = random.Random(42)
+        Objects = []
+        for i in range(500):
+            x, y = rand.uniform(-100, 100), rand.uniform(-100, 100)
+            w, h = rand.uniform(0, 10), rand.uniform(0, 10)
+            Objects.append(Obj(((x, y), (x + w, y + h))))
+        Index = SpatialIndex()
+        Index.Build(Objects)
+        for obj in Objects[::3]:
+            x, y = rand.uniform(-100, 100), rand.uniform(-100, 100)
+            obj.BoundingBox = ((x, y), (x + 1, y + 1))
+            Index.Update(obj)
+        for i in range(50):
+            x, y = rand.uniform(-120, 120), rand.uniform(-120, 120)
+            w, h = rand.uniform(0, 50), rand.uniform(0, 50)
+            BB = ((x, y), (x + w, y + h))
+            Expected = [obj for obj in Objects if Overlaps(obj.BoundingBox, BB)]
+            self.failUnless(Index.Query(BB) == Expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+#----------------------------------------------------------------------------
+# Name:         TileCache.py
+# Purpose:      A least recently used cache of rendered tiles
+#
+# Author:
+#
+# Created:
+# Version:
+# Date:
+# Licence:
+# Tags:         phoenix-port
+#----------------------------------------------------------------------------
+"""
+A least recently used cache with a memory budget
+
+The FloatCanvas uses it to keep the tiles of the background it has
+rendered, keyed by zoom level and tile coordinates.
+
+"""
+
+from collections import OrderedDict
+
+
+class TileCache(object):
+    """
+    A cache that holds items up to a total size in bytes, evicting the least
+    recently used ones when it is full.
+
+    """
+    def __init__(self, MaxBytes):
+        """
+        Default class constructor.
+
+        :param integer `MaxBytes`: the total size the items may take
+
+        """
+        self.MaxBytes = MaxBytes
+        self._items = OrderedDict()
+        self.Bytes = 0
+        self.Hits = 0
+        self.Misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def Get(self, key):
+        """
+        Return the item stored under key, or None, and make it the most
+        recently used one.
+
+        """
+        try:
+            item, size = self._items.pop(key)
+        except KeyError:
+            self.Misses += 1
+            return None
+        self._items[key] = (item, size)
+        self.Hits += 1
+        return item
+
+    def Put(self, key, item, size):
+        """
+        Store an item, replacing the one under the same key, and evict the
+        least recently used items until the cache fits in its budget. An item
+        bigger than the whole budget isn't stored.
+
+        :param `key`: any hashable key
+        :param `item`: the item to store
+        :param integer `size`: the size of the item in bytes
+
+        """
+        self.Remove(key)
+        if size > self.MaxBytes:
+            return
+        while self.Bytes + size > self.MaxBytes:
+            old, (olditem, oldsize) = self._items.popitem(last=False)
+            self.Bytes -= oldsize
+        self._items[key] = (item, size)
+        self.Bytes += size
+
+    def Fits(self, size):
+        """
+        Whether an item of size bytes can be stored without evicting any.
+
+        """
+        return self.Bytes + size <= self.MaxBytes
+
+    def Remove(self, key):
+        """Remove the item stored under key, if any."""
+        try:
+            item, size = self._items.pop(key)
+        except KeyError:
+            return
+        self.Bytes -= size
+
+    def Clear(self):
+        """Remove all the items."""
+        self._items.clear()
+        self.Bytes = 0
+
+    def Stats(self):
+        """
+        Return a dict with the number of ``hits`` and ``misses``, the number
+        of ``items`` and their total size in ``bytes``.
+
+        """
+        return {'hits': self.Hits, 'misses': self.Misses,
+                'items': len(self._items), 'bytes': self.Bytes}
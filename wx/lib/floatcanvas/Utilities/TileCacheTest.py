@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+#----------------------------------------------------------------------------
+# Name:         TileCacheTest.py
+# Purpose:      Test code for the TileCache Object
+#
+# Author:
+#
+# Created:
+# Version:
+# Date:
+# Licence:
+# Tags:         phoenix-port
+#----------------------------------------------------------------------------
+
+"""
+Test code for the TileCache Object
+
+"""
+
+import unittest
+
+from TileCache import TileCache
+
+class testCache(unittest.TestCase):
+    def setUp(self):
+        self.Cache = TileCache(100)
+        self.Cache.Put('a', 1, 40)
+        self.Cache.Put('b', 2, 40)
+
+    def testGet(self):
+        self.failUnless(self.Cache.Get('a') == 1)
+        self.failUnless(self.Cache.Get('c') is None)
+        self.failUnless(self.Cache.Stats() ==
+                        {'hits': 1, 'misses': 1, 'items': 2, 'bytes': 80})
+
+    def testEvictsLeastRecentlyUsed(self):
+        self.Cache.Get('a')
+        self.Cache.Put('c', 3, 40)
+        self.failUnless('a' in self.Cache)
+        self.failIf('b' in self.Cache)
+        self.failUnless(self.Cache.Bytes == 80)
+
+    def testReplace(self):
+        self.Cache.Put('a', 4, 10)
+        self.failUnless(self.Cache.Get('a') == 4)
+        self.failUnless(self.Cache.Bytes == 50)
+
+    def testTooBig(self):
+        self.Cache.Put('c', 3, 200)
+        self.failIf('c' in self.Cache)
+        self.failUnless(len(self.Cache) == 2)
+
+    def testFits(self):
+        self.failUnless(self.Cache.Fits(20))
+        self.failIf(self.Cache.Fits(21))
+
+    def testClear(self):
+        self.Cache.Clear()
+        self.failUnless(len(self.Cache) == 0)
+        self.failUnless(self.Cache.Bytes == 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
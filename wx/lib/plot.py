@@ -111,6 +111,7 @@ Zooming controls with mouse (when enabled):
 
 import  string as _string
 import  time as _time
+import  bisect as _bisect
 import  sys
 import  wx
 
@@ -131,18 +132,153 @@ except:
 #
 # Plotting classes...
 #
+class _PointBuffer:
+    """Storage for the points of a curve that are appended to.
+
+    Without a maximum number of points the storage doubles in size when it
+    is full. With one, it is a ring buffer that drops the oldest points. The
+    ring is stored twice, one copy after the other, so the points are always
+    a contiguous slice of it.
+    """
+
+    def __init__(self, points, maxPoints=None):
+        self.maxPoints = maxPoints
+        if maxPoints is not None:
+            points = points[len(points)-min(len(points), maxPoints):]
+            self._capacity = max(maxPoints, 1)
+            self._data = _Numeric.zeros((2*self._capacity, 2), _Numeric.Float64)
+        else:
+            self._capacity = max(2*len(points), 1024)
+            self._data = _Numeric.zeros((self._capacity, 2), _Numeric.Float64)
+        self._start = 0
+        self._len = 0
+        self.extend(points)
+
+    def array(self):
+        """The points, oldest first. Appending points overwrites the array."""
+        return self._data[self._start:self._start+self._len]
+
+    def extend(self, points):
+        """Append points, and return the number of old points dropped"""
+        n = len(points)
+        if self.maxPoints is None:
+            if self._len + n > self._capacity:
+                self._capacity = max(2*self._capacity, self._len + n)
+                data = _Numeric.zeros((self._capacity, 2), _Numeric.Float64)
+                data[:self._len] = self.array()
+                self._data = data
+            self._data[self._len:self._len+n] = points
+            self._len += n
+            return 0
+        capacity = self._capacity
+        dropped = max(self._len + n - capacity, 0)
+        if n > capacity:
+            points = points[n-capacity:]
+        index = (self._start + self._len + _Numeric.arange(len(points))) % capacity
+        self._data[index] = points
+        self._data[index + capacity] = points
+        self._start = (self._start + max(self._len + len(points) - capacity, 0)) % capacity
+        self._len = min(self._len + len(points), capacity)
+        return dropped
+
+
+class _PointIndex:
+    """Finds the point of a curve closest to a given point.
+
+    The points are sorted by x and split into blocks of consecutive points,
+    each with its bounding box. A search starts at the block where the x of
+    the given point falls and walks outwards in both directions, until the
+    x distance to the next block is more than the distance to the closest
+    point found so far. Distances are measured after multiplying x and y by
+    weights, so one index serves both user and screen coordinates.
+    """
+
+    blockSize = 256
+
+    def __init__(self, points, sortedX):
+        n = len(points)
+        if sortedX:
+            self._order = None
+        else:
+            self._order = _Numeric.argsort(points[:,0])
+            points = _Numeric.take(points, self._order, 0)
+        size = self.blockSize
+        nBlocks = (n + size - 1) // size
+        if nBlocks * size > n:
+            # pad the last block with copies of the last point
+            pad = _Numeric.zeros((nBlocks * size - n, 2), _Numeric.Float64) + points[-1]
+            points = _Numeric.concatenate((points, pad))
+        blocks = points.reshape((nBlocks, size, 2))
+        self._points = points
+        self._lo = _Numeric.minimum.reduce(blocks, 1)
+        self._hi = _Numeric.maximum.reduce(blocks, 1)
+        # the x range of each block, in increasing order
+        self._loX = [float(x) for x in self._lo[:,0]]
+        self._hiX = [float(x) for x in self._hi[:,0]]
+        self._n = n
+
+    def closest(self, pntXY, weights=(1.0, 1.0)):
+        """Returns the index of the point closest to pntXY"""
+        q = _Numeric.array(pntXY, _Numeric.Float64)
+        w = _Numeric.absolute(_Numeric.array(weights, _Numeric.Float64))
+        x, xWeight = float(q[0]), float(w[0])
+        nBlocks = len(self._hiX)
+        first = min(_bisect.bisect_left(self._hiX, x), nBlocks - 1)
+        best, bestIndex = self._search(first, q, w)
+
+        # the blocks to the right start further and further right of x, and
+        # the ones to the left end further and further left of it
+        right, left = first + 1, first - 1
+        while right < nBlocks and ((self._loX[right] - x) * xWeight)**2 <= best:
+            best, bestIndex = self._searchCloser(right, q, w, best, bestIndex)
+            right += 1
+        while left >= 0 and ((x - self._hiX[left]) * xWeight)**2 <= best:
+            best, bestIndex = self._searchCloser(left, q, w, best, bestIndex)
+            left -= 1
+        if self._order is not None:
+            bestIndex = self._order[bestIndex]
+        return int(bestIndex)
+
+    def _searchCloser(self, block, q, w, best, bestIndex):
+        # skip the block if its bounding box is further than the best point
+        gap = _Numeric.maximum(_Numeric.maximum(self._lo[block] - q, q - self._hi[block]), 0.0) * w
+        if _Numeric.add.reduce(gap**2) > best:
+            return best, bestIndex
+        d, index = self._search(block, q, w)
+        if d < best:
+            return d, index
+        return best, bestIndex
+
+    def _search(self, block, q, w):
+        start = block * self.blockSize
+        end = min(start + self.blockSize, self._n)
+        d = _Numeric.add.reduce(((self._points[start:end] - q) * w)**2, 1)
+        i = int(_Numeric.argmin(d))
+        return d[i], start + i
+
+
 class PolyPoints:
     """Base Class for lines and markers
         - All methods are private.
     """
 
+    # Draw at most this many points per pixel column before decimating
+    _decimateThreshold = 4
+    # Number of decimated point arrays kept, one per zoom level
+    _decimateCacheSize = 8
+    # Number of points before the appended ones drawn with them
+    _appendedOverlap = 0
+
     def __init__(self, points, attr):
         self._points = _Numeric.array(points).astype(_Numeric.Float64)
+        self._buffer = None
+        self._appended = 0
         self._logscale = (False, False)
         self._pointSize = (1.0, 1.0)
+        self._xRange = None
         self.currentScale= (1,1)
         self.currentShift= (0,0)
-        self.scaled = self.points
+        self._clearCache()
         self.attributes = {}
         self.attributes.update(self._attributes)
         for name, value in attr.items():
@@ -150,20 +286,89 @@ class PolyPoints:
                 raise KeyError, "Style attribute incorrect. Should be one of %s" % self._attributes.keys()
             self.attributes[name] = value
 
+    def _clearCache(self):
+        # the log scaled points, their bounding box, whether x is sorted,
+        # the index of the points, the scaled points and the decimated
+        # points of each zoom level
+        self._cachedPoints = None
+        self._cachedBox = None
+        self._sortedX = None
+        self._pointIndex = None
+        self._scaled = None
+        self._decimated = {}
+
     def setLogScale(self, logscale):
+        if tuple(logscale) != tuple(self._logscale):
+            self._clearCache()
         self._logscale = logscale
 
+    def setMaxPoints(self, maxPoints):
+        """Keep at most maxPoints points, dropping the oldest ones when points
+        are appended. None keeps all the points."""
+        self._buffer = _PointBuffer(self._points.reshape((-1, 2)), maxPoints)
+        self._points = self._buffer.array()
+        self._clearCache()
+
+    def getMaxPoints(self):
+        """The maximum number of points kept, or None"""
+        if self._buffer is None:
+            return None
+        return self._buffer.maxPoints
+
+    def appendPoints(self, points):
+        """Append a sequence of (x,y) points to the end of the curve.
+
+        The points can then be drawn with PlotCanvas.DrawAppended, which only
+        draws the part of the plot that changed.
+        """
+        points = _Numeric.array(points).astype(_Numeric.Float64).reshape((-1, 2))
+        if len(points) == 0:
+            return
+        if self._buffer is None:
+            self._buffer = _PointBuffer(self._points.reshape((-1, 2)))
+        lastX = None
+        if len(self._points) > 0:
+            lastX = self._points[-1,0]
+        dropped = self._buffer.extend(points)
+        self._points = self._buffer.array()
+        self._appended = min(self._appended + len(points), len(self._points))
+
+        # update what can be updated cheaply, the rest is recomputed
+        box = self._cachedBox
+        sortedX = self._sortedX
+        self._clearCache()
+        if self._logscale[0] or self._logscale[1]:
+            return
+        if box is not None and not dropped:
+            self._cachedBox = (_Numeric.minimum(box[0], _Numeric.minimum.reduce(points)),
+                               _Numeric.maximum(box[1], _Numeric.maximum.reduce(points)))
+        if sortedX is not None:
+            x = points[:,0]
+            self._sortedX = bool(sortedX and (lastX is None or x[0] >= lastX) and
+                                 _Numeric.alltrue(x[1:] >= x[:-1]))
+
+    def getAppendedPoints(self):
+        """The scaled points appended since the curve was last drawn"""
+        n = min(self._appended + self._appendedOverlap, len(self.points))
+        return self.currentScale*self.points[len(self.points)-n:]+self.currentShift
+
     def __getattr__(self, name):
         if name == 'points':
-            if len(self._points)>0:
-                data = _Numeric.array(self._points,copy=True)
-                if self._logscale[0]:
-                    data = self.log10(data, 0)
-                if self._logscale[1]:
-                    data = self.log10(data, 1)
-                return data
-            else:
-                return self._points
+            if self._cachedPoints is None:
+                data = self._points.view()
+                if len(data)>0:
+                    if self._logscale[0]:
+                        data = self.log10(data, 0)
+                    if self._logscale[1]:
+                        data = self.log10(data, 1)
+                # the cached array is shared, so keep callers from changing it
+                data.flags.writeable = False
+                self._cachedPoints = data
+            return self._cachedPoints
+        elif name == 'scaled':
+            if self._scaled is None:
+                self._scaled = self.currentScale*self.points+self.currentShift
+            return self._scaled
         else:
             raise AttributeError, name
 
@@ -179,21 +384,79 @@ class PolyPoints:
             minXY= _Numeric.array([-1.0,-1.0])
             maxXY= _Numeric.array([ 1.0, 1.0])
         else:
-            minXY= _Numeric.minimum.reduce(self.points)
-            maxXY= _Numeric.maximum.reduce(self.points)
+            if self._cachedBox is None:
+                self._cachedBox = (_Numeric.minimum.reduce(self.points),
+                                   _Numeric.maximum.reduce(self.points))
+            minXY= self._cachedBox[0].copy()
+            maxXY= self._cachedBox[1].copy()
         return minXY, maxXY
 
     def scaleAndShift(self, scale=(1,1), shift=(0,0)):
-        if len(self.points) == 0:
-            # no curves to draw
-            return
-        if (scale is not self.currentScale) or (shift is not self.currentShift):
-            # update point scaling
-            self.scaled = scale*self.points+shift
+        if (tuple(scale) != tuple(self.currentScale) or
+            tuple(shift) != tuple(self.currentShift)):
+            # update point scaling, the scaled points are computed when needed
             self.currentScale= scale
             self.currentShift= shift
+            self._scaled = None
         # else unchanged use the current scaling
 
+    def _isSortedX(self):
+        """True if the x values never decrease"""
+        if self._sortedX is None:
+            x = self.points[:,0]
+            self._sortedX = bool(len(x) < 2 or
+                                 _Numeric.alltrue(x[1:] >= x[:-1]))
+        return self._sortedX
+
+    def _visibleRange(self):
+        """Index range of the points in the visible x range, including the
+        points just outside it so lines run to the edge of the plot"""
+        n = len(self.points)
+        if self._xRange is None or not self._isSortedX():
+            return 0, n
+        x = self.points[:,0]
+        lo, hi = min(self._xRange), max(self._xRange)
+        start = max(int(x.searchsorted(lo)) - 1, 0)
+        end = min(int(x.searchsorted(hi, 'right')) + 1, n)
+        return start, end
+
+    def _pixels(self, points):
+        """Scale points to the dc, and return them with their device pixels"""
+        coords = self.currentScale*points+self.currentShift
+        pixels = _Numeric.floor(coords / self._pointSize)
+        return coords, pixels
+
+    def getDrawPoints(self):
+        """The scaled points to draw, decimated so there are not many more of
+        them than pixels. The result is cached per zoom level."""
+        if len(self.points) == 0:
+            return self.points
+        key = (tuple(self.currentScale), tuple(self.currentShift),
+               tuple(self._pointSize), self._xRange)
+        coords = self._decimated.get(key)
+        if coords is None:
+            coords = self._decimate()
+            if len(self._decimated) >= self._decimateCacheSize:
+                self._decimated.clear()
+            self._decimated[key] = coords
+        return coords
+
+    def _decimate(self):
+        """Drop the points that would be drawn on the same pixel as the point
+        before them"""
+        start, end = self._visibleRange()
+        coords, pixels = self._pixels(self.points[start:end])
+        return self._dropRepeats(coords, pixels)
+
+    def _dropRepeats(self, coords, pixels):
+        if len(coords) < 2:
+            return coords
+        moved = _Numeric.sometrue(pixels[1:] != pixels[:-1], 1)
+        if _Numeric.alltrue(moved):
+            return coords
+        keep = _Numeric.concatenate(([True], moved))
+        return _Numeric.compress(keep, coords, 0)
+
     def getLegend(self):
         return self.attributes['legend']
 
@@ -203,19 +466,22 @@ class PolyPoints:
             if pointScaled == True based on screen coords
             if pointScaled == False based on user coords
         """
+        # the points are indexed once, for both screen and user coords
+        if self._pointIndex is None:
+            self._pointIndex = _PointIndex(self.points, self._isSortedX())
         if pointScaled == True:
             #Using screen coords
-            p = self.scaled
+            pntIndex = self._pointIndex.closest(pntXY, self.currentScale)
+            p = self.currentScale * self.points[pntIndex] + self.currentShift
             pxy = self.currentScale * _Numeric.array(pntXY)+ self.currentShift
         else:
             #Using user coords
-            p = self.points
+            pntIndex = self._pointIndex.closest(pntXY)
+            p = self.points[pntIndex]
             pxy = _Numeric.array(pntXY)
-        #determine distance for each point
-        d= _Numeric.sqrt(_Numeric.add.reduce((p-pxy)**2,1)) #sqrt(dx^2+dy^2)
-        pntIndex = _Numeric.argmin(d)
-        dist = d[pntIndex]
-        return [pntIndex, self.points[pntIndex], self.scaled[pntIndex] / self._pointSize, dist]
+        dist = _Numeric.sqrt(_Numeric.add.reduce((p-pxy)**2)) #sqrt(dx^2+dy^2)
+        scaledXY = self.currentScale * self.points[pntIndex] + self.currentShift
+        return [pntIndex, self.points[pntIndex].copy(), scaledXY / self._pointSize, dist]
 
 
 class PolyLine(PolyPoints):
@@ -227,6 +493,7 @@ class PolyLine(PolyPoints):
                    'width': 1,
                    'style': wx.SOLID,
                    'legend': ''}
+    _appendedOverlap = 1
 
     def __init__(self, points, **attr):
         """
@@ -255,8 +522,9 @@ class PolyLine(PolyPoints):
         pen.SetCap(wx.CAP_BUTT)
         dc.SetPen(pen)
         if coord == None:
-            if len(self.scaled): # bugfix for Mac OS X
-                dc.DrawLines(self.scaled)
+            coords = self.getDrawPoints()
+            if len(coords): # bugfix for Mac OS X
+                dc.DrawLines(coords)
         else:
             dc.DrawLines(coord) # draw legend line
 
@@ -266,6 +534,30 @@ class PolyLine(PolyPoints):
         w= 5 * h
         return (w,h)
 
+    def _decimate(self):
+        """Keep the first, lowest, highest and last point of each pixel
+        column, which draw the same line as all the points in it"""
+        if not self._isSortedX():
+            return PolyPoints._decimate(self)
+        start, end = self._visibleRange()
+        coords, pixels = self._pixels(self.points[start:end])
+        n = len(coords)
+        columns = pixels[:,0]
+        starts = (columns[1:] != columns[:-1]).nonzero()[0] + 1
+        if n <= self._decimateThreshold * (len(starts) + 1):
+            return self._dropRepeats(coords, pixels)
+        starts = _Numeric.concatenate(([0], starts))
+        ends = _Numeric.concatenate((starts[1:], [n])) - 1
+        y = coords[:,1]
+        decimated = _Numeric.zeros((len(starts), 4, 2), _Numeric.Float64)
+        decimated[:,0] = coords[starts]
+        decimated[:,1,0] = coords[starts,0]
+        decimated[:,1,1] = _Numeric.minimum.reduceat(y, starts)
+        decimated[:,2,0] = coords[starts,0]
+        decimated[:,2,1] = _Numeric.maximum.reduceat(y, starts)
+        decimated[:,3] = coords[ends]
+        return decimated.reshape((-1, 2))
+
 class PolySpline(PolyLine):
     """Class to define line type and style
         - All methods except __init__ are private.
@@ -370,8 +662,9 @@ class PolyMarker(PolyPoints):
         else:
             dc.SetBrush(wx.Brush(colour, fillstyle))
         if coord == None:
-            if len(self.scaled): # bugfix for Mac OS X
-                self._drawmarkers(dc, self.scaled, marker, size)
+            coords = self.getDrawPoints()
+            if len(coords): # bugfix for Mac OS X
+                self._drawmarkers(dc, coords, marker, size)
         else:
             self._drawmarkers(dc, coord, marker, size) # draw legend marker
 
@@ -446,6 +739,7 @@ class PlotGraphics:
         self.xLabel= xLabel
         self.yLabel= yLabel
         self._pointSize = (1.0, 1.0)
+        self._xRange = None
 
     def setLogScale(self, logscale):
         if type(logscale) != tuple:
@@ -499,7 +793,9 @@ class PlotGraphics:
         for o in self.objects:
             #t=_time.clock()          # profile info
             o._pointSize = self._pointSize
+            o._xRange = self._xRange
             o.draw(dc, self.printerScale)
+            o._appended = 0
             #dt= _time.clock()-t
             #print(o, "time=", dt)
 
@@ -617,6 +913,7 @@ class PlotCanvas(wx.Panel):
 
         # Drawing Variables
         self.last_draw = None
+        self._streamState = None    # what DrawAppended needs of the last draw
         self._pointScale= 1
         self._pointShift= 0
         self._xSpec= 'auto'
@@ -1123,7 +1420,53 @@ class PlotCanvas(wx.Panel):
                 yAxis = _Numeric.log10(yAxis)
         self._Draw(graphics, xAxis, yAxis, dc)
 
-    def _Draw(self, graphics, xAxis = None, yAxis = None, dc = None):
+    def DrawAppended(self, xAxis = None, yAxis = None):
+        """Draw the points appended to the curves of the graph last drawn.
+
+        Add points to the curves with their appendPoints method, and use
+        setMaxPoints to only keep the latest ones. xAxis and yAxis are as
+        for Draw, None fits the axis to the points.
+
+        When the axes don't change, only the appended points are drawn. When
+        only the x axis moves, the plot is scrolled and only the part of it
+        scrolled in is drawn. Otherwise the whole graph is drawn again.
+        """
+        if self.last_draw == None:
+            return
+        graphics, lastXAxis, lastYAxis = self.last_draw
+        graphics.setLogScale(self.getLogScale())
+
+        if type(xAxis) not in [type(None),tuple]:
+            raise TypeError, "xAxis should be None or (minX,maxX)"+str(type(xAxis))
+        if type(yAxis) not in [type(None),tuple]:
+            raise TypeError, "yAxis should be None or (minY,maxY)"+str(type(yAxis))
+        if xAxis != None:
+            if xAxis[0] == xAxis[1]:
+                return
+            if self.getLogScale()[0]:
+                xAxis = _Numeric.log10(xAxis)
+        if yAxis != None:
+            if yAxis[0] == yAxis[1]:
+                return
+            if self.getLogScale()[1]:
+                yAxis = _Numeric.log10(yAxis)
+        if xAxis == None or yAxis == None:
+            p1, p2 = graphics.boundingBox()     # min, max points of graphics
+            if xAxis == None:
+                xAxis = self._axisInterval(self._xSpec, p1[0], p2[0])
+            if yAxis == None:
+                yAxis = self._axisInterval(self._ySpec, p1[1], p2[1])
+        xAxis = (xAxis[0], xAxis[1])
+        yAxis = (yAxis[0], yAxis[1])
+
+        self.last_PointLabel = None     # the buffer is drawn over it
+        if (self._streamReady() and
+            tuple(lastXAxis) == xAxis and tuple(lastYAxis) == yAxis):
+            self._drawAppendedPoints(graphics)
+        else:
+            self._Draw(graphics, xAxis, yAxis, scroll=True)
+
+    def _Draw(self, graphics, xAxis = None, yAxis = None, dc = None, scroll = False):
         """\
         Draw objects in graphics with specified x and y axis.
         graphics- instance of PlotGraphics with list of PolyXXX objects
@@ -1131,9 +1474,15 @@ class PlotCanvas(wx.Panel):
         yAxis - same as xAxis
         dc - drawing context - doesn't have to be specified.
         If it's not, the offscreen buffer is used
+        scroll - reuse the plot already in the buffer if only the x axis
+        moved, and only draw the part of it that was scrolled in
         """
 
-        if dc == None:
+        toBuffer = dc == None
+        saved = None
+        if toBuffer:
+            if scroll and self._streamReady():
+                saved = self._saveStreamArea()
             # sets new dc and clears it
             dc = wx.BufferedDC(wx.ClientDC(self.canvas), self._Buffer)
             bbr = wx.Brush(self.GetBackgroundColour(), wx.SOLID)
@@ -1249,15 +1598,24 @@ class PlotCanvas(wx.Panel):
         shift = -p1*scale + self.plotbox_origin + textSize_shift * _Numeric.array((1,-1))
         self._pointScale= scale / self._pointSize  # make available for mouse events
         self._pointShift= shift / self._pointSize
-        self._drawAxes(dc, p1, p2, scale, shift, xticks, yticks)
-
         graphics.scaleAndShift(scale, shift)
+        graphics._xRange = (p1[0], p2[0])   # only the points in range are drawn
         graphics.setPrinterScale(self.printerScale)  # thicken up lines and markers if printing
 
         # set clipping area so drawing does not occur outside axis box
         ptx,pty,rectWidth,rectHeight= self._point2ClientCoord(p1, p2)
         # allow graph to overlap axis lines by adding units to width and height
-        dc.SetClippingRegion(ptx*self._pointSize[0],pty*self._pointSize[1],rectWidth*self._pointSize[0]+2,rectHeight*self._pointSize[1]+1)
+        plotRect = (ptx*self._pointSize[0],pty*self._pointSize[1],rectWidth*self._pointSize[0]+2,rectHeight*self._pointSize[1]+1)
+        clipRect = plotRect
+        residual = 0.0
+        if saved is not None:
+            scrolled = self._scrollStreamArea(dc, saved, graphics, scale, shift, plotRect)
+            if scrolled is not None:
+                # only draw the part that was scrolled in
+                clipRect, graphics._xRange, residual = scrolled
+        self._drawAxes(dc, p1, p2, scale, shift, xticks, yticks)
+
+        dc.SetClippingRegion(*clipRect)
         # Draw the lines and markers
         #start = _time.clock()
         graphics.draw(dc)
@@ -1265,6 +1623,12 @@ class PlotCanvas(wx.Panel):
         # remove the clipping region
         dc.DestroyClippingRegion()
 
+        if toBuffer:
+            self._streamState = (tuple(scale), tuple(shift), residual,
+                                 plotRect, self._streamOptions())
+        else:
+            self._streamState = None
+
         self._adjustScrollbars()
 
     def Redraw(self, dc=None):
@@ -1289,6 +1653,7 @@ class PlotCanvas(wx.Panel):
         dc.SetTextForeground(self.GetForegroundColour())
         dc.SetTextBackground(self.GetBackgroundColour())
         self.last_draw = None
+        self._streamState = None
 
     def Zoom(self, Center, Ratio):
         """ Zoom on the plot
@@ -1536,6 +1901,87 @@ class PlotCanvas(wx.Panel):
             self._Buffer = tmp_Buffer
 
 
+    def _streamOptions(self):
+        """The options that change how the plot area looks"""
+        return (self._pointSize, self.printerScale, self._logscale,
+                self._gridEnabled, self._centerLinesEnabled,
+                self._diagonalsEnabled, self._antiAliasingEnabled,
+                self._gridColour, self.GetBackgroundColour())
+
+    def _streamReady(self):
+        """True if the buffer holds a plot that DrawAppended can draw on"""
+        return (self._streamState is not None and
+                self._pointSize == (1.0, 1.0) and
+                self._streamState[4] == self._streamOptions())
+
+    def _streamRect(self):
+        """The plot area of the last draw in whole pixels, inside the buffer"""
+        x, y, w, h = self._streamState[3]
+        x0, y0 = max(int(x), 0), max(int(y), 0)
+        x1 = min(int(x + w), self._Buffer.GetWidth())
+        y1 = min(int(y + h), self._Buffer.GetHeight())
+        return x0, y0, x1 - x0, y1 - y0
+
+    def _saveStreamArea(self):
+        """A copy of the plot area of the buffer, for _scrollStreamArea"""
+        x, y, w, h = self._streamRect()
+        if w <= 0 or h <= 0:
+            return None
+        return self._Buffer.GetSubBitmap(wx.Rect(x, y, w, h))
+
+    def _scrollStreamArea(self, dc, saved, graphics, scale, shift, plotRect):
+        """Draw the plot area saved before the x axis moved, scrolled to where
+        it is now. Returns the rectangle left to draw, the x range of the points
+        in it and the part of a pixel the plot wasn't scrolled by, or None if
+        the plot has to be drawn in full.
+        """
+        oldScale, oldShift, residual, oldRect = self._streamState[:4]
+        if (self._centerLinesEnabled in ('Vertical', True) or
+            self._diagonalsEnabled or len(graphics) == 0 or
+            max([abs(a - b) for a, b in zip(plotRect, oldRect)]) > 1e-6 or
+            abs(scale[0] - oldScale[0]) > 1e-9 * abs(oldScale[0]) or
+            abs(scale[1] - oldScale[1]) > 1e-9 * abs(oldScale[1]) or
+            abs(shift[1] - oldShift[1]) > 1e-6):
+            # the plot doesn't just move along the x axis
+            return None
+        x, y, w, h = self._streamRect()
+        # the rounding of each scroll is kept, so it doesn't add up
+        offset = oldShift[0] - shift[0] + residual
+        dx = int(round(offset))
+        # draw over the tick marks of the right axis, and the appended points
+        margin = int(max(graphics.getSymExtent(self.printerScale)) +
+                     3 * self.printerScale) + 2
+        left = x + w - dx - margin
+        for o in graphics:
+            if getattr(o, '_appended', 0):
+                appended = o.getAppendedPoints()
+                if len(appended):
+                    left = min(left, int(_Numeric.minimum.reduce(appended[:,0])) - margin)
+        if dx < 0 or left < x + w / 2:
+            return None
+        memDC = wx.MemoryDC(saved)
+        dc.Blit(x, y, left - x, h, memDC, dx, 0)
+        memDC.SelectObject(wx.NullBitmap)
+        xRange = ((left - shift[0]) / scale[0], (x + w - shift[0]) / scale[0])
+        return (left, y, x + w - left, h), xRange, offset - dx
+
+    def _drawAppendedPoints(self, graphics):
+        """Draw the appended points on the plot in the buffer"""
+        dc = wx.BufferedDC(wx.ClientDC(self.canvas), self._Buffer)
+        if self._antiAliasingEnabled:
+            try:
+                dc = wx.GCDC(dc)
+            except Exception, exception:
+                pass
+        dc.SetClippingRegion(*self._streamState[3])
+        for o in graphics:
+            if getattr(o, '_appended', 0):
+                appended = o.getAppendedPoints()
+                if len(appended) > o._appendedOverlap:
+                    o.draw(dc, self.printerScale, appended)
+                o._appended = 0
+        dc.DestroyClippingRegion()
+
     def _drawLegend(self,dc,graphics,rhsW,topH,legendBoxWH, legendSymExt, legendTextExt):
         """Draws legend symbols and text"""
         # top right hand corner of graph box is ref corner